@@ -2,13 +2,23 @@
 claude_runner — shared module for claude -p subprocess invocations.
 
 Self-contained, no external dependencies. Provides environment isolation,
-CLI argument construction, subprocess execution, stream-json parsing,
-and prompt template loading.
+CLI argument construction, subprocess execution (buffered, streaming with
+idle/total timeouts, or asyncio via arun/arun_many), incremental stream-json
+parsing, prompt template loading, and a host-wide cap on concurrent
+headless runs.
 """
 
+import asyncio
+import codecs
+import fcntl
 import json
 import os
+import selectors
+import signal
 import subprocess
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -64,17 +74,112 @@ def build_args(
     return args
 
 
+# =============================================================================
+# HOST-WIDE SLOTS
+# =============================================================================
+def _ticket_alive(path: Path) -> bool:
+    """A waiter holds an exclusive flock on its ticket; if we can take it, the waiter is gone."""
+    try:
+        with open(path) as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+    except OSError:
+        return False
+    return False
+
+
+@contextmanager
+def host_slot(max_slots: int, wait_timeout: float = 600, root: Path | None = None, poll: float = 0.2):
+    """Hold one of `max_slots` host-wide run slots for the duration of the block.
+
+    Slots are flock'd files under root/slots; waiters queue FIFO as ticket
+    files under root/queue and only the oldest live ticket may take a free
+    slot. Locks die with their process, so a crashed run or waiter never
+    leaks a slot. Yields (acquired, waited_seconds); acquired is False when
+    no slot freed up within wait_timeout. root defaults to ~/.meridian/run-slots.
+    """
+    root = root or Path.home() / ".meridian" / "run-slots"
+    slots_dir = root / "slots"
+    queue_dir = root / "queue"
+    slots_dir.mkdir(parents=True, exist_ok=True)
+    queue_dir.mkdir(parents=True, exist_ok=True)
+
+    # Lock the ticket before it becomes visible, so nobody prunes it as dead
+    name = f"{time.time_ns():020d}-{os.getpid()}"
+    ticket = open(queue_dir / f".{name}", "w")
+    fcntl.flock(ticket, fcntl.LOCK_EX)
+    os.rename(queue_dir / f".{name}", queue_dir / name)
+
+    start = time.time()
+    slot = None
+    try:
+        while slot is None:
+            head = None
+            for other in sorted(queue_dir.iterdir()):
+                if other.name.startswith("."):
+                    continue
+                if other.name == name or _ticket_alive(other):
+                    head = other.name
+                    break
+                other.unlink(missing_ok=True)  # Waiter died in the queue
+
+            if head == name:
+                for i in range(max(1, max_slots)):
+                    candidate = open(slots_dir / f"slot-{i}", "a")
+                    try:
+                        fcntl.flock(candidate, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        slot = candidate
+                        break
+                    except BlockingIOError:
+                        candidate.close()
+            if slot is None:
+                if time.time() - start >= wait_timeout:
+                    break
+                time.sleep(poll)
+    finally:
+        (queue_dir / name).unlink(missing_ok=True)
+        ticket.close()
+
+    try:
+        yield slot is not None, time.time() - start
+    finally:
+        if slot is not None:
+            slot.close()
+
+
 def run(
     prompt: str,
     args: list[str] | None = None,
     env: dict | None = None,
     cwd: str | None = None,
     timeout: int = 180,
+    max_concurrent: int | None = None,
+    queue_timeout: float = 600,
 ) -> dict:
     """Execute claude -p and return the result.
 
-    Returns: {"success": bool, "exit_code": int, "stdout": str, "stderr": str}
+    With max_concurrent set, first waits (FIFO, up to queue_timeout) for one
+    of that many host-wide slots; exit_code -6 means no slot freed up.
+
+    Returns: {"success": bool, "exit_code": int, "stdout": str, "stderr": str,
+              "queue_wait_seconds": float}
     """
+    if max_concurrent:
+        with host_slot(max_concurrent, queue_timeout) as (acquired, waited):
+            if not acquired:
+                return {
+                    "success": False,
+                    "exit_code": -6,
+                    "stdout": "",
+                    "stderr": f"No headless run slot free after {waited:.0f}s",
+                    "queue_wait_seconds": round(waited, 1),
+                }
+            result = run(prompt, args=args, env=env, cwd=cwd, timeout=timeout)
+            result["queue_wait_seconds"] = round(waited, 1)
+            return result
+
     if args is None:
         args = build_args()
     if env is None:
@@ -85,6 +190,7 @@ def run(
         "exit_code": -1,
         "stdout": "",
         "stderr": "",
+        "queue_wait_seconds": 0.0,
     }
 
     try:
@@ -117,29 +223,52 @@ def run(
     return result
 
 
-def parse_stream_json(stdout: str) -> tuple[list[dict], str]:
-    """Parse stream-json output into (tools_used, text_output).
+# =============================================================================
+# STREAM-JSON PARSING
+# =============================================================================
+class StreamParser:
+    """Incremental stream-json parser.
 
-    tools_used: list of {"tool": "Write", "file": "/path/to/file"}
-    text_output: the final result text from the "result" entry
+    feed() takes output in arbitrary pieces and returns the events completed
+    by it. Tool uses, the final result text and usage accumulate on the
+    parser, so callers don't need to keep stdout around.
     """
-    tools_used = []
-    result_text = ""
 
-    for line in stdout.strip().split("\n"):
+    def __init__(self):
+        self.tools_used = []  # [{"tool": "Write", "file": "/path"}, ...]
+        self.result_text = ""
+        self.usage = {}
+        self.events = 0
+        self._pending = ""
+
+    def feed(self, text: str) -> list[dict]:
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()  # Incomplete last line
+        return [event for event in map(self._parse_line, lines) if event is not None]
+
+    def close(self) -> list[dict]:
+        """Parse a final line that had no trailing newline."""
+        event = self._parse_line(self._pending)
+        self._pending = ""
+        return [event] if event is not None else []
+
+    def _parse_line(self, line: str) -> dict | None:
         if not line.strip():
-            continue
+            return None
         try:
             entry = json.loads(line)
         except json.JSONDecodeError:
-            continue
+            return None
+        if not isinstance(entry, dict):
+            return None
+        self.events += 1
 
         # Collect tool usage from assistant messages
         msg = entry.get("message", {})
-        content = msg.get("content", [])
+        content = msg.get("content", []) if isinstance(msg, dict) else []
         if isinstance(content, list):
             for block in content:
-                if block.get("type") == "tool_use":
+                if isinstance(block, dict) and block.get("type") == "tool_use":
                     tool_entry = {"tool": block.get("name", "unknown")}
                     input_data = block.get("input", {})
                     file_path = (
@@ -149,15 +278,362 @@ def parse_stream_json(stdout: str) -> tuple[list[dict], str]:
                     )
                     if file_path:
                         tool_entry["file"] = file_path
-                    tools_used.append(tool_entry)
+                    self.tools_used.append(tool_entry)
 
-        # The result entry contains the final response text
+        # The result entry contains the final response text and usage
         if entry.get("type") == "result":
             r = entry.get("result", "")
             if r and isinstance(r, str):
-                result_text = r
+                self.result_text = r
+            if isinstance(entry.get("usage"), dict):
+                self.usage = entry["usage"]
+        return entry
+
+
+def parse_stream_json(stdout: str) -> tuple[list[dict], str]:
+    """Parse stream-json output into (tools_used, text_output).
+
+    tools_used: list of {"tool": "Write", "file": "/path/to/file"}
+    text_output: the final result text from the "result" entry
+    """
+    parser = StreamParser()
+    parser.feed(stdout)
+    parser.close()
+    return parser.tools_used, parser.result_text
+
+
+# =============================================================================
+# STREAMING EXECUTION
+# =============================================================================
+STDIN_CHUNK = 64 * 1024
+STDERR_KEEP = 16 * 1024  # Tail of stderr kept in the result
+EXIT_GRACE_SECONDS = 10  # After stdout closes, how long claude gets to exit before it is killed
+
 
-    return tools_used, result_text
+def _kill_group(proc) -> None:
+    """SIGKILL the process group started for proc (claude and anything it spawned)."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _feed_stdin(proc, data: bytes, failed: list) -> None:
+    try:
+        for i in range(0, len(data), STDIN_CHUNK):
+            proc.stdin.write(data[i:i + STDIN_CHUNK])
+            proc.stdin.flush()
+    except (BrokenPipeError, ValueError, OSError) as e:
+        failed.append(e)
+    finally:
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+
+
+def _drain_stderr(proc, tail: list) -> None:
+    for chunk in iter(lambda: proc.stderr.read(4096), b""):
+        tail[0] = (tail[0] + chunk)[-STDERR_KEEP:]
+
+
+def run_streaming(
+    prompt: str,
+    args: list[str] | None = None,
+    env: dict | None = None,
+    cwd: str | None = None,
+    timeout: float = 180,
+    idle_timeout: float | None = 60,
+    on_event=None,
+    max_concurrent: int | None = None,
+    queue_timeout: float = 600,
+) -> dict:
+    """Execute claude -p, parsing stream-json output as it arrives.
+
+    The prompt is written to stdin in chunks from a helper thread while
+    stdout is read and parsed incrementally, so memory stays flat however
+    long the output gets. on_event(event) is called for every parsed line.
+    The run is killed (whole process group) after `timeout` seconds in total
+    or `idle_timeout` seconds without output. max_concurrent/queue_timeout
+    behave as in run().
+
+    Returns: {"success", "exit_code", "stdout" (always ""), "stderr" (tail),
+              "queue_wait_seconds", "tools_used", "result_text", "usage",
+              "events", "timed_out" (None, "idle" or "total")}
+    """
+    if max_concurrent:
+        with host_slot(max_concurrent, queue_timeout) as (acquired, waited):
+            if not acquired:
+                result = _streaming_result()
+                result["exit_code"] = -6
+                result["stderr"] = f"No headless run slot free after {waited:.0f}s"
+                result["queue_wait_seconds"] = round(waited, 1)
+                return result
+            result = run_streaming(prompt, args=args, env=env, cwd=cwd, timeout=timeout,
+                                   idle_timeout=idle_timeout, on_event=on_event)
+            result["queue_wait_seconds"] = round(waited, 1)
+            return result
+
+    if args is None:
+        args = build_args()
+    if env is None:
+        env = build_env()
+
+    result = _streaming_result()
+    try:
+        proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                cwd=cwd, env=env, start_new_session=True)
+    except FileNotFoundError:
+        result["exit_code"] = -3
+        result["stderr"] = "claude CLI not found"
+        return result
+    except OSError as e:
+        result["exit_code"] = -5
+        result["stderr"] = f"OSError: {e}"
+        return result
+
+    stdin_errors = []
+    stderr_tail = [b""]
+    writer = threading.Thread(target=_feed_stdin, args=(proc, prompt.encode(), stdin_errors), daemon=True)
+    reader = threading.Thread(target=_drain_stderr, args=(proc, stderr_tail), daemon=True)
+    writer.start()
+    reader.start()
+
+    parser = StreamParser()
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    fd = proc.stdout.fileno()
+    start = last_output = time.monotonic()
+    finished = False
+    try:
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while True:
+                now = time.monotonic()
+                if now - start >= timeout:
+                    result["timed_out"] = "total"
+                    break
+                if idle_timeout and now - last_output >= idle_timeout:
+                    result["timed_out"] = "idle"
+                    break
+                wait = timeout - (now - start)
+                if idle_timeout:
+                    wait = min(wait, idle_timeout - (now - last_output))
+                if not sel.select(max(wait, 0.01)):
+                    continue
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break  # EOF
+                last_output = time.monotonic()
+                for event in parser.feed(decoder.decode(chunk)):
+                    if on_event:
+                        on_event(event)
+        finished = True
+    finally:
+        # A timeout or an exception (e.g. from on_event) must not leave claude running
+        if not finished or result["timed_out"]:
+            _kill_group(proc)
+        try:
+            proc.wait(timeout=EXIT_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            _kill_group(proc)
+            proc.wait()
+        writer.join(timeout=5)
+        reader.join(timeout=5)
+        proc.stdout.close()
+        proc.stderr.close()
+
+    for event in parser.feed(decoder.decode(b"", final=True)) + parser.close():
+        if on_event:
+            on_event(event)
+
+    result["stderr"] = stderr_tail[0].decode("utf-8", "replace")
+    result["tools_used"] = parser.tools_used
+    result["result_text"] = parser.result_text
+    result["usage"] = parser.usage
+    result["events"] = parser.events
+    if result["timed_out"]:
+        limit = timeout if result["timed_out"] == "total" else idle_timeout
+        result["exit_code"] = -2
+        result["stderr"] = f"Timed out after {limit}s ({result['timed_out']})"
+    elif stdin_errors and proc.returncode != 0:
+        result["exit_code"] = -4
+        result["stderr"] = f"BrokenPipeError: {stdin_errors[0]}"
+    else:
+        result["exit_code"] = proc.returncode
+        result["success"] = proc.returncode == 0
+    return result
+
+
+def _streaming_result() -> dict:
+    return {
+        "success": False,
+        "exit_code": -1,
+        "stdout": "",
+        "stderr": "",
+        "queue_wait_seconds": 0.0,
+        "tools_used": [],
+        "result_text": "",
+        "usage": {},
+        "events": 0,
+        "timed_out": None,
+    }
+
+
+# =============================================================================
+# ASYNCIO
+# =============================================================================
+async def _feed_stdin_async(proc, data: bytes, failed: list) -> None:
+    try:
+        for i in range(0, len(data), STDIN_CHUNK):
+            proc.stdin.write(data[i:i + STDIN_CHUNK])
+            await proc.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError) as e:
+        failed.append(e)
+    finally:
+        proc.stdin.close()
+
+
+async def _drain_stderr_async(proc, tail: list) -> None:
+    while chunk := await proc.stderr.read(4096):
+        tail[0] = (tail[0] + chunk)[-STDERR_KEEP:]
+
+
+async def arun(
+    prompt: str,
+    args: list[str] | None = None,
+    env: dict | None = None,
+    cwd: str | None = None,
+    timeout: float = 180,
+    idle_timeout: float | None = 60,
+    on_event=None,
+) -> dict:
+    """asyncio counterpart of run_streaming(); returns the same result dict.
+
+    Cancelling the awaiting task kills the subprocess group before the
+    CancelledError propagates. No host-wide slot is taken; bound concurrency
+    with arun_many() or your own semaphore.
+    """
+    if args is None:
+        args = build_args()
+    if env is None:
+        env = build_env()
+
+    result = _streaming_result()
+    spawn = asyncio.ensure_future(asyncio.create_subprocess_exec(
+        *args, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE, cwd=cwd, env=env, start_new_session=True))
+    try:
+        proc = await asyncio.shield(spawn)
+    except asyncio.CancelledError:
+        await _discard_spawn(spawn)
+        raise
+    except FileNotFoundError:
+        result["exit_code"] = -3
+        result["stderr"] = "claude CLI not found"
+        return result
+    except OSError as e:
+        result["exit_code"] = -5
+        result["stderr"] = f"OSError: {e}"
+        return result
+
+    stdin_errors = []
+    stderr_tail = [b""]
+    helpers = [asyncio.ensure_future(_feed_stdin_async(proc, prompt.encode(), stdin_errors)),
+               asyncio.ensure_future(_drain_stderr_async(proc, stderr_tail))]
+    parser = StreamParser()
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    finished = False
+    try:
+        while True:
+            wait = deadline - loop.time()
+            if idle_timeout:
+                wait = min(wait, idle_timeout)
+            try:
+                chunk = await asyncio.wait_for(proc.stdout.read(65536), max(wait, 0))
+            except asyncio.TimeoutError:
+                result["timed_out"] = "total" if loop.time() >= deadline else "idle"
+                break
+            if not chunk:
+                break
+            for event in parser.feed(decoder.decode(chunk)):
+                if on_event:
+                    on_event(event)
+        finished = True
+    finally:
+        if not finished or result["timed_out"]:
+            _kill_group(proc)
+        # Reap the child and the helpers even when cancelled, so nothing is left behind
+        await asyncio.shield(_reap(proc, helpers))
+
+    for event in parser.feed(decoder.decode(b"", final=True)) + parser.close():
+        if on_event:
+            on_event(event)
+
+    result["stderr"] = stderr_tail[0].decode("utf-8", "replace")
+    result["tools_used"] = parser.tools_used
+    result["result_text"] = parser.result_text
+    result["usage"] = parser.usage
+    result["events"] = parser.events
+    if result["timed_out"]:
+        limit = timeout if result["timed_out"] == "total" else idle_timeout
+        result["exit_code"] = -2
+        result["stderr"] = f"Timed out after {limit}s ({result['timed_out']})"
+    elif stdin_errors and proc.returncode != 0:
+        result["exit_code"] = -4
+        result["stderr"] = f"BrokenPipeError: {stdin_errors[0]}"
+    else:
+        result["exit_code"] = proc.returncode
+        result["success"] = proc.returncode == 0
+    return result
+
+
+async def _discard_spawn(spawn) -> None:
+    """Cancelled mid-spawn: wait for the child to exist, then kill and reap it."""
+    try:
+        proc = await spawn
+    except OSError:
+        return
+    _kill_group(proc)
+    await proc.wait()
+
+
+async def _reap(proc, helpers: list) -> None:
+    try:
+        await asyncio.wait_for(proc.wait(), EXIT_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        _kill_group(proc)
+        await proc.wait()
+    await asyncio.gather(*helpers, return_exceptions=True)
+
+
+async def arun_many(tasks: list, concurrency: int = 4, **defaults) -> list[dict]:
+    """Run many headless claude invocations, at most `concurrency` at a time.
+
+    Each task is a prompt string or a dict of arun() keyword arguments
+    (e.g. {"prompt": ..., "timeout": 60, "cwd": ...}); `defaults` fill in
+    whatever a task leaves out. Results come back in task order. Cancelling
+    arun_many cancels every task and kills their subprocesses.
+
+    Usage:
+        results = asyncio.run(arun_many(["prompt a", "prompt b"], concurrency=2, timeout=120))
+    """
+    semaphore = asyncio.BoundedSemaphore(max(1, concurrency))
+
+    async def one(task) -> dict:
+        kwargs = {**defaults, **(task if isinstance(task, dict) else {"prompt": task})}
+        async with semaphore:
+            return await arun(**kwargs)
+
+    runs = [asyncio.ensure_future(one(task)) for task in tasks]
+    try:
+        return await asyncio.gather(*runs)
+    except asyncio.CancelledError:
+        # gather() gives up at the first cancelled run; wait until every run
+        # has killed and reaped its subprocess before propagating
+        await asyncio.gather(*runs, return_exceptions=True)
+        raise
 
 
 def load_template(path: str | Path, **variables: str) -> str:
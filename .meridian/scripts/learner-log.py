@@ -2,19 +2,25 @@
 """
 Session Learner Log Viewer
 
-Reads the session-learner.jsonl log and displays a formatted table.
+Reads the session-learner.jsonl run history (including its rotated
+generations) and shows recent runs, latency and failure statistics, skip
+reasons, and per-period trends — enough to tell whether the learner is
+getting slower as the project grows.
 
 Usage:
-    python .meridian/scripts/learner-log.py [--last N]
+    python .meridian/scripts/learner-log.py [--last N] [--trend day|week] [--json]
 
-Reads from ~/.meridian/state/<hash>/session-learner.jsonl
-(auto-detects project hash from cwd).
+Reads from ~/.meridian/state/<hash>/session-learner.jsonl and
+session-learner.jsonl.N (auto-detects project hash from cwd).
 """
 
 import argparse
 import hashlib
 import json
+import math
 import sys
+from collections import Counter
+from datetime import datetime
 from pathlib import Path
 
 
@@ -24,6 +30,95 @@ def get_state_dir() -> Path:
     return Path.home() / ".meridian" / "state" / project_hash
 
 
+def read_history(log_path: Path) -> list[dict]:
+    """All logged entries, oldest first: rotated generations (highest number first), then the live file."""
+    rotated = [p for p in log_path.parent.glob(f"{log_path.name}.*") if p.suffix[1:].isdigit()]
+    paths = sorted(rotated, key=lambda p: -int(p.suffix[1:])) + [log_path]
+
+    entries = []
+    for path in paths:
+        try:
+            lines = path.read_text().splitlines()
+        except (IOError, OSError):
+            continue
+        for line in lines:
+            if line.strip():
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return entries
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Nearest-rank percentile, None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(len(ordered) * p / 100)) - 1]
+
+
+def seconds(value: float | None) -> str:
+    return "—" if value is None else f"{value:.0f}s"
+
+
+def kib(value: float | None) -> str:
+    return "—" if value is None else f"{value / 1024:.0f}K"
+
+
+def rate(part: int, whole: int) -> str:
+    return f"{100 * part / whole:.0f}%" if whole else "—"
+
+
+def is_timeout(entry: dict) -> bool:
+    return bool(entry.get("timed_out")) or entry.get("exit_code") == -2
+
+
+def summarize(entries: list[dict]) -> dict:
+    """Latency, failure and activity statistics over a list of log entries."""
+    runs = [e for e in entries if not e.get("skipped")]
+    skips = [e for e in entries if e.get("skipped")]
+    durations = [e.get("duration_seconds", 0) for e in runs]
+    message_bytes = [e["prompt"]["message_bytes"] for e in runs if isinstance(e.get("prompt"), dict)]
+    tools = [len(e.get("tools_used", [])) for e in runs]
+    files = [len(e.get("files_changed", [])) for e in runs]
+    return {
+        "entries": len(entries),
+        "runs": len(runs),
+        "skipped": len(skips),
+        "failures": sum(1 for e in runs if not e.get("success")),
+        "timeouts": sum(1 for e in runs if is_timeout(e)),
+        "duration_p50": percentile(durations, 50),
+        "duration_p95": percentile(durations, 95),
+        "queue_wait_p95": percentile([e.get("queue_wait_seconds", 0) for e in runs], 95),
+        "message_bytes_p50": percentile(message_bytes, 50),
+        "tools_per_run": round(sum(tools) / len(tools), 1) if tools else None,
+        "files_per_run": round(sum(files) / len(files), 1) if files else None,
+        "skip_reasons": dict(Counter(e.get("reason", "unknown") for e in skips).most_common()),
+        "top_files": Counter(f for e in runs for f in e.get("files_changed", [])).most_common(5),
+    }
+
+
+def period_key(timestamp: str, period: str) -> str:
+    """Bucket an entry timestamp by day (2026-02-27) or ISO week (2026-W09)."""
+    try:
+        ts = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return "?"
+    if period == "day":
+        return ts.strftime("%Y-%m-%d")
+    year, week, _ = ts.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def trend(entries: list[dict], period: str) -> list[tuple[str, dict]]:
+    """Per-period summaries, oldest period first."""
+    buckets: dict[str, list[dict]] = {}
+    for entry in entries:
+        buckets.setdefault(period_key(entry.get("timestamp", ""), period), []).append(entry)
+    return [(key, summarize(bucket)) for key, bucket in sorted(buckets.items())]
+
+
 def format_files(files_changed: list[str], diff_stat: str) -> str:
     """Format changed files into a compact summary."""
     if not files_changed:
@@ -51,74 +146,104 @@ def format_files(files_changed: list[str], diff_stat: str) -> str:
     return result
 
 
+def print_runs(entries: list[dict]):
+    for entry in entries:
+        ts = entry.get("timestamp", "?")
+        # Shorten timestamp: "2026-02-27T23:32:10" -> "02-27 23:32"
+        try:
+            short_ts = ts[5:16].replace("T", " ")
+        except (IndexError, TypeError):
+            short_ts = ts
+
+        trigger = entry.get("trigger") or "?"
+        if entry.get("skipped"):
+            print(f"  {short_ts}  {trigger:<8} –  skipped ({entry.get('reason', '?')})")
+            continue
+
+        success = entry.get("success", False)
+        status = "✓" if success else "✗"
+        duration = entry.get("duration_seconds", 0)
+        tool_count = len(entry.get("tools_used", []))
+        files_str = format_files(entry.get("files_changed", []), entry.get("diff_stat", ""))
+
+        if success:
+            duration_str = f"{duration:.0f}s"
+        elif is_timeout(entry):
+            duration_str = f"{duration:.0f}s (timeout)"
+        else:
+            duration_str = f"{duration:.0f}s (exit {entry.get('exit_code', -1)})"
+
+        print(f"  {short_ts}  {trigger:<8} {status}  {duration_str:<16} {tool_count} tools  {files_str}")
+
+
+def print_summary(stats: dict):
+    print(f"  {stats['runs']} runs, {stats['skipped']} skipped")
+    print(f"  Duration      p50 {seconds(stats['duration_p50'])}  p95 {seconds(stats['duration_p95'])}  "
+          f"(queue wait p95 {seconds(stats['queue_wait_p95'])})")
+    print(f"  Failures      {stats['failures']} ({rate(stats['failures'], stats['runs'])})  "
+          f"timeouts {stats['timeouts']} ({rate(stats['timeouts'], stats['runs'])})")
+    print(f"  Per run       {stats['tools_per_run'] if stats['tools_per_run'] is not None else '—'} tools  "
+          f"{stats['files_per_run'] if stats['files_per_run'] is not None else '—'} files changed  "
+          f"prompt p50 {kib(stats['message_bytes_p50'])}")
+    if stats["skip_reasons"]:
+        print("  Skip reasons  " + "  ".join(f"{reason} {count}" for reason, count in stats["skip_reasons"].items()))
+    if stats["top_files"]:
+        print("  Most changed  " + "  ".join(f"{Path(f).name} ×{count}" for f, count in stats["top_files"]))
+
+
+def print_trend(rows: list[tuple[str, dict]], period: str):
+    print(f"  {period:<10} {'runs':>5} {'skips':>6} {'p50':>6} {'p95':>6} {'fail':>6} {'t/out':>6} {'prompt':>7}")
+    for key, stats in rows:
+        print(f"  {key:<10} {stats['runs']:>5} {stats['skipped']:>6} {seconds(stats['duration_p50']):>6} "
+              f"{seconds(stats['duration_p95']):>6} {rate(stats['failures'], stats['runs']):>6} "
+              f"{rate(stats['timeouts'], stats['runs']):>6} {kib(stats['message_bytes_p50']):>7}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Session Learner Log Viewer")
-    parser.add_argument("--last", type=int, default=10, help="Show last N runs (default: 10)")
+    parser.add_argument("--last", type=int, default=10, help="Show last N entries (default: 10)")
+    parser.add_argument("--trend", choices=("day", "week"), default="week", help="Trend period (default: week)")
     parser.add_argument("--json", action="store_true", help="Output raw JSON")
     args = parser.parse_args()
 
     log_path = get_state_dir() / "session-learner.jsonl"
-    if not log_path.exists():
+    entries = read_history(log_path)
+    if not entries and not log_path.exists():
         print("No session learner log found.")
         print(f"Expected at: {log_path}")
         sys.exit(1)
 
-    entries = []
-    for line in log_path.read_text().strip().split('\n'):
-        if line.strip():
-            try:
-                entries.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
-
     if not entries:
         print("Log file is empty.")
         sys.exit(0)
 
-    entries = entries[-args.last:]
+    recent = entries[-args.last:]
 
     if args.json:
-        for entry in entries:
+        for entry in recent:
             print(json.dumps(entry))
         sys.exit(0)
 
-    # Formatted table output
     print()
     print("Session Learner History")
     print("━" * 80)
+    print_runs(recent)
+    print()
+    print(f"Showing last {len(recent)} of {len(entries)} entries")
+    print()
 
-    for entry in entries:
-        ts = entry.get("timestamp", "?")
-        # Shorten timestamp: "2026-02-27T23:32:10" -> "02-27 23:32"
-        try:
-            short_ts = ts[5:16].replace("T", " ")
-        except (IndexError, TypeError):
-            short_ts = ts
-
-        trigger = entry.get("trigger", "?")
-        success = entry.get("success", False)
-        status = "✓" if success else "✗"
-        duration = entry.get("duration_seconds", 0)
-        tools = entry.get("tools_used", [])
-        tool_count = len(tools)
-        files = entry.get("files_changed", [])
-        diff_stat = entry.get("diff_stat", "")
-
-        files_str = format_files(files, diff_stat)
-
-        if success:
-            duration_str = f"{duration:.0f}s"
-        else:
-            exit_code = entry.get("exit_code", -1)
-            if exit_code == -2:
-                duration_str = f"{duration:.0f}s (timeout)"
-            else:
-                duration_str = f"{duration:.0f}s (exit {exit_code})"
+    print("Summary (all history)")
+    print("━" * 80)
+    print_summary(summarize(entries))
+    print()
 
-        print(f"  {short_ts}  {trigger:<8} {status}  {duration_str:<16} {tool_count} tools  {files_str}")
+    rows = trend(entries, args.trend)
+    if len(rows) > 1:
+        print(f"Trend by {args.trend}")
+        print("━" * 80)
+        print_trend(rows, args.trend)
+        print()
 
-    print()
-    print(f"Showing last {len(entries)} of {len(entries)} entries")
     print(f"Log: {log_path}")
     print()
 
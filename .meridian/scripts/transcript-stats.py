@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Transcript Composition Viewer
+
+Reads transcript-stats.json (written by the session learner for the range it
+last processed, when `transcript_stats: true` is set in .meridian/config.yaml) and shows where the transcript's bytes go: line types,
+content blocks, tools, requestId repetition, and system-noise filtering.
+
+Usage:
+    python .meridian/scripts/transcript-stats.py [--top N] [--json]
+
+Reads from ~/.meridian/state/<hash>/transcript-stats.json
+(auto-detects project hash from cwd).
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+
+def get_state_dir() -> Path:
+    """Resolve state directory from cwd."""
+    project_hash = hashlib.md5(str(Path.cwd().resolve()).encode()).hexdigest()[:12]
+    return Path.home() / ".meridian" / "state" / project_hash
+
+
+def human(n: int) -> str:
+    """Format a byte count: 1234567 -> 1.2M."""
+    for unit, size in (("G", 1 << 30), ("M", 1 << 20), ("K", 1 << 10)):
+        if n >= size:
+            return f"{n / size:.1f}{unit}"
+    return str(n)
+
+
+def pct(part: int, whole: int) -> str:
+    return f"{100 * part / whole:.1f}%" if whole else "—"
+
+
+def print_table(title: str, rows: dict, total: int, top: int):
+    print(f"  {title}")
+    for name, row in list(rows.items())[:top]:
+        tokens = row.get("est_tokens", row["bytes"] // 4)
+        print(f"    {name:<24} {row['count']:>7}  {human(row['bytes']):>8}  {pct(row['bytes'], total):>6}  ~{tokens:,} tok")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript Composition Viewer")
+    parser.add_argument("--top", type=int, default=10, help="Rows per table (default: 10)")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    args = parser.parse_args()
+
+    stats_path = get_state_dir() / "transcript-stats.json"
+    if not stats_path.exists():
+        print("No transcript stats found. The session learner writes them when `transcript_stats: true` is set in .meridian/config.yaml.")
+        print(f"Expected at: {stats_path}")
+        sys.exit(1)
+
+    try:
+        stats = json.loads(stats_path.read_text())
+    except (IOError, json.JSONDecodeError):
+        print(f"Could not read {stats_path}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        sys.exit(0)
+
+    total = stats["total"]
+    print()
+    print("Transcript Composition")
+    print("━" * 80)
+    print(f"  {Path(stats.get('transcript', '?')).name}  bytes {stats.get('start', 0)}-{stats.get('end', 0)}  ({stats.get('generated_at', '?')})")
+    print(f"  {total['lines']:,} lines  {human(total['bytes'])}  ~{total['est_tokens']:,} tokens")
+    print()
+
+    print_table("Line types", stats["types"], total["bytes"], args.top)
+
+    block_total = sum(row["bytes"] for row in stats["blocks"].values())
+    print_table("Content blocks (payload)", stats["blocks"], block_total, args.top)
+
+    print("  Tools (input / result)")
+    for name, row in list(stats["tools"].items())[:args.top]:
+        print(f"    {name:<24} {row['calls']:>5} calls  {human(row['input_bytes']):>8} in  {human(row['result_bytes']):>8} out")
+    print()
+
+    req = stats["requests"]
+    print(f"  Assistant lines: {req['assistant_lines']:,} over {req['request_ids']:,} requestIds "
+          f"({req['lines_per_request']} per request, {human(req['repeat_bytes'])} in repeat lines)")
+
+    noise = stats["noise"]
+    user_bytes = noise["noise_bytes"] + noise["kept_bytes"]
+    print(f"  System noise: {noise['noise_texts']:,} of {noise['user_texts']:,} user texts, "
+          f"{human(noise['noise_bytes'])} ({pct(noise['noise_bytes'], user_bytes)} of user text) filtered")
+    print()
+    print(f"Stats: {stats_path}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,8 @@ from meridian_config import (
     LAST_SESSION_FILE,
     TRANSCRIPT_PATH_STATE,
     build_injected_context,
+    ensure_index_watcher,
+    get_project_config,
     is_headless,
     log_hook_output,
     get_state_dir,
@@ -39,8 +41,13 @@ def main() -> int:
     claude_project_dir = os.environ.get("CLAUDE_PROJECT_DIR", "")
     base_dir = Path(claude_project_dir)
 
+    # Keep the background index watcher alive so later scans read ready-made indexes
+    if get_project_config(base_dir).get('index_watcher', False):
+        ensure_index_watcher(base_dir)
+
     # Build the injected context (reads last-session.md among other files)
-    injected_context, injection_meta = build_injected_context(base_dir)
+    session_key = f"{input_data.get('session_id', '')}:{source}"
+    injected_context, injection_meta = build_injected_context(base_dir, session_key)
 
     # Delete last-session.md after reading — we own its lifecycle now
     # (session-cleanup can't do it because hooks run in parallel = race condition)
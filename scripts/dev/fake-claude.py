@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+fake-claude — local stand-in for the `claude` CLI in headless (-p) mode.
+
+Accepts the flags `claude_runner.build_args` produces (unknown flags are an
+error, so argument drift shows up), reads the prompt from stdin and answers
+with scripted stream-json, json or text output. Used by learner-replay.py;
+install it on PATH as `claude` to exercise session-learner.py or
+claude_runner without the real binary or network access.
+
+Behaviour comes from a JSON scenario file named by FAKE_CLAUDE_SCENARIO.
+Every key is optional:
+
+    latency      seconds before the first event (default 0.2)
+    event_delay  seconds between events (default 0)
+    exit_code    exit status; non-zero prints an error to stderr (default 0)
+    fail_first   fail this many invocations with exit 1 before behaving
+                 (call count is taken from FAKE_CLAUDE_LOG)
+    hang         after the init event, go silent for this many seconds
+    child_sleep  start a `sleep` child of this many seconds in the same
+                 process group (its pid is logged), to check group kills
+    replay       path to a recorded stream-json file, replayed line by line
+                 instead of the synthesized events
+    events       extra stream-json events emitted before the edits
+    edits        [{"file": "rel/path", "write": "..."} or {"file": ..., "append": "..."}]
+                 applied under the working directory, each announced as a
+                 Write/Edit tool_use; denied unless the tool is allowed
+    result       final result text
+    usage        usage dict for the result event
+    map          overrides applied when stdin is a learner map-reduce chunk
+
+FAKE_CLAUDE_LOG, when set, gets one JSON line per invocation (argv,
+stdin/system prompt sizes, start/end times, exit code).
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+MAP_CHUNK_MARKER = 'id="transcript-part"'
+
+DEFAULT_SCENARIO = {
+    "latency": 0.2,
+    "event_delay": 0.0,
+    "exit_code": 0,
+    "fail_first": 0,
+    "hang": 0,
+    "child_sleep": 0,
+    "replay": None,
+    "events": [],
+    "edits": [{"file": ".meridian/WORKSPACE.md", "append": "\n- Replayed learner note\n"}],
+    "result": "Updated the workspace.",
+    "usage": {"input_tokens": 0, "output_tokens": 120},
+    "map": {
+        "edits": [],
+        "result": '{"work_state": ["replayed chunk"], "corrections": [], "knowledge": []}',
+    },
+}
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="claude", add_help=False)
+    parser.add_argument("-p", "--print", action="store_true", dest="print_mode")
+    parser.add_argument("--model", default="default")
+    parser.add_argument("--output-format", choices=("text", "json", "stream-json"), default="text")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--allowedTools", default="")
+    parser.add_argument("--system-prompt", default="")
+    parser.add_argument("--dangerously-skip-permissions", action="store_true")
+    parser.add_argument("--no-session-persistence", action="store_true")
+    parser.add_argument("--setting-sources", default="")
+    return parser.parse_args(argv)
+
+
+def load_scenario(prompt: str) -> dict:
+    scenario = dict(DEFAULT_SCENARIO)
+    path = os.environ.get("FAKE_CLAUDE_SCENARIO")
+    if path:
+        scenario.update(json.loads(Path(path).read_text()))
+    if MAP_CHUNK_MARKER in prompt:
+        scenario.update(scenario.get("map") or {})
+    return scenario
+
+
+def record_call(entry: dict) -> int:
+    """Append to FAKE_CLAUDE_LOG under a lock. Returns how many calls came before this one."""
+    log_path = os.environ.get("FAKE_CLAUDE_LOG")
+    if not log_path:
+        return 0
+    with open(log_path, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        previous = sum(1 for line in f if '"phase": "start"' in line)
+        f.write(json.dumps(entry) + "\n")
+    return previous
+
+
+def apply_edit(edit: dict, args: argparse.Namespace) -> tuple[dict, dict]:
+    """Apply one scripted edit. Returns (tool_use event, tool_result event)."""
+    path = Path.cwd() / edit["file"]
+    tool = "Write" if "write" in edit or not path.exists() else "Edit"
+    allowed = args.dangerously_skip_permissions or tool in args.allowedTools.split(",")
+    tool_id = f"toolu_{uuid.uuid4().hex[:12]}"
+    if allowed:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if "write" in edit:
+            path.write_text(edit["write"])
+        else:
+            with open(path, "a") as f:
+                f.write(edit.get("append", ""))
+        result = {"type": "tool_result", "tool_use_id": tool_id, "content": "ok"}
+    else:
+        result = {"type": "tool_result", "tool_use_id": tool_id, "is_error": True,
+                  "content": f"Permission to use {tool} has been denied."}
+    use = {"type": "assistant", "message": {"role": "assistant", "content": [
+        {"type": "tool_use", "id": tool_id, "name": tool, "input": {"file_path": str(path)}}]}}
+    return use, {"type": "user", "message": {"role": "user", "content": [result]}}
+
+
+def emit(event: dict, delay: float) -> None:
+    if delay:
+        time.sleep(delay)
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if not args.print_mode:
+        print("fake-claude only supports -p", file=sys.stderr)
+        sys.exit(2)
+    if args.output_format == "stream-json" and not args.verbose:
+        print("Error: When using --print, --output-format=stream-json requires --verbose", file=sys.stderr)
+        sys.exit(1)
+
+    prompt = sys.stdin.read()
+    scenario = load_scenario(prompt)
+    started = time.time()
+    child = subprocess.Popen(["sleep", str(scenario["child_sleep"])]) if scenario["child_sleep"] else None
+    call = record_call({"phase": "start", "pid": os.getpid(), "argv": sys.argv[1:], "time": started,
+                        "stdin_bytes": len(prompt.encode()), "system_prompt_bytes": len(args.system_prompt.encode()),
+                        "map": MAP_CHUNK_MARKER in prompt, "child_pid": child.pid if child else None})
+
+    def finish(code: int) -> None:
+        record_call({"phase": "end", "pid": os.getpid(), "time": time.time(), "exit_code": code})
+        sys.exit(code)
+
+    time.sleep(scenario["latency"])
+    if call < scenario["fail_first"]:
+        print(f"fake-claude: scripted failure {call + 1}/{scenario['fail_first']}", file=sys.stderr)
+        finish(1)
+
+    delay = scenario["event_delay"]
+    streaming = args.output_format == "stream-json"
+    session_id = str(uuid.uuid4())
+    if streaming:
+        emit({"type": "system", "subtype": "init", "session_id": session_id, "model": args.model,
+              "tools": [t for t in args.allowedTools.split(",") if t]}, 0)
+    if scenario["hang"]:
+        time.sleep(scenario["hang"])
+
+    events = []
+    if scenario["replay"]:
+        with open(scenario["replay"]) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+    else:
+        events.extend(scenario["events"])
+        for edit in scenario["edits"]:
+            events.extend(apply_edit(edit, args))
+        events.append({"type": "result", "subtype": "success", "is_error": scenario["exit_code"] != 0,
+                       "result": scenario["result"], "session_id": session_id,
+                       "duration_ms": 0, "num_turns": 1 + len(scenario["edits"]), "usage": scenario["usage"]})
+    if events and events[-1].get("type") == "result":
+        events[-1]["duration_ms"] = int((time.time() - started) * 1000)
+
+    if streaming:
+        for event in events:
+            emit(event, delay)
+    else:
+        final = next((e for e in reversed(events) if e.get("type") == "result"), {"result": ""})
+        if args.output_format == "json":
+            print(json.dumps(final))
+        else:
+            print(final.get("result", ""))
+
+    if scenario["exit_code"]:
+        print(f"fake-claude: scripted exit {scenario['exit_code']}", file=sys.stderr)
+    finish(scenario["exit_code"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+frontmatter-bench — time doc frontmatter extraction against the previous reader.
+
+Generates a doc corpus in a temp dir: normal docs with a short header, plus
+files that open with `---` and never close it (horizontal rules, broken or
+generated docs), which the previous line-by-line reader walked to the end.
+Both readers extract every file; the best of --runs full scans is reported,
+for the whole corpus and for the normal docs alone, and the results are
+compared.
+
+Usage:
+    python scripts/dev/frontmatter-bench.py                       # 9,800 docs + 200 unclosed 2 MB files
+    python scripts/dev/frontmatter-bench.py --docs 2000 --unclosed 50 --unclosed-mb 8 --runs 5
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+from meridian_config import extract_frontmatter
+
+
+def previous_extract_frontmatter(file_path: Path) -> tuple[str, list[str]]:
+    """The reader before bounded reads: line by line until the closing `---`."""
+    try:
+        with file_path.open() as f:
+            first_line = f.readline()
+            if not first_line.startswith("---"):
+                return "", []
+            fm_lines = []
+            for line in f:
+                if line.strip() == "---":
+                    break
+                fm_lines.append(line)
+            else:
+                return "", []  # no closing ---
+            frontmatter = "\n".join(fm_lines).strip()
+    except IOError:
+        return "", []
+    summary = ""
+    read_when: list[str] = []
+    collecting_read_when = False
+
+    for line in frontmatter.split("\n"):
+        stripped = line.strip()
+
+        if stripped.startswith("summary:"):
+            summary = stripped[len("summary:"):].strip().strip("'\"")
+            collecting_read_when = False
+
+        elif stripped.startswith("read_when:"):
+            collecting_read_when = True
+            inline = stripped[len("read_when:"):].strip()
+            if inline.startswith("[") and inline.endswith("]"):
+                try:
+                    parsed = json.loads(inline.replace("'", '"'))
+                    if isinstance(parsed, list):
+                        read_when.extend(str(x).strip() for x in parsed if x)
+                except (json.JSONDecodeError, ValueError):
+                    pass
+
+        elif collecting_read_when and stripped.startswith("- "):
+            hint = stripped[2:].strip()
+            if hint:
+                read_when.append(hint)
+        elif collecting_read_when and stripped:
+            collecting_read_when = False
+
+    return summary, read_when
+
+
+# =============================================================================
+# CORPUS
+# =============================================================================
+def generate_corpus(root: Path, docs: int, unclosed: int, unclosed_mb: float) -> tuple[list[Path], list[Path]]:
+    """Write the corpus; returns (normal doc paths, unclosed file paths)."""
+    normal, broken = [], []
+    body = "\n".join(f"Paragraph {i} about the module and how it is wired up." for i in range(40)) + "\n"
+    for i in range(docs):
+        path = root / f"area-{i % 50}" / f"doc-{i}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"---\nsummary: How component {i} handles retries and caching\nread_when:\n"
+                        f"  - changing component {i}\n  - debugging retries\n---\n# Component {i}\n\n{body}")
+        normal.append(path)
+
+    line = "| column | value | notes about this generated table row |\n"
+    filler = line * max(1, int(unclosed_mb * 1024 * 1024 / len(line)))
+    for i in range(unclosed):
+        path = root / "generated" / f"table-{i}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("---\n" + filler)
+        broken.append(path)
+    return normal, broken
+
+
+def best_scan(reader, paths: list[Path], runs: int) -> tuple[float, list]:
+    """Best wall time of `runs` scans over paths, and the last scan's results."""
+    best = float("inf")
+    results = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = [reader(p) for p in paths]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frontmatter extraction against the previous reader")
+    parser.add_argument("--docs", type=int, default=9800, help="Normal docs with a closed header")
+    parser.add_argument("--unclosed", type=int, default=200, help="Files opening with --- that never close it")
+    parser.add_argument("--unclosed-mb", type=float, default=2.0, help="Size of each unclosed file in MB")
+    parser.add_argument("--runs", type=int, default=3, help="Scans per reader; the best is reported")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="frontmatter-bench-"))
+    try:
+        normal, broken = generate_corpus(tmp, args.docs, args.unclosed, args.unclosed_mb)
+        everything = normal + broken
+        report = {"docs": len(normal), "unclosed": len(broken), "unclosed_mb": args.unclosed_mb}
+        for label, paths in (("corpus", everything), ("normal", normal)):
+            prev_s, prev = best_scan(previous_extract_frontmatter, paths, args.runs)
+            new_s, new = best_scan(extract_frontmatter, paths, args.runs)
+            report[label] = {"previous_s": round(prev_s, 3), "bounded_s": round(new_s, 3), "identical": prev == new}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['docs']} docs + {report['unclosed']} unclosed files of {args.unclosed_mb} MB, best of {args.runs}")
+    for label in ("corpus", "normal"):
+        r = report[label]
+        print(f"  {label:<7} previous {r['previous_s']:.3f}s  bounded {r['bounded_s']:.3f}s  "
+              f"identical={r['identical']}")
+
+
+if __name__ == "__main__":
+    main()
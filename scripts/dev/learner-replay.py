@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+learner-replay — run the session learner end to end against fixture transcripts.
+
+Each run gets a throwaway sandbox: its own HOME (state dir, host run slots),
+a git-initialized project with a workspace file, and fake-claude.py on PATH
+as `claude`. The real hook (session-learner.py, fed SessionEnd hook JSON)
+enqueues the job; the spool is then drained in a child process the harness
+owns, so its wall time and peak RSS can be measured. The harness holds the
+worker pidfile lock meanwhile, so the hook never detaches a worker of its own.
+
+Usage:
+    python scripts/dev/learner-replay.py                          # generated 200-turn transcript
+    python scripts/dev/learner-replay.py --transcript a.jsonl --transcript b.jsonl
+    python scripts/dev/learner-replay.py --generate 2000 --chunk-tokens 20000 --runs 3
+    python scripts/dev/learner-replay.py --scenario slow.json --json
+
+--scenario is a fake-claude scenario file (see fake-claude.py).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DEV_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = DEV_DIR.parent
+LEARNER = SCRIPTS_DIR / "session-learner.py"
+FAKE_CLAUDE = DEV_DIR / "fake-claude.py"
+
+WORKSPACE_SEED = """# Workspace
+
+### Replay Project
+Fixture project for learner replays.
+**In Progress:** nothing yet
+"""
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+def generate_transcript(path: Path, turns: int, seed: int = 0) -> None:
+    """Write a synthetic transcript shaped like a real session.
+
+    Each turn has a user prompt, assistant text with a repeated streaming line
+    per requestId, tool calls (Read, Edit, Write, Bash) with their results, and
+    progress noise. A compact boundary is placed a third of the way in.
+    """
+    rng = random.Random(seed)
+    code = lambda n: "\n".join(f"    value_{i} = compute({i}, flag={rng.random() < 0.5})" for i in range(n))
+
+    def line(obj: dict) -> str:
+        return json.dumps(obj, separators=(",", ":")) + "\n"
+
+    def assistant(request_id: str, content: list) -> str:
+        return line({"type": "assistant", "requestId": request_id, "message": {"role": "assistant", "content": content}})
+
+    def tool_result(tool_id: str, content: str) -> str:
+        return line({"type": "user", "message": {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": tool_id, "content": content}]}})
+
+    with open(path, "w") as f:
+        for turn in range(turns):
+            if turn == turns // 3:
+                f.write(line({"type": "system", "subtype": "compact_boundary", "content": "Conversation compacted"}))
+            module = f"src/module_{turn % 40}.py"
+            f.write(line({"type": "user", "message": {"role": "user", "content":
+                          f"Turn {turn}: please update {module} so the handler retries on timeout."}}))
+            request_id = f"req_{turn}"
+            thought = f"Looking at {module}. The retry loop should back off exponentially. " * rng.randint(1, 4)
+            f.write(assistant(request_id, [{"type": "thinking", "thinking": thought * 3}]))
+            f.write(assistant(request_id, [{"type": "text", "text": thought}]))
+            for kind in ("Read", "Edit", "Bash") + (("Write",) if turn % 7 == 0 else ()):
+                tool_id = f"toolu_{turn}_{kind}"
+                if kind == "Read":
+                    tool_input, result = {"file_path": f"/repo/{module}"}, code(rng.randint(40, 200))
+                elif kind == "Edit":
+                    tool_input = {"file_path": f"/repo/{module}", "old_string": code(rng.randint(3, 30)),
+                                  "new_string": code(rng.randint(3, 40))}
+                    result = "The file has been updated."
+                elif kind == "Write":
+                    tool_input = {"file_path": f"/repo/src/new_{turn}.py", "content": code(rng.randint(100, 400))}
+                    result = "File created."
+                else:
+                    tool_input = {"command": f"cd /repo && python -m pytest -q tests/test_module_{turn % 40}.py 2>&1 | tail -30",
+                                  "description": "Run the module tests"}
+                    result = f"{rng.randint(5, 60)} passed in {rng.random() * 3:.2f}s"
+                f.write(assistant(request_id, [{"type": "tool_use", "id": tool_id, "name": kind, "input": tool_input}]))
+                f.write(line({"type": "progress", "data": {"type": "hook_progress", "tool": kind}}))
+                f.write(tool_result(tool_id, result))
+            f.write(assistant(f"{request_id}_done", [{"type": "text", "text": f"Done with turn {turn}."}]))
+
+
+# =============================================================================
+# SANDBOX
+# =============================================================================
+def make_sandbox(root: Path, chunk_tokens: int | None) -> dict:
+    """Create HOME, project and bin dirs. Returns the paths and the child environment."""
+    home, project, bin_dir = root / "home", root / "project", root / "bin"
+    for d in (home, project / ".meridian", bin_dir):
+        d.mkdir(parents=True, exist_ok=True)
+    (project / ".meridian" / "WORKSPACE.md").write_text(WORKSPACE_SEED)
+    if chunk_tokens:
+        (project / ".meridian" / "config.yaml").write_text(f"learner_chunk_tokens: {chunk_tokens}\n")
+    (bin_dir / "claude").symlink_to(FAKE_CLAUDE)
+
+    env = {k: v for k, v in os.environ.items() if k not in ("MERIDIAN_HEADLESS", "CLAUDECODE")}
+    env.update({
+        "HOME": str(home),
+        "PATH": f"{bin_dir}{os.pathsep}{env.get('PATH', '')}",
+        "CLAUDE_PROJECT_DIR": str(project),
+        "FAKE_CLAUDE_LOG": str(root / "fake-claude.jsonl"),
+        "GIT_AUTHOR_NAME": "replay", "GIT_AUTHOR_EMAIL": "replay@example.invalid",
+        "GIT_COMMITTER_NAME": "replay", "GIT_COMMITTER_EMAIL": "replay@example.invalid",
+    })
+    # Backdated, so the fixture commit never counts as session activity
+    git_env = {**env, "GIT_AUTHOR_DATE": "2000-01-01T00:00:00Z", "GIT_COMMITTER_DATE": "2000-01-01T00:00:00Z"}
+    for cmd in (["git", "init", "-q"], ["git", "add", "-A"], ["git", "commit", "-q", "-m", "fixture"]):
+        subprocess.run(cmd, cwd=project, env=git_env, capture_output=True)
+    return {"home": home, "project": project, "env": env, "fake_log": root / "fake-claude.jsonl"}
+
+
+def hold_worker_lock(sandbox: dict) -> subprocess.Popen:
+    """Keep the learner worker pidfile flock'd from a helper process, so the hook sees a live worker."""
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); from pathlib import Path; import learner_spool; "
+        "f = learner_spool.acquire_worker_lock(Path(sys.argv[2])); print('ok' if f else 'busy', flush=True); sys.stdin.read()"
+    )
+    holder = subprocess.Popen([sys.executable, "-c", code, str(SCRIPTS_DIR / "lib"), str(sandbox["project"])],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=sandbox["env"])
+    if holder.stdout.readline().strip() != "ok":
+        raise RuntimeError("could not take the worker lock")
+    return holder
+
+
+def drain_in_child(sandbox: dict) -> tuple[float, int, int]:
+    """Drain the spool in a child process. Returns (seconds, peak RSS in KB, exit status)."""
+    code = (
+        "import importlib.util, sys; from pathlib import Path; "
+        "spec = importlib.util.spec_from_file_location('session_learner', sys.argv[1]); "
+        "mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod); "
+        "mod.drain_spool(Path(sys.argv[2]).resolve())"
+    )
+    start = time.monotonic()
+    proc = subprocess.Popen([sys.executable, "-c", code, str(LEARNER), str(sandbox["project"])], env=sandbox["env"])
+    _pid, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return time.monotonic() - start, usage.ru_maxrss, proc.returncode
+
+
+def read_jsonl(path: Path) -> list[dict]:
+    try:
+        return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    except (IOError, json.JSONDecodeError):
+        return []
+
+
+# =============================================================================
+# RUNS
+# =============================================================================
+def replay(transcript: Path, scenario: Path | None, chunk_tokens: int | None, keep: bool) -> dict:
+    """One end-to-end learner run in a fresh sandbox."""
+    root = Path(tempfile.mkdtemp(prefix="learner-replay-"))
+    try:
+        sandbox = make_sandbox(root, chunk_tokens)
+        if scenario:
+            sandbox["env"]["FAKE_CLAUDE_SCENARIO"] = str(scenario.resolve())
+        holder = hold_worker_lock(sandbox)
+        try:
+            hook_input = json.dumps({"hook_event_name": "SessionEnd", "transcript_path": str(transcript.resolve())})
+            start = time.monotonic()
+            hook = subprocess.run([sys.executable, str(LEARNER)], input=hook_input, text=True,
+                                  capture_output=True, env=sandbox["env"], cwd=sandbox["project"])
+            hook_ms = (time.monotonic() - start) * 1000
+            drain_seconds, maxrss_kb, drain_status = drain_in_child(sandbox)
+        finally:
+            holder.stdin.close()
+            holder.wait()
+
+        state_dirs = list((sandbox["home"] / ".meridian" / "state").glob("*"))
+        runs = read_jsonl(state_dirs[0] / "session-learner.jsonl") if state_dirs else []
+        run = runs[-1] if runs else {}  # The run entry, or the skip that ended the job
+        calls = [c for c in read_jsonl(sandbox["fake_log"]) if c.get("phase") == "start"]
+        return {
+            "transcript": str(transcript),
+            "transcript_bytes": transcript.stat().st_size,
+            "hook_ms": round(hook_ms, 1),
+            "hook_exit": hook.returncode,
+            "drain_seconds": round(drain_seconds, 2),
+            "drain_exit": drain_status,
+            "drain_maxrss_mb": round(maxrss_kb / 1024, 1),
+            "claude_calls": len(calls),
+            "map_calls": sum(1 for c in calls if c.get("map")),
+            "stdin_bytes": sum(c["stdin_bytes"] for c in calls),
+            "system_prompt_bytes": max((c["system_prompt_bytes"] for c in calls), default=0),
+            "success": run.get("success"),
+            "skip_reason": run.get("reason") if run.get("skipped") else None,
+            "agent_seconds": run.get("duration_seconds"),
+            "files_changed": run.get("files_changed"),
+            "run_log": run,
+            "sandbox": str(root) if keep else None,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def print_report(results: list[dict]) -> None:
+    print()
+    print("Learner Replay")
+    print("━" * 100)
+    print(f"  {'transcript':<28} {'size':>8} {'hook':>8} {'drain':>8} {'rss':>8} {'calls':>6} {'map':>4} {'prompt in':>10} {'ok':>5}")
+    for r in results:
+        print(f"  {Path(r['transcript']).name[:28]:<28} {r['transcript_bytes'] / 1024:>7.0f}K {r['hook_ms']:>6.0f}ms "
+              f"{r['drain_seconds']:>7.2f}s {r['drain_maxrss_mb']:>6.1f}MB {r['claude_calls']:>6} {r['map_calls']:>4} "
+              f"{r['stdin_bytes'] / 1024:>9.0f}K {str(r['success']):>5}")
+    by_transcript = {}
+    for r in results:
+        by_transcript.setdefault(r["transcript"], []).append(r)
+    if any(len(rs) > 1 for rs in by_transcript.values()):
+        print()
+        for name, rs in by_transcript.items():
+            drains = [r["drain_seconds"] for r in rs]
+            print(f"  {Path(name).name}: drain median {statistics.median(drains):.2f}s "
+                  f"min {min(drains):.2f}s max {max(drains):.2f}s over {len(rs)} runs")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the session learner against fixture transcripts")
+    parser.add_argument("--transcript", action="append", type=Path, default=[], help="Fixture transcript (repeatable)")
+    parser.add_argument("--generate", type=int, default=200, help="Turns in the generated transcript when none is given")
+    parser.add_argument("--scenario", type=Path, help="fake-claude scenario JSON")
+    parser.add_argument("--chunk-tokens", type=int, help="learner_chunk_tokens for the sandbox project")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per transcript")
+    parser.add_argument("--keep", action="store_true", help="Keep sandboxes for inspection")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    args = parser.parse_args()
+
+    tmp = None
+    transcripts = args.transcript
+    if not transcripts:
+        tmp = Path(tempfile.mkdtemp(prefix="learner-fixture-"))
+        generated = tmp / f"generated-{args.generate}.jsonl"
+        generate_transcript(generated, args.generate)
+        transcripts = [generated]
+
+    try:
+        results = [replay(t, args.scenario, args.chunk_tokens, args.keep) for t in transcripts for _ in range(args.runs)]
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    sys.exit(0 if all(r["success"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+transcript-bench — time full transcript extraction with and without the line pre-filter.
+
+Generates a synthetic transcript with the line mix of a real session
+(mostly progress, file-history-snapshot and tool_result lines), then runs
+every default projection over it three ways:
+
+    previous   every line decoded with json.loads (no pre-filter)
+    stdlib     byte-marker pre-filter, json.loads for candidate lines
+    orjson     byte-marker pre-filter, orjson (skipped when not installed)
+
+Reports the best of --runs passes per mode and checks that all modes
+produce identical output.
+
+Usage:
+    python scripts/dev/transcript-bench.py                     # 200 MB transcript
+    python scripts/dev/transcript-bench.py --mb 50 --runs 5
+    python scripts/dev/transcript-bench.py --transcript session.jsonl
+"""
+
+import argparse
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "lib"))
+import transcript
+import transcript_extract
+
+
+# =============================================================================
+# FIXTURE
+# =============================================================================
+def generate_transcript(path: Path, megabytes: float, seed: int = 0) -> int:
+    """Write about `megabytes` of transcript; returns the line count.
+
+    Line mix: 35% progress, 10% file-history-snapshot, 25% tool results,
+    15% assistant (text, Edit or Write with file contents), 10% user prompts, 5% system.
+    """
+    rng = random.Random(seed)
+    target = int(megabytes * 1024 * 1024)
+    code = lambda n: "\n".join(f"    value_{i} = compute({i}, flag={rng.random() < 0.5})" for i in range(n))
+
+    def line(obj: dict) -> str:
+        return json.dumps(obj, separators=(",", ":")) + "\n"
+
+    kinds = (["progress"] * 35 + ["snapshot"] * 10 + ["tool_result"] * 25 + ["assistant"] * 15
+             + ["user"] * 10 + ["system"] * 5)
+    written = lines = 0
+    with open(path, "w") as f:
+        while written < target:
+            kind = rng.choice(kinds)
+            n = lines
+            if kind == "progress":
+                obj = {"type": "progress", "data": {"type": "hook_progress", "message": f"Running hook {n}",
+                                                    "output": code(rng.randint(1, 8))}}
+            elif kind == "snapshot":
+                obj = {"type": "file-history-snapshot", "snapshot": {
+                    "trackedFileBackups": {f"/repo/src/mod_{i}.py": {"version": n, "backupTime": "2000-01-01T00:00:00Z"}
+                                           for i in range(rng.randint(2, 20))}}}
+            elif kind == "tool_result":
+                obj = {"type": "user", "message": {"role": "user", "content": [
+                    {"type": "tool_result", "tool_use_id": f"toolu_{n}", "content": code(rng.randint(10, 120))}]}}
+            elif kind == "assistant":
+                roll = rng.random()
+                if roll < 0.4:
+                    block = {"type": "text", "text": f"Looking at module {n} next; the retry path needs a guard. " * 8}
+                elif roll < 0.8:
+                    block = {"type": "tool_use", "id": f"toolu_{n}", "name": "Edit",
+                             "input": {"file_path": f"/repo/src/mod_{n % 40}.py", "old_string": code(5),
+                                       "new_string": code(rng.randint(5, 40))}}
+                else:
+                    block = {"type": "tool_use", "id": f"toolu_{n}", "name": "Write",
+                             "input": {"file_path": f"/repo/src/new_{n}.py", "content": code(rng.randint(100, 400))}}
+                obj = {"type": "assistant", "requestId": f"req_{n}", "message": {"role": "assistant", "content": [block]}}
+            elif kind == "user":
+                obj = {"type": "user", "message": {"role": "user", "content": f"Please check the handler in module {n}."}}
+            else:
+                obj = {"type": "system", "subtype": "informational", "content": f"Note {n}"}
+            obj["timestamp"] = "2000-01-01T00:00:00Z"
+            text = line(obj)
+            f.write(text)
+            written += len(text)
+            lines += 1
+    return lines
+
+
+# =============================================================================
+# MODES
+# =============================================================================
+@contextmanager
+def mode(name: str):
+    """Swap the pre-filter and decoder used by transcript_extract.iter_entries."""
+    saved = transcript.is_message_candidate, transcript.loads
+    if name == "previous":
+        transcript.is_message_candidate = lambda line: True
+    if name in ("previous", "stdlib"):
+        transcript.loads = json.loads
+    try:
+        yield
+    finally:
+        transcript.is_message_candidate, transcript.loads = saved
+
+
+def extract(path: str) -> dict:
+    projections = [cls() for cls in transcript_extract.DEFAULT_PROJECTIONS]
+    return transcript_extract.project(transcript_extract.iter_entries(path), projections)
+
+
+def best_pass(path: str, name: str, runs: int) -> tuple[float, dict]:
+    best = float("inf")
+    result = {}
+    with mode(name):
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = extract(path)
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript extraction with and without the pre-filter")
+    parser.add_argument("--transcript", type=Path, help="Existing transcript instead of a generated one")
+    parser.add_argument("--mb", type=float, default=200, help="Size of the generated transcript in MB")
+    parser.add_argument("--runs", type=int, default=3, help="Passes per mode; the best is reported")
+    parser.add_argument("--json", action="store_true", help="Output raw JSON")
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.transcript
+    try:
+        if not path:
+            tmp = Path(tempfile.mkdtemp(prefix="transcript-bench-"))
+            path = tmp / "generated.jsonl"
+            generate_transcript(path, args.mb)
+        with open(path, "rb") as f:
+            line_count = sum(1 for _ in f)
+        modes = ["previous", "stdlib"] + (["orjson"] if transcript.orjson else [])
+        timings, outputs = {}, []
+        for name in modes:
+            seconds, output = best_pass(str(path), name, args.runs)
+            timings[name] = round(seconds, 3)
+            outputs.append(output)
+        report = {"transcript_mb": round(path.stat().st_size / 1024 / 1024, 1), "lines": line_count,
+                  "seconds": timings, "identical": all(o == outputs[0] for o in outputs)}
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['transcript_mb']} MB / {report['lines']} lines, best of {args.runs}")
+    for name, seconds in timings.items():
+        print(f"  {name:<9} {seconds:.2f}s")
+    print(f"  identical output: {report['identical']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Doc Router — UserPromptSubmit Hook
+
+Matches the user's prompt against the read_when hints and summaries of the
+project's docs and points the agent at the few docs that apply. The inverted
+index is built at SessionStart (save-injected-files) and stored in the state
+dir, so this hook only loads it and does a handful of dict lookups.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add lib to path for imports
+sys.path.insert(0, str(Path(__file__).parent / "lib"))
+from meridian_config import DOC_ROUTER_INDEX, get_project_config, is_headless, log_hook_output, state_path
+from doc_search import match_prompt
+
+
+def format_matches(matches: list[dict]) -> str:
+    """Format router matches as a short additionalContext note."""
+    lines = ["Docs matching this prompt — read them before working on it:"]
+    for match in matches:
+        line = f"- `{match['path']}` — {match['summary']}"
+        if match["hints"]:
+            line += f" (read when: {'; '.join(match['hints'])})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    if is_headless():
+        sys.exit(0)
+
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        sys.exit(0)
+
+    prompt = input_data.get("prompt", "")
+    claude_project_dir = os.environ.get("CLAUDE_PROJECT_DIR")
+    if not prompt or not claude_project_dir:
+        sys.exit(0)
+    base_dir = Path(claude_project_dir)
+
+    config = get_project_config(base_dir)
+    if not config.get('doc_router_enabled', True):
+        sys.exit(0)
+
+    try:
+        index = json.loads(state_path(base_dir, DOC_ROUTER_INDEX).read_text())
+    except (IOError, json.JSONDecodeError):
+        sys.exit(0)  # No index yet — SessionStart builds it
+
+    matches = match_prompt(index, prompt, limit=config.get('doc_router_max_docs', 3))
+    if not matches:
+        sys.exit(0)
+
+    output = {
+        "hookSpecificOutput": {
+            "hookEventName": "UserPromptSubmit",
+            "additionalContext": format_matches(matches),
+        }
+    }
+    log_hook_output(base_dir, "doc-router", output)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
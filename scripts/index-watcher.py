@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Index Watcher — long-lived background process
+
+Keeps the doc-frontmatter index, nested-repo list, docs-index and doc router
+index in the state dir up to date as files change (inotify on Linux, polling
+elsewhere). SessionStart hooks then read ready-made indexes instead of
+walking the project. Started by context-injector when `index_watcher: true`;
+exits after a day without changes, when the project directory disappears,
+or on SIGTERM.
+
+Usage:
+    python3 scripts/index-watcher.py --project DIR [--poll] [--interval SECONDS]
+"""
+
+import argparse
+import fcntl
+import os
+import signal
+import sys
+from pathlib import Path
+
+# Add lib to path for imports
+sys.path.insert(0, str(Path(__file__).parent / "lib"))
+from meridian_config import INDEX_WATCHER_PID, is_headless, state_path
+import index_watcher
+
+
+def main() -> int:
+    if is_headless():
+        return 0
+
+    parser = argparse.ArgumentParser(description="Meridian index watcher")
+    parser.add_argument("--project", default=os.environ.get("CLAUDE_PROJECT_DIR", "."), help="Project directory")
+    parser.add_argument("--poll", action="store_true", help="Use the polling watcher even when inotify is available")
+    parser.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds (default: 2)")
+    parser.add_argument("--idle-hours", type=float, default=24.0, help="Exit after this long without changes (default: 24)")
+    args = parser.parse_args()
+
+    base_dir = Path(args.project).resolve()
+
+    # One watcher per project: the exclusive flock on the pidfile is held for
+    # the process lifetime and doubles as the liveness signal for readers.
+    pid_file = open(state_path(base_dir, INDEX_WATCHER_PID), "a+")
+    try:
+        fcntl.flock(pid_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return 0  # Another watcher is already running
+    pid_file.seek(0)
+    pid_file.truncate()
+    pid_file.write(str(os.getpid()))
+    pid_file.flush()
+
+    stopping = False
+
+    def handle_term(_signum, _frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, handle_term)
+    signal.signal(signal.SIGINT, handle_term)
+
+    index_watcher.run(
+        base_dir,
+        force_polling=args.poll,
+        poll_interval=args.interval,
+        idle_timeout=args.idle_hours * 3600,
+        should_stop=lambda: stopping,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+doc_search — term matching over doc frontmatter.
+
+Self-contained, no external dependencies. Provides a small normalizer and
+stemmer shared by every doc-matching feature, and a precomputed inverted
+index over `read_when` hints and summaries that the doc router queries on
+every user prompt.
+"""
+
+import math
+import re
+
+# Lowercased alphanumeric runs. Separators (`-`, `_`, `/`, `.`) split terms so
+# path tokens like `session-learner.py` match prose like "session learner".
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before being but by can
+could did do does doing done for from get got had has have having he her here
+him his how i if in into is it its just let like me more most my no not now of
+on one only or other our out over please same she should so some such than that
+the their them then there these they this those through to too up us use using
+very want was we were what when where which while who why will with would you
+your md
+""".split())
+
+ROUTER_INDEX_VERSION = 1
+
+# Field weights for router scoring. read_when hints are written to be matched,
+# summaries and paths only corroborate.
+_HINT_WEIGHT = 1.0
+_SUMMARY_WEIGHT = 0.5
+_PHRASE_BONUS = 3.0
+_HINT_COVERED_BONUS = 1.5
+
+
+def stem(word: str) -> str:
+    """Reduce a lowercase word to a crude stem.
+
+    Not a full Porter stemmer — just enough suffix stripping that
+    "caching", "cached" and "cache" (or "tests" and "testing") collide.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("ing") and len(word) > 5:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) > 4:
+        word = word[:-2]
+    elif word.endswith(("sses", "xes", "zes", "ches", "shes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+
+    # Collapse doubled consonants left behind by suffix stripping (running -> run)
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiouls":
+        word = word[:-1]
+    # Drop a trailing silent e so "cache" and "cach(ing)" meet
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into normalized, stemmed terms. Stopwords are dropped."""
+    text = _CAMEL_RE.sub(" ", text)
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        terms.append(stem(word))
+    return terms
+
+
+# =============================================================================
+# ROUTER INDEX (prompt-time doc matching)
+# =============================================================================
+def build_router_index(docs: list[dict]) -> dict:
+    """Build an inverted index over doc summaries and read_when hints.
+
+    Args:
+        docs: list of {"path", "summary", "read_when"} dicts
+
+    Returns a JSON-serializable dict:
+        docs:  [[path, summary], ...]
+        hints: per doc, the list of (original hint, stemmed terms)
+        terms: stem -> [[doc_id, weight], ...]
+        idf:   stem -> inverse document frequency
+    """
+    doc_rows = []
+    hint_rows = []
+    postings: dict[str, dict[int, float]] = {}
+
+    for doc_id, doc in enumerate(docs):
+        doc_rows.append([doc["path"], doc.get("summary", "")])
+        hints = []
+        for hint in doc.get("read_when", []):
+            terms = tokenize(hint)
+            if not terms:
+                continue
+            hints.append([hint, terms])
+            for term in terms:
+                weights = postings.setdefault(term, {})
+                weights[doc_id] = max(weights.get(doc_id, 0.0), _HINT_WEIGHT)
+        hint_rows.append(hints)
+
+        for term in tokenize(doc.get("summary", "")) + tokenize(doc["path"]):
+            weights = postings.setdefault(term, {})
+            weights[doc_id] = max(weights.get(doc_id, 0.0), _SUMMARY_WEIGHT)
+
+    total = max(len(docs), 1)
+    return {
+        "version": ROUTER_INDEX_VERSION,
+        "docs": doc_rows,
+        "hints": hint_rows,
+        "terms": {t: [[d, w] for d, w in sorted(ws.items())] for t, ws in postings.items()},
+        "idf": {t: round(math.log(1 + total / len(ws)), 4) for t, ws in postings.items()},
+    }
+
+
+def _contains_run(haystack: list[str], needle: list[str]) -> bool:
+    """Check whether needle occurs as a contiguous run inside haystack."""
+    n = len(needle)
+    first = needle[0]
+    for i in range(len(haystack) - n + 1):
+        if haystack[i] == first and haystack[i:i + n] == needle:
+            return True
+    return False
+
+
+def match_prompt(index: dict, prompt: str, limit: int = 3) -> list[dict]:
+    """Match a prompt against a router index.
+
+    A doc qualifies when one of its read_when hints is fully present in the
+    prompt (contiguously for multi-word hints, or as a bag of terms), or when
+    at least two distinct terms overlap. Returns up to `limit` matches sorted
+    by score: [{"path", "summary", "hints", "score"}].
+    """
+    terms = tokenize(prompt)
+    if not terms or index.get("version") != ROUTER_INDEX_VERSION:
+        return []
+
+    term_set = set(terms)
+    postings = index["terms"]
+    idf = index["idf"]
+
+    scores: dict[int, float] = {}
+    overlap: dict[int, int] = {}
+    for term in term_set:
+        for doc_id, weight in postings.get(term, ()):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf.get(term, 1.0)
+            overlap[doc_id] = overlap.get(doc_id, 0) + 1
+
+    results = []
+    for doc_id, score in scores.items():
+        matched_hints = []
+        for hint, hint_terms in index["hints"][doc_id]:
+            if len(hint_terms) > 1 and _contains_run(terms, hint_terms):
+                score += _PHRASE_BONUS * len(hint_terms)
+                matched_hints.append(hint)
+            elif term_set.issuperset(hint_terms):
+                score += _HINT_COVERED_BONUS * len(hint_terms)
+                matched_hints.append(hint)
+
+        if not matched_hints and overlap[doc_id] < 2:
+            continue
+
+        path, summary = index["docs"][doc_id]
+        results.append({"path": path, "summary": summary, "hints": matched_hints, "score": round(score, 3)})
+
+    results.sort(key=lambda r: (-r["score"], r["path"]))
+    return results[:limit]
+
+
+# =============================================================================
+# BM25 RANKING (work-aware doc ordering)
+# =============================================================================
+def bm25_rank(docs: list[dict], query_terms: list[str], k1: float = 1.2, b: float = 0.75) -> list[tuple[float, int]]:
+    """Score docs against a bag of query terms with Okapi BM25.
+
+    Each doc's text is its summary, read_when hints and path tokens.
+    Returns [(score, doc_index)] for docs with a positive score, best first.
+    """
+    query = set(query_terms)
+    if not docs or not query:
+        return []
+
+    doc_terms = []
+    for doc in docs:
+        text = " ".join([doc.get("summary", ""), *doc.get("read_when", []), doc["path"]])
+        doc_terms.append(tokenize(text))
+
+    avg_len = sum(len(t) for t in doc_terms) / len(doc_terms) or 1.0
+    doc_freq: dict[str, int] = {}
+    for terms in doc_terms:
+        for term in query.intersection(terms):
+            doc_freq[term] = doc_freq.get(term, 0) + 1
+
+    n = len(docs)
+    ranked = []
+    for i, terms in enumerate(doc_terms):
+        tf: dict[str, int] = {}
+        for term in terms:
+            if term in doc_freq:
+                tf[term] = tf.get(term, 0) + 1
+        score = 0.0
+        for term, freq in tf.items():
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * freq * (k1 + 1) / (freq + k1 * (1 - b + b * len(terms) / avg_len))
+        if score > 0:
+            ranked.append((score, i))
+
+    ranked.sort(key=lambda r: (-r[0], r[1]))
+    return ranked
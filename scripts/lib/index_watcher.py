@@ -0,0 +1,380 @@
+"""
+index_watcher — keep doc and repo indexes current while files change.
+
+Used by the long-lived index-watcher.py process. On Linux, directory changes
+come from inotify (through ctypes, no external dependencies); elsewhere, or
+when inotify is unavailable or out of watches, a polling watcher diffs stat
+snapshots instead. IndexMaintainer applies the changes to the doc-frontmatter
+index, the nested-repo list, the docs-index file and the doc router index, so
+SessionStart hooks read ready-made indexes instead of walking the tree.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from meridian_config import (
+    DOC_FRONTMATTER_INDEX,
+    MERIDIAN_CONFIG,
+    NESTED_REPO_DEPTH,
+    NESTED_REPOS_STATE,
+    SKIP_DIRS,
+    SKIP_NAMES,
+    extract_frontmatter,
+    find_nested_git_repos,
+    get_doc_scan_dirs,
+    get_project_config,
+    publish_docs_index,
+    scan_docs_entries,
+    sort_doc_entries,
+    state_path,
+    write_atomic,
+)
+
+DEBOUNCE_SECONDS = 0.2  # Batch bursts of events (editor saves, git checkouts)
+
+
+# =============================================================================
+# WATCHERS
+# =============================================================================
+class PollingWatcher:
+    """Detect changes by diffing stat snapshots of the watched trees."""
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._trees: dict[Path, int | None] = {}
+        self._snapshot: dict[Path, tuple[int, int]] = {}
+        self._last_poll = 0.0
+
+    def watch_tree(self, root: Path, max_depth: int | None) -> None:
+        """Watch root and its subdirectories down to max_depth (None = unlimited)."""
+        self._trees[root] = max_depth
+        self._snapshot.update(self._scan_tree(root, max_depth))
+
+    def _scan_tree(self, root: Path, max_depth: int | None) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        stack = [(root, max_depth)]
+        while stack:
+            directory, depth = stack.pop()
+            try:
+                st = directory.stat()
+                snapshot[directory] = (st.st_mtime_ns, -1)
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                path = Path(entry.path)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name == ".git":
+                            snapshot[path] = (0, -1)
+                        elif entry.name not in SKIP_DIRS and (depth is None or depth > 0):
+                            stack.append((path, None if depth is None else depth - 1))
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        snapshot[path] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        return snapshot
+
+    def poll(self, timeout: float) -> set[Path] | None:
+        """Wait up to timeout seconds and return the set of changed paths."""
+        wait = max(0.0, self._last_poll + self.interval - time.monotonic())
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(wait)
+        self._last_poll = time.monotonic()
+
+        current: dict[Path, tuple[int, int]] = {}
+        for root, depth in self._trees.items():
+            current.update(self._scan_tree(root, depth))
+        changed = {p for p in current.keys() | self._snapshot.keys() if current.get(p) != self._snapshot.get(p)}
+        self._snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Detect changes with Linux inotify through ctypes."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._init = libc.inotify_init1
+        self._init.argtypes = [ctypes.c_int]
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self._fd = self._init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: dict[int, tuple[Path, int | None]] = {}
+
+    def watch_tree(self, root: Path, max_depth: int | None) -> None:
+        """Watch root and its subdirectories down to max_depth (None = unlimited)."""
+        stack = [(root, max_depth)]
+        while stack:
+            directory, depth = stack.pop()
+            if not self._add(directory, depth):
+                continue
+            if depth is not None and depth <= 0:
+                continue
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False) and entry.name not in SKIP_DIRS:
+                        stack.append((Path(entry.path), None if depth is None else depth - 1))
+                except OSError:
+                    continue
+
+    def _add(self, directory: Path, depth: int | None) -> bool:
+        wd = self._add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            return False  # Directory vanished or is unreadable
+        _, known_depth = self._dirs.get(wd, (directory, depth))
+        if known_depth is not None and (depth is None or depth > known_depth):
+            known_depth = depth
+        self._dirs[wd] = (directory, known_depth)
+        return True
+
+    def poll(self, timeout: float) -> set[Path] | None:
+        """Wait up to timeout seconds and return the set of changed paths.
+
+        Returns None when the kernel queue overflowed and events were lost —
+        the caller must rebuild from scratch.
+        """
+        changed: set[Path] = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+
+        deadline = time.monotonic() + DEBOUNCE_SECONDS
+        while True:
+            try:
+                buf = os.read(self._fd, 65536)
+            except BlockingIOError:
+                buf = b""
+            if buf and not self._parse(buf, changed):
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._fd], [], [], remaining)[0]:
+                return changed
+
+    def _parse(self, buf: bytes, changed: set[Path]) -> bool:
+        offset = 0
+        while offset + self._EVENT.size <= len(buf):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(buf, offset)
+            name = buf[offset + self._EVENT.size:offset + self._EVENT.size + length].rstrip(b"\0")
+            offset += self._EVENT.size + length
+
+            if mask & self.IN_Q_OVERFLOW:
+                return False
+            if mask & self.IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if wd not in self._dirs:
+                continue
+
+            directory, depth = self._dirs[wd]
+            path = directory / os.fsdecode(name) if name else directory
+            changed.add(path)
+
+            # Follow new subdirectories so their contents are watched too
+            if (mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO)
+                    and path.name not in SKIP_DIRS and (depth is None or depth > 0)):
+                self.watch_tree(path, None if depth is None else depth - 1)
+        return True
+
+    def close(self) -> None:
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+
+def make_watcher(force_polling: bool = False, poll_interval: float = 2.0):
+    """Return an inotify watcher when available, otherwise a polling watcher."""
+    if not force_polling:
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(poll_interval)
+
+
+# =============================================================================
+# INDEX MAINTENANCE
+# =============================================================================
+class IndexMaintainer:
+    """Keep the doc-frontmatter index, nested-repo list and docs-index current."""
+
+    def __init__(self, base_dir: Path, watcher):
+        self.base_dir = base_dir
+        self.watcher = watcher
+        self.config_path = base_dir / MERIDIAN_CONFIG
+        self.doc_dirs: list[str] = []
+        self.docs: dict[str, dict[str, dict]] = {}  # dir_rel -> rel path -> entry
+        self.nested_repos: list[str] = []
+
+    def rebuild(self) -> None:
+        """Full rescan: doc dirs from config, every doc, every nested repo."""
+        config = get_project_config(self.base_dir)
+        self.doc_dirs = [str(Path(d)) for d, _header in get_doc_scan_dirs(config)]
+        self.docs = {
+            d: {e["path"]: e for e in scan_docs_entries(self.base_dir / d, self.base_dir, use_watched=False)}
+            for d in self.doc_dirs
+        }
+        self.nested_repos = [str(rel) for rel, _ in find_nested_git_repos(self.base_dir, NESTED_REPO_DEPTH)]
+
+        self.watcher.watch_tree(self.base_dir, NESTED_REPO_DEPTH)
+        for d in self.doc_dirs:
+            if (self.base_dir / d).is_dir():
+                self.watcher.watch_tree(self.base_dir / d, None)
+
+    def apply(self, changed: set[Path] | None) -> bool:
+        """Apply a batch of changed paths. Returns True if any index changed."""
+        if changed is None or self.config_path in changed:
+            self.rebuild()
+            return True
+
+        dirty = False
+        repos_dirty = False
+        for path in changed:
+            rel = self._rel(path)
+            if rel is None:
+                continue
+            if (path.name == ".git" or path.is_dir() or not path.exists()) and len(rel.parts) <= NESTED_REPO_DEPTH + 1:
+                # Directory created, moved or removed — may add or drop nested repos
+                repos_dirty = True
+            doc_dir = self._doc_dir_for(rel)
+            if doc_dir is None:
+                continue
+            if path.suffix == ".md":
+                dirty |= self._update_doc(doc_dir, path)
+            elif path.is_dir() or not path.exists():
+                # Whole subtree appeared or vanished — rescan that doc dir
+                self.docs[doc_dir] = {
+                    e["path"]: e for e in scan_docs_entries(self.base_dir / doc_dir, self.base_dir, use_watched=False)
+                }
+                if (self.base_dir / doc_dir).is_dir():
+                    self.watcher.watch_tree(self.base_dir / doc_dir, None)
+                dirty = True
+
+        if repos_dirty:
+            repos = [str(rel) for rel, _ in find_nested_git_repos(self.base_dir, NESTED_REPO_DEPTH)]
+            if repos != self.nested_repos:
+                self.nested_repos = repos
+                dirty = True
+        return dirty
+
+    def _rel(self, path: Path) -> Path | None:
+        try:
+            return path.relative_to(self.base_dir)
+        except ValueError:
+            return None
+
+    def _doc_dir_for(self, rel: Path) -> str | None:
+        for d in self.doc_dirs:
+            if rel == Path(d) or Path(d) in rel.parents:
+                return d
+        return None
+
+    def _update_doc(self, doc_dir: str, path: Path) -> bool:
+        rel_path = str(path.relative_to(self.base_dir))
+        entries = self.docs.setdefault(doc_dir, {})
+        if path.name in SKIP_NAMES or not path.is_file():
+            return entries.pop(rel_path, None) is not None
+        summary, read_when = extract_frontmatter(path)
+        entry = {"path": rel_path, "summary": summary, "read_when": read_when}
+        if entries.get(rel_path) == entry:
+            return False
+        entries[rel_path] = entry
+        return True
+
+    def publish(self) -> None:
+        """Write every ready-made index to the state dir atomically."""
+        scanned = [(d, sort_doc_entries(list(self.docs.get(d, {}).values()))) for d in self.doc_dirs]
+        write_atomic(state_path(self.base_dir, DOC_FRONTMATTER_INDEX), {
+            "pid": os.getpid(),
+            "updated": time.time(),
+            "dirs": dict(scanned),
+        })
+        write_atomic(state_path(self.base_dir, NESTED_REPOS_STATE), {
+            "pid": os.getpid(),
+            "updated": time.time(),
+            "repos": self.nested_repos,
+        })
+        publish_docs_index(self.base_dir, scanned, session_key="index-watcher")
+
+
+def _fall_back_to_polling(maintainer: IndexMaintainer, poll_interval: float) -> None:
+    """Swap the maintainer's watcher for a polling one and rescan from scratch."""
+    maintainer.watcher.close()
+    maintainer.watcher = make_watcher(True, poll_interval)
+    maintainer.rebuild()
+
+
+def run(base_dir: Path, force_polling: bool = False, poll_interval: float = 2.0,
+        idle_timeout: float = 24 * 3600, should_stop=lambda: False) -> None:
+    """Maintain the indexes until idle_timeout passes without changes or should_stop() is true."""
+    maintainer = IndexMaintainer(base_dir, make_watcher(force_polling, poll_interval))
+    try:
+        maintainer.rebuild()
+    except OSError:
+        # inotify ran out of watches mid-registration — start over with polling
+        _fall_back_to_polling(maintainer, poll_interval)
+    maintainer.publish()
+
+    last_change = time.monotonic()
+    try:
+        while not should_stop() and base_dir.is_dir():
+            if time.monotonic() - last_change > idle_timeout:
+                break
+            try:
+                changed = maintainer.watcher.poll(1.0)
+                if changed == set():
+                    continue
+                last_change = time.monotonic()
+                if maintainer.apply(changed):
+                    maintainer.publish()
+            except OSError:
+                # Watch limit hit later on (a new doc dir, a rebuild after overflow) — continue with polling
+                _fall_back_to_polling(maintainer, poll_interval)
+                maintainer.publish()
+    finally:
+        maintainer.watcher.close()
@@ -0,0 +1,150 @@
+"""
+learner_changes — exact change detection for the files a learner run may edit.
+
+Before the headless run the worker snapshots the learner's targets (the
+workspace file, CLAUDE.md files, doc directories and known docs): mtime,
+size, a content hash and the content itself. Afterwards only those targets
+are checked again. Files whose mtime and size are unchanged are not re-read;
+the rest are hashed and diffed line by line. Unlike `git diff`, this sees new
+untracked docs, ignores the user's own uncommitted edits elsewhere in the
+repo, and never walks the whole repository.
+"""
+
+import difflib
+import hashlib
+import os
+from pathlib import Path
+
+from meridian_config import SKIP_DIRS
+
+SNAPSHOT_TEXT_MAX_BYTES = 1024 * 1024  # Larger targets are compared by hash only (no line counts)
+TREE_SUFFIX = ".md"  # Only markdown files are collected from target trees
+
+
+def _walk_tree(root: Path, max_depth: int | None) -> list[Path]:
+    """Markdown files under root, down to max_depth directory levels (None = unlimited)."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        depth = len(Path(dirpath).relative_to(root).parts)
+        if max_depth is not None and depth >= max_depth:
+            dirnames.clear()
+        else:
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        files.extend(Path(dirpath) / name for name in filenames if name.endswith(TREE_SUFFIX))
+    return files
+
+
+def _read(path: Path) -> dict | None:
+    """Stat and (for small files) read one target. None if it doesn't exist."""
+    try:
+        st = path.stat()
+        data = path.read_bytes()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except OSError:
+        return {"mtime_ns": 0, "size": 0, "hash": "", "text": None}
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "hash": hashlib.sha1(data).hexdigest(),
+        "text": data if len(data) <= SNAPSHOT_TEXT_MAX_BYTES else None,
+    }
+
+
+def snapshot(files: list[Path], trees: list[tuple[Path, int | None]]) -> dict:
+    """Record the current state of the target files and of every markdown file in the trees.
+
+    Returns {"files", "trees", "state"}; state maps path -> stat, hash and content.
+    """
+    paths = set(files)
+    for root, max_depth in trees:
+        paths.update(_walk_tree(root, max_depth))
+    state = {}
+    for path in paths:
+        entry = _read(path)
+        if entry is not None:
+            state[path] = entry
+    return {"files": list(files), "trees": list(trees), "state": state}
+
+
+def _line_total(text: bytes | None) -> int | None:
+    return None if text is None else len(text.splitlines())
+
+
+def _line_counts(before: bytes | None, after: bytes | None) -> tuple[int | None, int | None]:
+    """(added, removed) lines between two contents, (None, None) when either side is too large."""
+    if before is None or after is None:
+        return None, None
+    old = before.splitlines()
+    new = after.splitlines()
+    added = removed = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag != "equal":
+            removed += i2 - i1
+            added += j2 - j1
+    return added, removed
+
+
+def diff(before: dict) -> list[dict]:
+    """Compare the targets against a snapshot taken with snapshot().
+
+    Returns [{"path", "status", "added", "removed"}] sorted by path, where
+    status is "added", "modified" or "deleted". added/removed are line
+    counts (None for files above SNAPSHOT_TEXT_MAX_BYTES). A file rewritten
+    with identical content is not a change.
+    """
+    old_state = before["state"]
+    paths = set(old_state) | set(before["files"])
+    for root, max_depth in before["trees"]:
+        paths.update(_walk_tree(root, max_depth))
+
+    changes = []
+    for path in paths:
+        old = old_state.get(path)
+        try:
+            st = path.stat()
+        except OSError:
+            st = None
+        if st is None:
+            if old is not None:
+                changes.append({"path": path, "status": "deleted", "added": 0, "removed": _line_total(old["text"])})
+            continue
+        if old is not None and (st.st_mtime_ns, st.st_size) == (old["mtime_ns"], old["size"]):
+            continue  # Untouched, skip the read
+        new = _read(path)
+        if new is None:
+            continue
+        if old is None:
+            changes.append({"path": path, "status": "added", "added": _line_total(new["text"]), "removed": 0})
+        elif new["hash"] != old["hash"]:
+            added, removed = _line_counts(old["text"], new["text"])
+            changes.append({"path": path, "status": "modified", "added": added, "removed": removed})
+
+    changes.sort(key=lambda c: str(c["path"]))
+    return changes
+
+
+def display_path(path: Path, project_dir: Path) -> str:
+    """Project-relative path, or ~-abbreviated for targets outside the project."""
+    try:
+        return str(path.relative_to(project_dir))
+    except ValueError:
+        home = Path.home()
+        try:
+            return str(Path("~") / path.relative_to(home))
+        except ValueError:
+            return str(path)
+
+
+def format_stat(changes: list[dict]) -> str:
+    """A `git diff --stat` style summary line ("2 files changed, 5 insertions(+), 1 deletion(-)")."""
+    if not changes:
+        return ""
+    added = sum(c["added"] or 0 for c in changes)
+    removed = sum(c["removed"] or 0 for c in changes)
+    parts = [f"{len(changes)} file{'s' if len(changes) != 1 else ''} changed"]
+    if added:
+        parts.append(f"{added} insertion{'s' if added != 1 else ''}(+)")
+    if removed:
+        parts.append(f"{removed} deletion{'s' if removed != 1 else ''}(-)")
+    return ", ".join(parts)
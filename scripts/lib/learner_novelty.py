@@ -0,0 +1,157 @@
+"""
+learner_novelty — cheap pre-scan and novelty score for a transcript range.
+
+Runs before the learner's full extraction. Blocks of the raw transcript are
+searched with compact-JSON byte patterns (the same idea as the transcript
+pre-filter); only genuine user messages are decoded, to look for
+corrections. Together with the commits made since the range started, the
+counts give a novelty score. The learner skips ranges scoring below
+`learner_min_novelty`, so a short chatty session with no edits never costs a
+headless run.
+"""
+
+import re
+import subprocess
+from pathlib import Path
+
+from meridian_config import is_system_noise
+import transcript
+
+# Claude Code writes compact JSON and escapes quotes inside strings, so these
+# structural patterns can't be faked by message text (see transcript.py).
+# A tool_use block's name sits next to "type":"tool_use", with only flat
+# string fields (id, ...) between them, in either order.
+_FLAT_FIELDS = rb'(?:"\w+":"[^"]*",)*'
+TOOL_USE_RE = re.compile(rb'"type":"tool_use",' + _FLAT_FIELDS + rb'"name":"([\w-]+)"'
+                         rb'|"name":"([\w-]+)",' + _FLAT_FIELDS + rb'"type":"tool_use"')
+# Matched right after a tool_use header: skip the remaining header fields and
+# any input fields before the one that matters
+_TO_INPUT_FIELD = (rb'(?:,"\w+":"[^"]*")*,"input":\{'
+                   rb'(?:"\w+":(?:"(?:[^"\\]|\\.)*"|[-\w.]+),)*?')
+PLAN_FILE_INPUT_RE = re.compile(_TO_INPUT_FIELD + rb'"file_path":"[^"]*/plans/')
+GIT_COMMIT_INPUT_RE = re.compile(_TO_INPUT_FIELD + rb'"command":"(?:[^"\\]|\\.)*?\bgit commit\b')
+TIMESTAMP_RE = re.compile(rb'"timestamp":"([^"]+)"')
+
+FILE_EDIT_TOOLS = frozenset((b"Edit", b"Write", b"MultiEdit", b"NotebookEdit"))
+PLAN_TOOLS = frozenset((b"EnterPlanMode", b"ExitPlanMode"))
+
+# Explicit corrections or lasting preferences, anywhere in a user message
+CORRECTION_RE = re.compile(
+    r"\b(i told you|i already said|i said (?:not to|to)|from now on|not what i (?:asked|wanted|meant)|"
+    r"that'?s (?:not right|wrong)|that is (?:not right|wrong)|you should(?:n'?t| not)? have|"
+    r"stop (?:doing|using|adding)|don'?t ever|never do that|remember to|always use|never use)\b",
+    re.IGNORECASE,
+)
+# Weaker cues: everyday words that only hint at a correction when they open the message
+CORRECTION_CUE_RE = re.compile(r"^\W*(no|nope|wrong|stop|wait|actually|instead|don'?t|never)\b", re.IGNORECASE)
+
+# Points per occurrence. A single weak cue (1.25 with its message) stays below the
+# default threshold of 3; an explicit correction clears it on its own.
+WEIGHTS = {
+    "file_edits": 1.0,
+    "corrections": 3.0,
+    "correction_cues": 1.0,
+    "commits": 2.0,
+    "plan_events": 2.0,
+    "user_messages": 0.25,
+}
+
+
+def _user_texts(raw: dict) -> list[str]:
+    content = raw.get("message", {}).get("content", "")
+    if isinstance(content, str):
+        return [content]
+    if isinstance(content, list):
+        return [b.get("text", "") for b in content if isinstance(b, dict) and b.get("type") == "text"]
+    return []
+
+
+def _count_user_messages(block: bytes, counts: dict) -> None:
+    """Decode the genuine user-message lines of a block and look for corrections."""
+    pos = 0
+    while (hit := block.find(transcript.USER_MARKER, pos)) != -1:
+        start = block.rfind(b"\n", 0, hit) + 1
+        stop = block.find(b"\n", hit)
+        pos = stop + 1
+        if block.find(transcript.TOOL_RESULT_MARKER, start, stop) != -1:
+            continue
+        try:
+            raw = transcript.loads(block[start:stop])
+        except transcript.DECODE_ERRORS:
+            continue
+        if not isinstance(raw, dict) or raw.get("type") != "user":
+            continue
+        for text in _user_texts(raw):
+            if not text.strip() or is_system_noise(text):
+                continue
+            counts["user_messages"] += 1
+            if CORRECTION_RE.search(text):
+                counts["corrections"] += 1
+            elif CORRECTION_CUE_RE.search(text):
+                counts["correction_cues"] += 1
+
+
+def prescan(transcript_path: str, start_offset: int = 0, end_offset: int | None = None) -> dict:
+    """Count novelty signals in a transcript byte range.
+
+    Scans blocks of complete lines with byte patterns; only user-message
+    lines are decoded. Returns {"bytes", "user_messages", "corrections",
+    "correction_cues", "file_edits", "plan_events", "bash_commits",
+    "started_at"}; started_at is the first timestamp in the range's first
+    block (ISO string) or None.
+    """
+    counts = {"bytes": 0, "user_messages": 0, "corrections": 0, "correction_cues": 0, "file_edits": 0,
+              "plan_events": 0, "bash_commits": 0, "started_at": None}
+
+    for block in transcript.iter_chunks(transcript_path, start_offset, end_offset):
+        if not counts["bytes"] and (match := TIMESTAMP_RE.search(block)):
+            counts["started_at"] = match.group(1).decode(errors="replace")
+        counts["bytes"] += len(block)
+        # Rare patterns: a plain substring check first spares the input match
+        has_plans, has_commit = b"/plans/" in block, b"git commit" in block
+        for match in TOOL_USE_RE.finditer(block):
+            name = match.group(1) or match.group(2)
+            if name in FILE_EDIT_TOOLS:
+                counts["file_edits"] += 1
+                if has_plans and name != b"NotebookEdit" and PLAN_FILE_INPUT_RE.match(block, match.end()):
+                    counts["plan_events"] += 1
+            elif name in PLAN_TOOLS:
+                counts["plan_events"] += 1
+            elif name == b"Bash" and has_commit and GIT_COMMIT_INPUT_RE.match(block, match.end()):
+                counts["bash_commits"] += 1
+        _count_user_messages(block, counts)
+
+    return counts
+
+
+def commits_since(project_dir: Path, since: str | None) -> int:
+    """Number of local commits since an ISO timestamp (0 when unknown or not a repo).
+
+    Counts non-merge commits on HEAD's first-parent line by the local
+    git author, so pulled, merged and other people's commits don't count.
+    """
+    if not since:
+        return 0
+    try:
+        email = subprocess.run(
+            ["git", "config", "user.email"],
+            capture_output=True, text=True, timeout=5, cwd=str(project_dir),
+        )
+        cmd = ["git", "rev-list", "--count", "--first-parent", "--no-merges", f"--since={since}"]
+        if email.returncode == 0 and email.stdout.strip():
+            cmd.append(f"--author={email.stdout.strip()}")
+        result = subprocess.run(cmd + ["HEAD"], capture_output=True, text=True, timeout=5, cwd=str(project_dir))
+        if result.returncode == 0:
+            return int(result.stdout.strip() or 0)
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError, ValueError):
+        pass
+    return 0
+
+
+def novelty(project_dir: Path, transcript_path: str, start_offset: int = 0, end_offset: int | None = None) -> dict:
+    """Pre-scan a range and score it. Returns the counts plus "commits" and "score"."""
+    counts = prescan(transcript_path, start_offset, end_offset)
+    # Commits made through the agent show up in both; count them once
+    counts["commits"] = max(counts["bash_commits"], commits_since(project_dir, counts["started_at"]))
+    counts["score"] = round(sum(counts[key] * weight for key, weight in WEIGHTS.items()), 2)
+    return counts
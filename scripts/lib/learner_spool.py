@@ -0,0 +1,163 @@
+"""
+learner_spool — job spool and detached worker plumbing for the session learner.
+
+The session-learner hook no longer runs `claude -p` itself. It writes a job
+file into `learner-spool/` in the state dir and makes sure a worker is
+running. The worker (`session-learner.py --worker`) is detached with a double
+fork, holds an exclusive flock on its pidfile for its lifetime, and drains the
+spool oldest-first. Jobs that fail transiently are rewritten with a backoff
+and retried; a job stays on disk until it is finished, so a crashed worker
+loses nothing.
+"""
+
+import fcntl
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from meridian_config import pidfile_owner, spawn_detached, state_path, write_atomic
+
+LEARNER_SPOOL_DIR = "learner-spool"
+LEARNER_WORKER_PID = "learner-worker.pid"
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 30  # Multiplied by the attempt number
+WORKER_LINGER_SECONDS = 2.0  # Grace period for late jobs before the worker exits
+
+
+def spool_dir(project_dir: Path) -> Path:
+    path = state_path(project_dir, LEARNER_SPOOL_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def enqueue(project_dir: Path, job: dict) -> Path:
+    """Write a job into the spool. Names sort by creation time (FIFO)."""
+    job = {"created": time.time(), "attempts": 0, "not_before": 0, **job}
+    path = spool_dir(project_dir) / f"{time.time_ns():020d}-{os.getpid()}.json"
+    write_atomic(path, job)
+    return path
+
+
+def pending_jobs(project_dir: Path) -> list[Path]:
+    """All spooled job files, oldest first."""
+    return sorted(spool_dir(project_dir).glob("*.json"))
+
+
+def load_job(path: Path) -> dict | None:
+    try:
+        job = json.loads(path.read_text())
+        return job if isinstance(job, dict) else None
+    except (IOError, json.JSONDecodeError):
+        return None
+
+
+def coalesce(project_dir: Path, path: Path, job: dict) -> int:
+    """Fold every other spooled job for the same transcript into `job`.
+
+    The spool doubles as the dirty marker: jobs that arrived while a run was
+    active are merged here into one follow-up pass covering the furthest end
+    offset (the learner checkpoint trims it to the unprocessed delta). A
+    SessionEnd trigger wins over PreCompact. Returns the number of jobs folded.
+    """
+    folded = 0
+    for other_path in pending_jobs(project_dir):
+        if other_path == path:
+            continue
+        other = load_job(other_path)
+        if other is None or other.get("transcript_path") != job.get("transcript_path"):
+            continue
+        job["end_offset"] = max(job.get("end_offset") or 0, other.get("end_offset") or 0)
+        if other.get("trigger") == "end":
+            job["trigger"] = "end"
+        job["config"] = other.get("config", job.get("config"))  # Newest snapshot
+        folded += 1 + other.get("coalesced", 0)
+        finish(other_path)
+    if folded:
+        job["coalesced"] = job.get("coalesced", 0) + folded
+        write_atomic(path, job)
+    return folded
+
+
+def mark_attempt(path: Path, job: dict) -> None:
+    """Count an attempt before running it, so a job that crashes the worker can't loop forever."""
+    job["attempts"] = job.get("attempts", 0) + 1
+    write_atomic(path, job)
+
+
+def retry_later(path: Path, job: dict, error: str) -> bool:
+    """Reschedule a transiently failed job. Returns False (and drops it) once attempts run out."""
+    if job.get("attempts", 0) >= MAX_ATTEMPTS:
+        finish(path)
+        return False
+    job["not_before"] = time.time() + RETRY_BACKOFF_SECONDS * job.get("attempts", 1)
+    job["last_error"] = error
+    write_atomic(path, job)
+    return True
+
+
+def finish(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+# =============================================================================
+# WORKER PROCESS
+# =============================================================================
+def worker_pid(project_dir: Path) -> int | None:
+    """PID of the running learner worker for this project, or None."""
+    return pidfile_owner(state_path(project_dir, LEARNER_WORKER_PID))
+
+
+def ensure_worker(project_dir: Path, script: Path) -> bool:
+    """Start a learner worker unless one is already draining the spool."""
+    if worker_pid(project_dir) is not None:
+        return True
+    return spawn_detached([sys.executable, str(script), "--worker", "--project", str(project_dir)], cwd=project_dir)
+
+
+def daemonize() -> None:
+    """Second fork of the double fork: spawn_detached already started a new
+    session, so the intermediate parent exits and the worker can never
+    reacquire a controlling terminal."""
+    if os.fork() > 0:
+        os._exit(0)
+    os.chdir("/")
+    os.umask(0o022)
+
+
+def acquire_worker_lock(project_dir: Path):
+    """Take the worker pidfile lock. Returns the open file (keep it open) or None if another worker holds it."""
+    pid_file = open(state_path(project_dir, LEARNER_WORKER_PID), "a+")
+    try:
+        fcntl.flock(pid_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        pid_file.close()
+        return None
+    pid_file.seek(0)
+    pid_file.truncate()
+    pid_file.write(str(os.getpid()))
+    pid_file.flush()
+    return pid_file
+
+
+def next_ready_job(project_dir: Path) -> tuple[Path | None, float | None]:
+    """Return (oldest job whose backoff has expired, None) or (None, seconds until one is ready).
+
+    (None, None) means the spool is empty.
+    """
+    wait = None
+    now = time.time()
+    for path in pending_jobs(project_dir):
+        job = load_job(path)
+        if job is None:
+            finish(path)  # Unreadable job file
+            continue
+        delay = job.get("not_before", 0) - now
+        if delay <= 0:
+            return path, None
+        wait = delay if wait is None else min(wait, delay)
+    return None, wait
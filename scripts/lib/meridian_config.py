@@ -2,9 +2,14 @@
 Shared configuration helpers for Meridian hooks.
 """
 
+import fcntl
 import hashlib
+import json
 import os
+import re
 import subprocess
+import sys
+import time
 from pathlib import Path
 
 
@@ -61,6 +66,13 @@ HOOK_LOGS_DIR = "hook_logs"
 LOOP_STATE_FILE = "loop-state"
 LAST_SESSION_FILE = "last-session.md"
 TRANSCRIPT_PATH_STATE = "transcript-path"
+DOC_ROUTER_INDEX = "doc-router-index.json"
+DOC_FRONTMATTER_INDEX = "doc-frontmatter-index.json"
+NESTED_REPOS_STATE = "nested-repos.json"
+INDEX_WATCHER_PID = "index-watcher.pid"
+DOCS_INDEX_FILE = "docs-index"
+DOCS_INDEX_ARTIFACT = "docs-index.json"
+DOCS_INDEX_LOCK = "docs-index.lock"
 
 
 # =============================================================================
@@ -93,6 +105,86 @@ def state_path(project_dir: Path, filename: str) -> Path:
     return get_state_dir(project_dir) / filename
 
 
+def write_atomic(path: Path, data: str | dict) -> bool:
+    """Write a state file via temp file + rename so readers never see partial content.
+
+    Dicts are serialized as compact JSON. Returns False on I/O failure.
+    """
+    if isinstance(data, dict):
+        data = json.dumps(data, separators=(",", ":"))
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(data)
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return False
+
+
+def rotated_path(path: Path, generation: int) -> Path:
+    """Path of a rotated generation of a log file (generation 0 is the live file)."""
+    return path.with_name(f"{path.name}.{generation}") if generation else path
+
+
+def append_jsonl(path: Path, entry: dict, max_bytes: int, keep: int) -> bool:
+    """Append one JSON line to a log, rotating it once it reaches max_bytes.
+
+    Rotation renames path -> path.1 -> ... -> path.<keep> (keep >= 1); the
+    oldest generation is dropped. Writers serialize on an flock of the live file
+    and reopen it if another writer rotated it while they waited, so lines
+    are never lost or interleaved. Returns False on I/O failure.
+    """
+    line = json.dumps(entry, separators=(",", ":")) + "\n"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            with open(path, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                        continue  # Rotated while waiting for the lock
+                except FileNotFoundError:
+                    continue
+                size = os.fstat(f.fileno()).st_size
+                if size and size + len(line) > max_bytes:
+                    for generation in range(keep, 0, -1):
+                        try:
+                            os.replace(rotated_path(path, generation - 1), rotated_path(path, generation))
+                        except FileNotFoundError:
+                            pass
+                    continue  # Append to a fresh live file
+                f.write(line)
+                return True
+    except OSError:
+        return False
+
+
+def spawn_detached(cmd: list[str], cwd: Path | None = None) -> bool:
+    """Start a background process that outlives the calling hook.
+
+    The child gets its own session and no stdio, so Claude Code never waits
+    on it. Returns False if the process could not be started.
+    """
+    try:
+        subprocess.Popen(
+            cmd,
+            cwd=str(cwd) if cwd else None,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            close_fds=True,
+        )
+        return True
+    except OSError:
+        return False
+
+
 # =============================================================================
 # HOOK OUTPUT LOGGING
 # =============================================================================
@@ -175,9 +267,19 @@ def parse_bool(value: str, default: bool) -> bool:
 # Config key definitions: (yaml_key, config_key, type, default)
 _BOOL_KEYS = [
     ('pebble_enabled', 'pebble_enabled', False),
+    ('doc_router_enabled', 'doc_router_enabled', True),
+    ('doc_ranking', 'doc_ranking', False),
+    ('index_watcher', 'index_watcher', False),
+    ('transcript_stats', 'transcript_stats', False),
 ]
 _INT_KEYS = [
     ('stop_hook_min_actions', 'stop_hook_min_actions', 15),
+    ('doc_router_max_docs', 'doc_router_max_docs', 3),
+    ('doc_ranking_top_k', 'doc_ranking_top_k', 5),
+    ('learner_chunk_tokens', 'learner_chunk_tokens', 60000),
+    ('learner_map_concurrency', 'learner_map_concurrency', 3),
+    ('learner_min_novelty', 'learner_min_novelty', 3),
+    ('learner_doc_candidates', 'learner_doc_candidates', 8),
 ]
 
 
@@ -236,6 +338,16 @@ def get_project_config(base_dir: Path) -> dict:
         'stop_hook_min_actions': 15,
         'session_learner_mode': 'project',
         'extra_doc_dirs': [],
+        'doc_router_enabled': True,
+        'doc_router_max_docs': 3,
+        'doc_ranking': False,
+        'doc_ranking_top_k': 5,
+        'index_watcher': False,
+        'transcript_stats': False,
+        'learner_chunk_tokens': 60000,
+        'learner_map_concurrency': 3,
+        'learner_min_novelty': 3,
+        'learner_doc_candidates': 8,
     }
 
     config_path = base_dir / MERIDIAN_CONFIG
@@ -270,6 +382,32 @@ def get_project_config(base_dir: Path) -> dict:
     return config
 
 
+def get_host_config() -> dict:
+    """Read per-machine settings from ~/.meridian/config.yaml, with defaults.
+
+    Unlike .meridian/config.yaml these apply to every project on the host:
+        max_headless_runs: 2         # concurrent claude -p runs across all projects
+        headless_queue_timeout: 600  # seconds a run waits for a slot before giving up
+    """
+    config = {
+        'max_headless_runs': 2,
+        'headless_queue_timeout': 600,
+    }
+    try:
+        content = (Path.home() / ".meridian" / "config.yaml").read_text()
+    except (IOError, OSError):
+        return config
+
+    for key in config:
+        val = get_config_value(content, key)
+        if val:
+            try:
+                config[key] = max(1, int(val))
+            except ValueError:
+                pass
+    return config
+
+
 def get_additional_review_files(base_dir: Path, absolute: bool = False) -> list[str]:
     """Get list of additional files for implementation/plan review.
 
@@ -384,47 +522,165 @@ def get_pebble_context(base_dir: Path) -> str:
     return "\n".join(parts) if parts else ""
 
 
+# =============================================================================
+# INDEX WATCHER
+# =============================================================================
+_watched_index_cache: dict[str, dict | None] = {}
+
+
+def pidfile_owner(pid_path: Path) -> int | None:
+    """Return the PID recorded in a pidfile whose owner is still alive, else None.
+
+    Long-lived helpers hold an exclusive flock on their pidfile for their
+    whole lifetime, so a failed shared lock means the owner is alive (no
+    PID-reuse races).
+    """
+    try:
+        with open(pid_path) as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return int(f.read().strip() or 0) or None
+            fcntl.flock(f, fcntl.LOCK_UN)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def index_watcher_pid(base_dir: Path) -> int | None:
+    """Return the PID of the running index watcher, or None if none is running."""
+    try:
+        pid_path = state_path(base_dir, INDEX_WATCHER_PID)
+    except OSError:
+        return None  # No usable state dir, so no watcher either
+    return pidfile_owner(pid_path)
+
+
+def load_watched_index(base_dir: Path, filename: str) -> dict | None:
+    """Load a ready-made index published by the running index watcher.
+
+    Returns None when no watcher is running or the index on disk was not
+    written by it. Cached per process — hooks are short-lived.
+    """
+    key = f"{base_dir.resolve()}:{filename}"
+    if key in _watched_index_cache:
+        return _watched_index_cache[key]
+
+    index = None
+    pid = index_watcher_pid(base_dir)
+    if pid is not None:
+        try:
+            data = json.loads(state_path(base_dir, filename).read_text())
+            if data.get("pid") == pid:
+                index = data
+        except (IOError, json.JSONDecodeError):
+            pass
+    _watched_index_cache[key] = index
+    return index
+
+
+def ensure_index_watcher(base_dir: Path) -> bool:
+    """Start the index watcher for this project unless one is already running."""
+    if index_watcher_pid(base_dir) is not None:
+        return True
+    script = Path(__file__).parent.parent / "index-watcher.py"
+    return spawn_detached([sys.executable, str(script), "--project", str(base_dir)], cwd=base_dir)
+
+
 # =============================================================================
 # FRONTMATTER-BASED DOC SCANNING
 # =============================================================================
-def extract_frontmatter(file_path: Path) -> tuple[str, list[str]]:
+FRONTMATTER_MAX_BYTES = 8192  # Headers larger than this are treated as missing
+
+# Closing `---` line of a frontmatter block, matched inside the raw byte buffer
+_FRONTMATTER_CLOSE_RE = re.compile(rb"^[ \t]*---[ \t]*\r?$", re.MULTILINE)
+# YAML block scalar indicators: |, >, with optional chomping/indent (e.g. >-, |2)
+_BLOCK_SCALAR_RE = re.compile(r"^[|>][+-]?[0-9]?$")
+
+
+def read_frontmatter_block(file_path: Path, max_bytes: int = FRONTMATTER_MAX_BYTES) -> str | None:
+    """Read the raw YAML frontmatter of a file with a single bounded read.
+
+    Returns the text between the opening and closing `---` lines, or None if
+    the file has no frontmatter or the closing `---` is not within max_bytes.
+    A file that opens with `---` and never closes it (a horizontal rule, a
+    broken or generated doc) costs one read of max_bytes, not the whole file.
+    """
+    try:
+        with file_path.open("rb") as f:
+            buf = f.read(max_bytes)
+    except OSError:
+        return None
+
+    if not buf.startswith(b"---"):
+        return None
+    body_start = buf.find(b"\n") + 1
+    if body_start == 0:
+        return None
+
+    match = _FRONTMATTER_CLOSE_RE.search(buf, body_start)
+    if not match:
+        return None
+    # A `---` at the very end of a full buffer may be the start of a longer line
+    if match.end() == len(buf) == max_bytes:
+        return None
+    return buf[body_start:match.start()].decode("utf-8", errors="replace")
+
+
+def _collect_scalar(lines: list[str], i: int, key_indent: int, value: str) -> tuple[str, int]:
+    """Collect a possibly multi-line scalar value starting at lines[i].
+
+    Handles block scalars (`summary: >` / `summary: |` followed by indented
+    lines) and plain or quoted scalars continued on indented lines. Summaries
+    are rendered inline, so every form is folded to a single line.
+    Returns (value, index of the next unconsumed line).
+    """
+    block = bool(_BLOCK_SCALAR_RE.match(value))
+    parts = [] if block else [value]
+    i += 1
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if stripped and indent <= key_indent:
+            break
+        if stripped:
+            parts.append(stripped)
+        i += 1
+    return " ".join(p for p in parts if p).strip().strip("'\""), i
+
+
+def extract_frontmatter(file_path: Path, max_bytes: int = FRONTMATTER_MAX_BYTES) -> tuple[str, list[str]]:
     """Extract summary and read_when from YAML frontmatter.
 
     Returns (summary, read_when_list). Both empty if no valid frontmatter.
-    Only reads the frontmatter header, not the full file.
+    Only reads the first max_bytes of the file (see read_frontmatter_block).
     """
-    try:
-        with file_path.open() as f:
-            first_line = f.readline()
-            if not first_line.startswith("---"):
-                return "", []
-            fm_lines = []
-            for line in f:
-                if line.strip() == "---":
-                    break
-                fm_lines.append(line)
-            else:
-                return "", []  # no closing ---
-            frontmatter = "\n".join(fm_lines).strip()
-    except IOError:
+    frontmatter = read_frontmatter_block(file_path, max_bytes)
+    if frontmatter is None:
         return "", []
+
     summary = ""
     read_when: list[str] = []
     collecting_read_when = False
 
-    for line in frontmatter.split("\n"):
+    lines = frontmatter.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
         stripped = line.strip()
 
         if stripped.startswith("summary:"):
-            summary = stripped[len("summary:"):].strip().strip("'\"")
+            indent = len(line) - len(line.lstrip())
+            summary, i = _collect_scalar(lines, i, indent, stripped[len("summary:"):].strip())
             collecting_read_when = False
+            continue
 
-        elif stripped.startswith("read_when:"):
+        if stripped.startswith("read_when:"):
             collecting_read_when = True
             inline = stripped[len("read_when:"):].strip()
             if inline.startswith("[") and inline.endswith("]"):
                 try:
-                    import json
                     parsed = json.loads(inline.replace("'", '"'))
                     if isinstance(parsed, list):
                         read_when.extend(str(x).strip() for x in parsed if x)
@@ -438,33 +694,214 @@ def extract_frontmatter(file_path: Path) -> tuple[str, list[str]]:
         elif collecting_read_when and stripped:
             collecting_read_when = False
 
+        i += 1
+
     return summary, read_when
 
 
-def scan_docs_directory(dir_path: Path, base_dir: Path) -> str:
-    """Scan a directory for .md files with frontmatter, return formatted listing.
+def sort_doc_entries(entries: list[dict]) -> list[dict]:
+    """Sort scanned docs by path, component by component (the order of sorted(rglob()))."""
+    return sorted(entries, key=lambda e: Path(e["path"]).parts)
 
-    Skips INDEX.md and README.md files. Returns empty string if no docs found.
+
+def scan_docs_entries(dir_path: Path, base_dir: Path, use_watched: bool = True) -> list[dict]:
+    """Scan a directory for .md files and return their frontmatter.
+
+    Returns [{"path", "summary", "read_when"}] with paths relative to base_dir,
+    sorted by path. Skips INDEX.md and README.md files. Docs without a summary
+    are included with an empty summary so callers can flag them.
+
+    When the index watcher is running, its ready-made index is returned
+    instead of touching the directory (use_watched=False forces a scan).
     """
+    if use_watched:
+        watched = load_watched_index(base_dir, DOC_FRONTMATTER_INDEX)
+        dir_key = str(Path(os.path.relpath(dir_path, base_dir)))
+        if watched is not None and dir_key in watched.get("dirs", {}):
+            return sort_doc_entries([dict(e) for e in watched["dirs"][dir_key]])
+
     if not dir_path.exists():
-        return ""
+        return []
 
     entries = []
-
     for md_file in sorted(dir_path.rglob("*.md")):
         if md_file.name in SKIP_NAMES:
             continue
-        rel_path = md_file.relative_to(base_dir)
         summary, read_when = extract_frontmatter(md_file)
-        if summary:
-            entry = f"- **{rel_path}** — {summary}"
-            if read_when:
-                entry += f"\n  Read when: {'; '.join(read_when)}"
-            entries.append(entry)
-        else:
-            entries.append(f"- **{rel_path}** — *(missing summary frontmatter)*")
+        entries.append({
+            "path": str(md_file.relative_to(base_dir)),
+            "summary": summary,
+            "read_when": read_when,
+        })
+    return entries
+
+
+def format_doc_entry(entry: dict) -> str:
+    """Format one scanned doc as a docs-index list item."""
+    if not entry["summary"]:
+        return f"- **{entry['path']}** — *(missing summary frontmatter)*"
+    line = f"- **{entry['path']}** — {entry['summary']}"
+    if entry["read_when"]:
+        line += f"\n  Read when: {'; '.join(entry['read_when'])}"
+    return line
+
+
+def format_doc_entry_compact(entry: dict) -> str:
+    """Format one scanned doc as a single line without read_when hints."""
+    return f"- **{entry['path']}** — {entry['summary'] or '*(missing summary frontmatter)*'}"
+
+
+def format_docs_index(scanned: list[tuple[str, list[dict]]]) -> str:
+    """Format the docs-index state file from (dir_rel, entries) pairs."""
+    parts = []
+    for dir_rel, entries in scanned:
+        if entries:
+            parts.append(f"## {dir_rel}")
+            parts.extend(format_doc_entry(e) for e in entries)
+            parts.append("")
+    return "\n".join(parts)
+
+
+def scan_docs_directory(dir_path: Path, base_dir: Path) -> str:
+    """Scan a directory for .md files with frontmatter, return formatted listing.
+
+    Skips INDEX.md and README.md files. Returns empty string if no docs found.
+    """
+    return "\n".join(format_doc_entry(e) for e in scan_docs_entries(dir_path, base_dir))
+
+
+def get_doc_scan_dirs(project_config: dict) -> list[tuple[str, str]]:
+    """Return (dir_rel, header) for every directory whose docs get indexed."""
+    doc_dirs = [
+        (".meridian/api-docs", "External API docs. Read the relevant doc before using any listed API."),
+        (".meridian/docs", "Project documentation. Read relevant docs when your task matches a hint below."),
+    ]
+    doc_dirs.extend(get_extra_doc_dirs(project_config))
+    return doc_dirs
+
+
+def write_doc_router_index(base_dir: Path, entries: list[dict]) -> None:
+    """Build the prompt-time doc router index and save it to the state dir.
+
+    Only docs with a summary are routable. Written atomically so the
+    UserPromptSubmit router never reads a half-written index.
+    """
+    from doc_search import build_router_index
+
+    index = build_router_index([e for e in entries if e["summary"]])
+    write_atomic(state_path(base_dir, DOC_ROUTER_INDEX), index)
+
+
+# =============================================================================
+# SHARED DOCS-INDEX ARTIFACT
+# =============================================================================
+# SessionStart hooks run in parallel. The first one to need the docs index
+# builds and publishes it; the others wait on the lock and reuse the result.
+DOCS_INDEX_REUSE_SECONDS = 30  # An artifact this fresh with the same session key is reused
+DOCS_INDEX_WAIT_SECONDS = 2.0  # How long a consumer waits for the producer's lock
+
+
+def _read_docs_index_artifact(base_dir: Path) -> dict | None:
+    try:
+        return json.loads(state_path(base_dir, DOCS_INDEX_ARTIFACT).read_text())
+    except (IOError, json.JSONDecodeError):
+        return None
+
+
+def _docs_index_is_current(artifact: dict | None, session_key: str) -> bool:
+    return bool(
+        artifact
+        and session_key
+        and artifact.get("session_key") == session_key
+        and time.time() - artifact.get("built_at", 0) < DOCS_INDEX_REUSE_SECONDS
+    )
+
+
+def publish_docs_index(base_dir: Path, scanned: list[tuple[str, list[dict]]], session_key: str = "",
+                       generation: int | None = None) -> dict:
+    """Publish the docs index: JSON artifact, docs-index file and router index.
+
+    Every file is written via temp file + rename, so concurrent readers see
+    either the previous generation or the new one, never a partial write.
+    """
+    if generation is None:
+        previous = _read_docs_index_artifact(base_dir)
+        generation = (previous.get("generation", 0) if previous else 0) + 1
+
+    artifact = {
+        "generation": generation,
+        "session_key": session_key,
+        "built_at": time.time(),
+        "dirs": [[dir_rel, entries] for dir_rel, entries in scanned],
+    }
+    docs_index = format_docs_index(scanned)
+    if docs_index:
+        write_atomic(state_path(base_dir, DOCS_INDEX_FILE), docs_index)
+    else:
+        # Every doc is gone — don't leave the previous generation's list behind
+        try:
+            state_path(base_dir, DOCS_INDEX_FILE).unlink(missing_ok=True)
+        except OSError:
+            pass
+    if get_project_config(base_dir).get('doc_router_enabled', True):
+        write_doc_router_index(base_dir, [e for _, entries in scanned for e in entries])
+    # Artifact last: once a consumer sees this generation, the other files are in place
+    write_atomic(state_path(base_dir, DOCS_INDEX_ARTIFACT), artifact)
+    return artifact
+
+
+def _scan_doc_dirs(base_dir: Path, project_config: dict) -> list[tuple[str, list[dict]]]:
+    return [
+        (dir_rel, scan_docs_entries(base_dir / dir_rel, base_dir))
+        for dir_rel, _header in get_doc_scan_dirs(project_config)
+    ]
+
 
-    return "\n".join(entries)
+def get_docs_index(base_dir: Path, project_config: dict, session_key: str = "") -> dict:
+    """Return the docs index for this SessionStart, scanning at most once per generation.
+
+    session_key identifies the SessionStart event (session id + source). If a
+    fresh artifact for the same key exists it is reused. Otherwise the caller
+    takes the docs-index lock, re-checks (another hook may have just built
+    it), and only then scans and publishes a new generation.
+
+    If the state dir is missing or read-only, the docs are scanned inline
+    and nothing is published (generation 0).
+
+    Returns {"generation", "session_key", "built_at", "dirs": [[dir_rel, entries], ...]}.
+    """
+    artifact = _read_docs_index_artifact(base_dir)
+    if _docs_index_is_current(artifact, session_key):
+        return artifact
+
+    try:
+        lock_file = open(state_path(base_dir, DOCS_INDEX_LOCK), "a")
+    except OSError:
+        return {"generation": 0, "session_key": session_key, "built_at": time.time(),
+                "dirs": [[dir_rel, entries] for dir_rel, entries in _scan_doc_dirs(base_dir, project_config)]}
+
+    with lock_file:
+        deadline = time.monotonic() + DOCS_INDEX_WAIT_SECONDS
+        locked = False
+        while not locked:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                locked = True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    break  # Producer is stuck — build our own copy rather than block SessionStart
+                time.sleep(0.02)
+
+        try:
+            artifact = _read_docs_index_artifact(base_dir)
+            if _docs_index_is_current(artifact, session_key):
+                return artifact
+
+            generation = (artifact.get("generation", 0) if artifact else 0) + 1
+            return publish_docs_index(base_dir, _scan_doc_dirs(base_dir, project_config), session_key, generation)
+        finally:
+            if locked:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 
 MAX_DOC_DEPTH = 3  # Max directory depth for project-wide frontmatter scanning
@@ -477,11 +914,11 @@ SKIP_DIRS = {
 SKIP_NAMES = {"INDEX.md", "README.md", "CHANGELOG.md"}
 
 
-def scan_project_frontmatter(project_dir: Path) -> str:
+def scan_project_frontmatter_entries(project_dir: Path) -> list[dict]:
     """Scan the project for .md files with frontmatter, up to MAX_DOC_DEPTH levels deep.
 
-    Returns formatted listing with absolute paths, summaries, and read_when hints.
-    Only includes files that have a valid 'summary' field in their frontmatter.
+    Returns [{"path", "summary", "read_when"}] with absolute paths, sorted by
+    path. Only includes files that have a valid 'summary' field.
     """
     entries = []
 
@@ -503,43 +940,58 @@ def scan_project_frontmatter(project_dir: Path) -> str:
         if not summary:
             continue
 
-        entry = f"- **{md_file}** — {summary}"
-        if read_when:
-            entry += f"\n  Read when: {'; '.join(read_when)}"
-        entries.append(entry)
+        entries.append({"path": str(md_file), "summary": summary, "read_when": read_when})
 
-    return "\n".join(entries)
+    return entries
+
+
+def scan_project_frontmatter(project_dir: Path) -> str:
+    """Formatted listing of scan_project_frontmatter_entries (absolute paths, summaries, read_when hints)."""
+    return "\n".join(format_doc_entry(entry) for entry in scan_project_frontmatter_entries(project_dir))
 
 
 # =============================================================================
 # NESTED GIT REPO SCANNING
 # =============================================================================
-def scan_nested_git_repos(base_dir: Path, max_depth: int = 3) -> str:
-    """Scan for nested git repositories and return their recent commits.
+NESTED_REPO_DEPTH = 3  # Default scan depth; the index watcher's repo list is kept at this depth
 
-    Finds .git directories up to max_depth levels deep (excluding the root).
-    Returns formatted string with recent commits per nested repo.
-    """
-    nested_repos = []
 
-    for git_dir in sorted(base_dir.rglob(".git")):
-        # Skip the root repo's .git
-        if git_dir.parent == base_dir:
-            continue
+def find_nested_git_repos(base_dir: Path, max_depth: int = NESTED_REPO_DEPTH) -> list[tuple[Path, Path]]:
+    """Find nested git repositories up to max_depth levels below base_dir.
 
-        # Skip if too deep
-        rel = git_dir.parent.relative_to(base_dir)
-        if len(rel.parts) > max_depth:
-            continue
+    Returns sorted (relative path, repo dir) pairs, excluding the root repo,
+    submodule .git files, and anything under SKIP_DIRS. The walk stops at
+    max_depth instead of visiting the whole tree.
+    """
+    repos = []
+    for dirpath, dirnames, _filenames in os.walk(base_dir):
+        current = Path(dirpath)
+        rel = current.relative_to(base_dir)
+        if ".git" in dirnames and rel.parts:
+            repos.append((rel, current))
+        if len(rel.parts) >= max_depth:
+            dirnames.clear()
+        else:
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+    return sorted(repos)
 
-        if any(part in SKIP_DIRS for part in rel.parts):
-            continue
 
-        # Only include actual directories (not submodule .git files)
-        if not git_dir.is_dir():
-            continue
+def scan_nested_git_repos(base_dir: Path, max_depth: int = NESTED_REPO_DEPTH, use_watched: bool = True) -> str:
+    """Scan for nested git repositories and return their recent commits.
 
-        nested_repos.append((str(rel), git_dir.parent))
+    Finds .git directories up to max_depth levels deep (excluding the root).
+    Returns formatted string with recent commits per nested repo. When the
+    index watcher is running, its repo list is used instead of walking the
+    tree; it only covers NESTED_REPO_DEPTH, so other depths always walk
+    (as does use_watched=False).
+    """
+    watched = None
+    if use_watched and max_depth == NESTED_REPO_DEPTH:
+        watched = load_watched_index(base_dir, NESTED_REPOS_STATE)
+    if watched is not None:
+        nested_repos = [(rel, base_dir / rel) for rel in watched.get("repos", [])]
+    else:
+        nested_repos = [(str(rel), repo_dir) for rel, repo_dir in find_nested_git_repos(base_dir, max_depth)]
 
     if not nested_repos:
         return ""
@@ -581,25 +1033,89 @@ def scan_nested_git_repos(base_dir: Path, max_depth: int = 3) -> str:
     return "\n".join(parts)
 
 
+# =============================================================================
+# WORK-AWARE DOC RANKING
+# =============================================================================
+MAX_PLAN_QUERY_BYTES = 16384  # Only the head of the active plan feeds the ranking query
+
+
+def gather_work_terms(base_dir: Path) -> list[str]:
+    """Collect query terms describing the current work.
+
+    Sources: paths with uncommitted changes (including untracked files), files
+    touched by the last 10 commits, and the text of the active plan referenced
+    by the `active-plan` state file.
+    """
+    from doc_search import tokenize
+
+    text_parts = []
+
+    try:
+        result = subprocess.run(
+            ["git", "status", "--porcelain"],
+            capture_output=True, text=True, timeout=10, cwd=str(base_dir)
+        )
+        if result.returncode == 0:
+            text_parts.extend(line[3:] for line in result.stdout.splitlines() if len(line) > 3)
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        pass
+
+    try:
+        result = subprocess.run(
+            ["git", "log", "--name-only", "--format=", "-10"],
+            capture_output=True, text=True, timeout=10, cwd=str(base_dir)
+        )
+        if result.returncode == 0:
+            text_parts.extend(line for line in result.stdout.splitlines() if line.strip())
+    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
+        pass
+
+    try:
+        plan_ref = state_path(base_dir, ACTIVE_PLAN_FILE).read_text().strip()
+        if plan_ref:
+            with open(Path(plan_ref).expanduser(), errors="replace") as f:
+                text_parts.append(f.read(MAX_PLAN_QUERY_BYTES))
+    except (IOError, OSError):
+        pass
+
+    return tokenize("\n".join(text_parts))
+
+
+def rank_docs_for_work(base_dir: Path, entries: list[dict], top_k: int) -> list[dict]:
+    """Return up to top_k doc entries ranked by BM25 against the current work.
+
+    Empty when there is no work signal or nothing scores.
+    """
+    from doc_search import bm25_rank
+
+    query_terms = gather_work_terms(base_dir)
+    if not query_terms:
+        return []
+    return [entries[i] for _score, i in bm25_rank(entries, query_terms)[:top_k]]
+
+
 # =============================================================================
 # CONTEXT INJECTION HELPERS
 # =============================================================================
-def build_injected_context(base_dir: Path) -> tuple[str, dict]:
+def build_injected_context(base_dir: Path, session_key: str = "") -> tuple[str, dict]:
     """Build the full injected context string with XML-wrapped file contents.
 
     Args:
         base_dir: Base directory of the project
+        session_key: SessionStart event key, used to share the docs index with
+            save-injected-files (see get_docs_index)
 
     Returns:
         Tuple of (context_string, metadata_dict) where metadata tracks what was injected.
-        Metadata keys: workspace, docs, api_docs, last_session, plan, pebble,
-        manual, soul, nested_repos, errors.
+        Metadata keys: workspace, docs, api_docs, ranked_docs, last_session, plan,
+        pebble, manual, soul, nested_repos, errors.
     """
     parts = []
     meta: dict = {
         "workspace": False,
         "docs": 0,
         "api_docs": 0,
+        "ranked_docs": 0,
         "last_session": False,
         "pebble": False,
         "manual": False,
@@ -719,26 +1235,44 @@ def build_injected_context(base_dir: Path) -> tuple[str, dict]:
     # Get project config for addons and pebble
     project_config = get_project_config(base_dir)
 
-    # Documentation directories — scan for frontmatter summaries
-    doc_dirs = [
-        (".meridian/api-docs", "External API docs. Read the relevant doc before using any listed API."),
-        (".meridian/docs", "Project documentation. Read relevant docs when your task matches a hint below."),
-    ]
-
-    # Add extra doc dirs from config
-    doc_dirs.extend(get_extra_doc_dirs(project_config))
+    # Documentation directories (plus extra doc dirs from config) — frontmatter
+    # summaries come from the shared docs index, scanned once per SessionStart
+    headers = dict(get_doc_scan_dirs(project_config))
+    docs_index = get_docs_index(base_dir, project_config, session_key)
+    scanned = [(dir_rel, headers.get(dir_rel, dir_rel), entries) for dir_rel, entries in docs_index["dirs"]]
+
+    # Ranking mode: the docs most relevant to the current work are listed in
+    # full up front, everything else compactly (path + summary) below.
+    ranked_paths: set[str] = set()
+    if project_config.get('doc_ranking', False):
+        all_entries = [e for _, _, entries in scanned for e in entries]
+        top_k = project_config.get('doc_ranking_top_k', 5)
+        if len(all_entries) > top_k:
+            top = rank_docs_for_work(base_dir, all_entries, top_k)
+            if top:
+                ranked_paths = {e["path"] for e in top}
+                meta["ranked_docs"] = len(top)
+                parts.append("**Docs most relevant to your current work (uncommitted changes, recent commits, active plan).**")
+                parts.append("<docs-index ranked=\"true\">")
+                parts.extend(format_doc_entry(e) for e in top)
+                parts.append("</docs-index>")
+                parts.append("")
 
     any_docs = False
-    for dir_rel, header in doc_dirs:
-        listing = scan_docs_directory(base_dir / dir_rel, base_dir)
-        if listing:
+    for dir_rel, header, entries in scanned:
+        if entries:
             any_docs = True
-            # Count docs in this listing (each doc starts with "- **")
-            doc_count = listing.count("\n- **") + (1 if listing.startswith("- **") else 0)
             if dir_rel == ".meridian/api-docs":
-                meta["api_docs"] += doc_count
+                meta["api_docs"] += len(entries)
+            else:
+                meta["docs"] += len(entries)
+            rest = [e for e in entries if e["path"] not in ranked_paths]
+            if not rest:
+                continue
+            if ranked_paths:
+                listing = "\n".join(format_doc_entry_compact(e) for e in rest)
             else:
-                meta["docs"] += doc_count
+                listing = "\n".join(format_doc_entry(e) for e in rest)
             parts.append(f"**{header}**")
             parts.append(f"<docs-index dir=\"{dir_rel}\">")
             parts.append(listing)
@@ -0,0 +1,400 @@
+"""
+transcript — shared access to Claude Code session transcripts (JSONL).
+
+Keeps a per-project transcript index in the state dir, keyed by transcript
+path. It records the byte offsets of compact boundaries, how far the file
+has been scanned, and named cursors for consumers (session-learner,
+session-transcript). The index is extended incrementally as the transcript
+grows, so consumers seek() straight to the range they need instead of
+re-reading and re-decoding the whole file.
+"""
+
+import fcntl
+import hashlib
+import json
+import mmap
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from meridian_config import state_path, write_atomic
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TRANSCRIPT_INDEX_STATE = "transcript-index.json"
+TRANSCRIPT_INDEX_LOCK = "transcript-index.lock"
+MAX_INDEXED_TRANSCRIPTS = 20  # Oldest entries are dropped from the index beyond this
+HEAD_BYTES = 256  # Fingerprint of the file start, detects a replaced transcript
+READ_CHUNK = 1 << 20
+TAIL_BLOCK = 64 * 1024  # Block size for reading a transcript backwards
+MMAP_SEED_MIN_BYTES = 32 * 1024 * 1024  # Unindexed transcripts above this are seeded from the tail
+
+COMPACT_BOUNDARY_MARKER = b"compact_boundary"
+
+
+# =============================================================================
+# DECODING
+# =============================================================================
+# Claude Code writes compact JSON, so a structural "type" key appears as these
+# exact bytes. Quotes inside string values are escaped, so message text can't
+# fake a marker.
+USER_MARKER = b'"type":"user"'
+ASSISTANT_MARKER = b'"type":"assistant"'
+TOOL_RESULT_MARKER = b'"type":"tool_result"'
+_SPACED_TYPE_MARKER = b'"type": "'
+
+# Both decoders raise ValueError subclasses (JSONDecodeError, UnicodeDecodeError)
+DECODE_ERRORS = (ValueError,)
+
+
+if orjson is not None:
+    def loads(raw: bytes):
+        """Decode one line with orjson, several times faster than the stdlib.
+
+        Falls back to the stdlib for the rare input orjson rejects but json
+        accepts (lone surrogate escapes), so results match either way.
+        """
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return json.loads(raw)
+else:
+    loads = json.loads
+
+DECODER_NAME = "orjson" if orjson is not None else "json"
+
+
+def is_message_candidate(raw: bytes) -> bool:
+    """Cheap byte-level check whether a line can hold user text or an assistant message.
+
+    Rejects progress, file-history-snapshot and system lines, and user lines
+    carrying tool results (which the parsers discard anyway) without decoding
+    them. Lines written with spaced separators are always passed through.
+    """
+    if ASSISTANT_MARKER in raw:
+        return True
+    if USER_MARKER in raw:
+        return TOOL_RESULT_MARKER not in raw
+    return _SPACED_TYPE_MARKER in raw
+
+
+def is_compact_boundary(raw: dict) -> bool:
+    """Check whether a decoded transcript entry is a compact boundary."""
+    return raw.get("type") == "system" and raw.get("subtype") == "compact_boundary"
+
+
+def _head_fingerprint(transcript_path: str, length: int = HEAD_BYTES) -> tuple[str, int]:
+    """Hash of the first `length` bytes (fewer if the file is shorter) and how many were hashed."""
+    with open(transcript_path, "rb") as f:
+        head = f.read(length)
+    return hashlib.sha1(head).hexdigest(), len(head)
+
+
+@contextmanager
+def _index_lock(project_dir: Path):
+    """Serialize read-modify-write of the index (PreCompact hooks run concurrently)."""
+    with open(state_path(project_dir, TRANSCRIPT_INDEX_LOCK), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _load_index(project_dir: Path) -> dict:
+    try:
+        data = json.loads(state_path(project_dir, TRANSCRIPT_INDEX_STATE).read_text())
+        if isinstance(data, dict):
+            return data
+    except (IOError, json.JSONDecodeError):
+        pass
+    return {}
+
+
+def _save_index(project_dir: Path, index: dict) -> None:
+    if len(index) > MAX_INDEXED_TRANSCRIPTS:
+        keep = sorted(index, key=lambda k: index[k].get("touched", 0))[-MAX_INDEXED_TRANSCRIPTS:]
+        index = {k: index[k] for k in keep}
+    write_atomic(state_path(project_dir, TRANSCRIPT_INDEX_STATE), index)
+
+
+def _new_record(head: str, head_bytes: int) -> dict:
+    return {"size": 0, "lines": 0, "head": head, "head_bytes": head_bytes, "boundaries": [], "cursors": {},
+            "touched": 0}
+
+
+def _line_bounds(data, hit: int, end: int) -> tuple[int, int]:
+    """Return (start, stop) of the line containing byte `hit`, stop excluding the newline."""
+    start = data.rfind(b"\n", 0, hit) + 1
+    stop = data.find(b"\n", hit, end)
+    return start, (end if stop == -1 else stop)
+
+
+def _scan_range(transcript_path: str, record: dict) -> None:
+    """Extend record from its scanned size to the last complete line in the file.
+
+    Searches each chunk for the boundary marker and decodes only the lines it
+    hits; everything else is just newline-counted.
+    """
+    offset = record["size"]
+    lines = record["lines"]
+    boundaries = record["boundaries"]
+
+    with open(transcript_path, "rb") as f:
+        f.seek(offset)
+        pending = b""
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            data = pending + chunk
+            complete = data.rfind(b"\n") + 1  # Bytes up to the last full line
+            pos = 0
+            counted = 0
+            while True:
+                hit = data.find(COMPACT_BOUNDARY_MARKER, pos, complete)
+                if hit == -1:
+                    break
+                start, stop = _line_bounds(data, hit, complete)
+                lines += data.count(b"\n", counted, start)
+                counted = start
+                try:
+                    if is_compact_boundary(loads(data[start:stop])):
+                        boundaries.append([offset + start, lines])
+                except DECODE_ERRORS:
+                    pass
+                pos = stop + 1
+            lines += data.count(b"\n", counted, complete)
+            offset += complete
+            pending = data[complete:]
+
+    # A trailing partial line is left unscanned until it is terminated
+    record["size"] = offset
+    record["lines"] = lines
+
+
+def _count_newlines(f, end: int) -> int:
+    """Count newlines in the first `end` bytes through one reused buffer."""
+    buf = bytearray(READ_CHUNK)
+    f.seek(0)
+    count = 0
+    left = end
+    while left > 0:
+        n = min(f.readinto(buf), left)
+        if n <= 0:
+            break
+        count += buf.count(b"\n", 0, n)
+        left -= n
+    return count
+
+
+def find_last_compact_boundary(transcript_path: str, with_line: bool = True) -> tuple[int, int | None] | None:
+    """Find the last compact boundary by searching the memory-mapped file backwards.
+
+    Only lines containing the marker bytes are decoded, so locating the
+    boundary takes microseconds however large the file is. Returns
+    (byte_offset, line_number), or None when there is no boundary. The line
+    number needs a newline count over everything before the boundary (about
+    0.5s per 500 MB); pass with_line=False to skip it and get None instead.
+    """
+    with open(transcript_path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None  # Empty file
+        with mm:
+            complete = mm.rfind(b"\n") + 1  # Ignore a partially written last line
+            end = complete
+            while True:
+                hit = mm.rfind(COMPACT_BOUNDARY_MARKER, 0, end)
+                if hit == -1:
+                    return None
+                start, stop = _line_bounds(mm, hit, complete)
+                try:
+                    if is_compact_boundary(loads(mm[start:stop])):
+                        break
+                except DECODE_ERRORS:
+                    pass
+                end = start
+        return start, (_count_newlines(f, start) if with_line else None)
+
+
+def _seed_from_tail(transcript_path: str, record: dict) -> None:
+    """Initialize an empty record for a large transcript from its last boundary.
+
+    Earlier boundaries are not recorded — consumers only read from the last
+    one. Lines before it are counted once, not decoded, and the record then
+    grows incrementally like any other.
+    """
+    found = find_last_compact_boundary(transcript_path)
+    if found is None:
+        return  # No boundary: the regular scan has to read everything anyway
+    offset, line = found
+    with open(transcript_path, "rb") as f:
+        f.seek(offset)
+        boundary_len = len(f.readline())
+    record["boundaries"] = [[offset, line]]
+    record["size"] = offset + boundary_len
+    record["lines"] = line + 1
+
+
+def update_transcript_index(project_dir: Path, transcript_path: str) -> dict:
+    """Bring the index record for a transcript up to date and return it.
+
+    Only bytes appended since the last call are read. If the file shrank or
+    its first bytes changed, it is a different transcript and is rescanned.
+
+    Record keys: size (bytes scanned, always a line boundary), lines, head and
+    head_bytes (fingerprint of the first head_bytes bytes), boundaries
+    ([[byte_offset, line_number], ...]), cursors.
+    """
+    key = str(Path(transcript_path).resolve())
+    with _index_lock(project_dir):
+        index = _load_index(project_dir)
+        head, head_bytes = _head_fingerprint(transcript_path)
+        file_size = Path(transcript_path).stat().st_size
+
+        record = index.get(key)
+        if record and record.get("head_bytes", HEAD_BYTES) != head_bytes:
+            # Fingerprinted while shorter than HEAD_BYTES: compare that prefix, then keep the longer one
+            if _head_fingerprint(transcript_path, record.get("head_bytes", HEAD_BYTES))[0] == record.get("head"):
+                record["head"], record["head_bytes"] = head, head_bytes
+        if not record or record.get("head") != head or record.get("size", 0) > file_size:
+            record = _new_record(head, head_bytes)
+
+        if record["size"] == 0 and file_size >= MMAP_SEED_MIN_BYTES:
+            _seed_from_tail(transcript_path, record)
+        if record["size"] < file_size:
+            _scan_range(transcript_path, record)
+
+        record["touched"] = time.time()
+        index[key] = record
+        _save_index(project_dir, index)
+    return record
+
+
+def last_compact_boundary(record: dict) -> tuple[int, int]:
+    """Return (byte_offset, line_number) of the last compact boundary, or (0, 0)."""
+    if record["boundaries"]:
+        offset, line = record["boundaries"][-1]
+        return offset, line
+    return 0, 0
+
+
+def iter_lines(transcript_path: str, start: int = 0, end: int | None = None) -> Iterator[tuple[int, bytes]]:
+    """Yield (byte_offset, raw_line) for complete lines in [start, end).
+
+    start must be a line boundary (an offset taken from the index).
+    """
+    with open(transcript_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if end is not None and offset >= end:
+                break
+            if not line.endswith(b"\n"):
+                break  # Partial line still being written
+            yield offset, line
+            offset += len(line)
+
+
+def iter_chunks(transcript_path: str, start: int = 0, end: int | None = None,
+                size: int = READ_CHUNK) -> Iterator[bytes]:
+    """Yield blocks of about `size` bytes holding only complete lines from [start, end).
+
+    For scans that search whole blocks instead of walking line by line.
+    start must be a line boundary; a trailing partial line is not yielded.
+    """
+    with open(transcript_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        pending = b""
+        while end is None or offset < end:
+            chunk = f.read(size if end is None else min(size, end - offset))
+            if not chunk:
+                break
+            offset += len(chunk)
+            data = pending + chunk
+            complete = data.rfind(b"\n") + 1
+            if complete:
+                yield data[:complete]
+            pending = data[complete:]
+
+
+def iter_lines_reverse(transcript_path: str, block_size: int = TAIL_BLOCK) -> Iterator[bytes]:
+    """Yield raw lines from the end of the file towards the start.
+
+    Reads fixed-size blocks backwards, so finding something near the end costs
+    the same however large the transcript is. A partially written last line is
+    yielded as-is; callers decoding JSON simply skip it when it fails to parse.
+    """
+    with open(transcript_path, "rb") as f:
+        f.seek(0, 2)
+        pos = f.tell()
+        tail = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + tail
+            lines = data.split(b"\n")
+            tail = lines[0]  # May continue in the previous block
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+def complete_size(transcript_path: str) -> int:
+    """Offset just past the last complete line, reading only the file's tail."""
+    with open(transcript_path, "rb") as f:
+        pos = f.seek(0, 2)
+        while pos > 0:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                return pos + newline + 1
+    return 0
+
+
+def last_entry_of_type(transcript_path: str, entry_type: str) -> dict | None:
+    """Return the last decoded entry whose "type" is entry_type, or None.
+
+    Lines are filtered on the raw bytes before decoding, so only candidate
+    lines near the end of the file are parsed.
+    """
+    marker = f'"{entry_type}"'.encode()
+    for line in iter_lines_reverse(transcript_path):
+        if marker not in line:
+            continue
+        try:
+            entry = loads(line)
+        except DECODE_ERRORS:
+            continue
+        if isinstance(entry, dict) and entry.get("type") == entry_type:
+            return entry
+    return None
+
+
+def save_cursor(project_dir: Path, transcript_path: str, name: str, offset: int, **extra) -> None:
+    """Record how far a consumer has processed a transcript."""
+    key = str(Path(transcript_path).resolve())
+    with _index_lock(project_dir):
+        index = _load_index(project_dir)
+        record = index.get(key)
+        if record is None:
+            return
+        record.setdefault("cursors", {})[name] = {"offset": offset, **extra}
+        _save_index(project_dir, index)
+
+
+def load_cursor(project_dir: Path, transcript_path: str, name: str) -> dict | None:
+    """Return a consumer's cursor ({"offset", ...}) for a transcript, or None."""
+    record = _load_index(project_dir).get(str(Path(transcript_path).resolve()))
+    if not record:
+        return None
+    return record.get("cursors", {}).get(name)
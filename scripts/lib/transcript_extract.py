@@ -0,0 +1,320 @@
+"""
+transcript_extract — single-pass streaming extraction over a transcript range.
+
+`iter_entries` decodes each transcript line once and yields small typed
+entries (user text, assistant text, tool use). Projections consume that
+stream and build one artifact each:
+
+    LearnerProjection   entries for the session-learner prompt, with source offsets
+    DialogueProjection  user/assistant dialogue, streaming entries deduped by requestId
+    ToolUseProjection   tool call counts and files touched
+
+On PreCompact and SessionEnd, session-learner and session-transcript run
+concurrently over overlapping ranges, and the learner comes back for the
+same transcript from a moving checkpoint. `extract_shared` keeps the decoded
+entries of one contiguous byte range per transcript in the state dir, so each
+run decodes only the bytes the cache doesn't cover yet.
+"""
+
+import fcntl
+import json
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from meridian_config import is_system_noise, state_path, write_atomic
+import transcript
+
+TRANSCRIPT_EXTRACT_STATE = "transcript-extract.json"
+TRANSCRIPT_EXTRACT_LOCK = "transcript-extract.lock"
+EXTRACT_VERSION = 4
+
+# Tool inputs are projected at decode time, so bulky payloads never reach the
+# cache on disk. Inputs up to SMALL_TOOL_INPUT bytes (compact JSON) are kept
+# whole. Larger ones keep their identifying fields (cut at TOOL_INPUT_CHARS)
+# and single-line values up to INLINE_FIELD_CHARS; file bodies, edit strings
+# and other bulky values are replaced by their byte size.
+SMALL_TOOL_INPUT = 300
+INLINE_FIELD_CHARS = 120
+TOOL_INPUT_FIELDS = ("file_path", "notebook_path", "path", "pattern", "command")
+TOOL_INPUT_CHARS = 500
+
+# Line types that never carry dialogue or tool calls
+_SKIP_TYPES = frozenset(("progress", "file-history-snapshot", "system"))
+
+
+class Entry:
+    """One extracted item. kind is "user", "assistant" or "tool_use".
+
+    text is the raw block text (user/assistant). tool_use entries carry the
+    tool name, the projected input, input_bytes (compact JSON size of the raw
+    input) and elided ({key: bytes} of values left out of input); see
+    project_tool_input. offset is the byte offset of the source line, shared
+    by all blocks of one line. request_id is set for assistant lines.
+    """
+
+    __slots__ = ("kind", "text", "tool", "input", "request_id", "offset", "input_bytes", "elided")
+
+    def __init__(self, kind: str, offset: int, text: str = "", tool: str = "",
+                 input: dict | None = None, request_id: str | None = None,
+                 input_bytes: int = 0, elided: dict | None = None):
+        self.kind = kind
+        self.offset = offset
+        self.text = text
+        self.tool = tool
+        self.input = input
+        self.request_id = request_id
+        self.input_bytes = input_bytes
+        self.elided = elided
+
+    def to_list(self) -> list:
+        return [self.kind, self.offset, self.text, self.tool, self.input, self.request_id,
+                self.input_bytes, self.elided]
+
+    @classmethod
+    def from_list(cls, item: list) -> "Entry":
+        return cls(*item)
+
+
+def _compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def project_tool_input(tool_input) -> tuple[dict | None, int, dict | None]:
+    """Project a raw tool input. Returns (input, input_bytes, elided).
+
+    Small inputs come back whole with elided None. Larger ones keep
+    TOOL_INPUT_FIELDS (cut at TOOL_INPUT_CHARS) and short single-line values;
+    every other value is listed in elided with its byte size.
+    """
+    if not isinstance(tool_input, dict):
+        return None, 0, None
+    input_bytes = len(_compact(tool_input).encode())
+    if input_bytes <= SMALL_TOOL_INPUT:
+        return tool_input, input_bytes, None
+
+    kept, elided = {}, {}
+    for key, value in tool_input.items():
+        text = value if isinstance(value, str) else _compact(value)
+        if key in TOOL_INPUT_FIELDS and isinstance(value, str):
+            kept[key] = value[:TOOL_INPUT_CHARS]
+        elif len(text) <= INLINE_FIELD_CHARS and "\n" not in text:
+            kept[key] = value
+        else:
+            elided[key] = len(text.encode())
+    return kept, input_bytes, elided or None
+
+
+def iter_entries(transcript_path: str, start_offset: int = 0, end_offset: int | None = None) -> Iterator[Entry]:
+    """Decode a transcript byte range once and yield its entries in order.
+
+    Skips progress/snapshot/system lines, tool results, thinking blocks and
+    hook/command injection noise. Most of those are rejected on the raw bytes
+    before decoding.
+    """
+    for offset, line in transcript.iter_lines(transcript_path, start_offset, end_offset):
+        if not transcript.is_message_candidate(line):
+            continue
+        try:
+            raw = transcript.loads(line)
+        except transcript.DECODE_ERRORS:
+            continue
+        if not isinstance(raw, dict):
+            continue
+
+        entry_type = raw.get("type", "")
+        if entry_type in _SKIP_TYPES:
+            continue
+
+        msg = raw.get("message", {})
+        role = msg.get("role", "")
+        content = msg.get("content", "")
+
+        if entry_type == "user" and role == "user":
+            if isinstance(content, str):
+                if content.strip() and not is_system_noise(content):
+                    yield Entry("user", offset, text=content)
+            elif isinstance(content, list):
+                if any(b.get("type") == "tool_result" for b in content):
+                    continue
+                for block in content:
+                    text = block.get("text", "")
+                    if block.get("type") == "text" and text.strip() and not is_system_noise(text):
+                        yield Entry("user", offset, text=text)
+
+        elif entry_type == "assistant" and role == "assistant" and isinstance(content, list):
+            request_id = raw.get("requestId")
+            for block in content:
+                btype = block.get("type", "")
+                if btype == "text" and block.get("text", "").strip():
+                    yield Entry("assistant", offset, text=block["text"], request_id=request_id)
+                elif btype == "tool_use":
+                    tool_input, input_bytes, elided = project_tool_input(block.get("input"))
+                    yield Entry("tool_use", offset, tool=block.get("name", "unknown"), input=tool_input,
+                                request_id=request_id, input_bytes=input_bytes, elided=elided)
+
+
+# =============================================================================
+# PROJECTIONS
+# =============================================================================
+class LearnerProjection:
+    """Entries for the session-learner prompt. Text is kept whole; tool_use
+    entries carry the projected input, input_bytes and elided sizes.
+
+    Result: {"entries": [...], "offsets": [...]}, offsets[i] being the byte
+    offset of the line entries[i] came from (used for learner checkpoints).
+    """
+
+    name = "learner"
+
+    def __init__(self):
+        self.entries = []
+        self.offsets = []
+
+    def feed(self, entry: Entry) -> None:
+        if entry.kind == "tool_use":
+            item = {"type": "tool_use", "tool": entry.tool}
+            if entry.input is not None:
+                item["input"] = entry.input
+                item["input_bytes"] = entry.input_bytes
+            if entry.elided:
+                item["elided"] = entry.elided
+            self.entries.append(item)
+        else:
+            self.entries.append({"type": entry.kind, "text": entry.text})
+        self.offsets.append(entry.offset)
+
+    def result(self) -> dict:
+        return {"entries": self.entries, "offsets": self.offsets}
+
+
+class DialogueProjection:
+    """User and assistant text only. Assistant text blocks of one line are joined;
+    streaming entries sharing a requestId keep only the last version, at the
+    position of the first."""
+
+    name = "dialogue"
+
+    def __init__(self):
+        self.entries = []
+        self.by_request = {}  # requestId -> index in entries
+        self.line_offset = None  # Offset of the assistant line being collected
+        self.current = None
+
+    def feed(self, entry: Entry) -> None:
+        if entry.kind == "user":
+            self.line_offset = None
+            self.entries.append({"role": "user", "text": entry.text.strip()})
+            return
+        if entry.kind != "assistant":
+            return
+
+        text = entry.text.strip()
+        if entry.offset == self.line_offset:
+            # Another text block of the same line
+            self.current["text"] += "\n\n" + text
+            return
+
+        self.line_offset = entry.offset
+        self.current = {"role": "assistant", "text": text}
+        if entry.request_id and entry.request_id in self.by_request:
+            self.entries[self.by_request[entry.request_id]] = self.current
+        else:
+            if entry.request_id:
+                self.by_request[entry.request_id] = len(self.entries)
+            self.entries.append(self.current)
+
+    def result(self) -> list[dict]:
+        return self.entries
+
+
+class ToolUseProjection:
+    """Tool call counts and the files tools touched."""
+
+    name = "tools"
+
+    def __init__(self):
+        self.counts = {}
+        self.files = set()
+
+    def feed(self, entry: Entry) -> None:
+        if entry.kind != "tool_use":
+            return
+        self.counts[entry.tool] = self.counts.get(entry.tool, 0) + 1
+        if entry.input:
+            path = entry.input.get("file_path") or entry.input.get("notebook_path")
+            if isinstance(path, str):
+                self.files.add(path)
+
+    def result(self) -> dict:
+        return {"counts": dict(sorted(self.counts.items(), key=lambda kv: -kv[1])), "files": sorted(self.files)}
+
+
+DEFAULT_PROJECTIONS = (LearnerProjection, DialogueProjection, ToolUseProjection)
+
+
+def project(entries: Iterable[Entry], projections: Iterable) -> dict:
+    """Feed one entry stream to several projections. Returns {name: result}."""
+    projections = list(projections)
+    for entry in entries:
+        for proj in projections:
+            proj.feed(entry)
+    return {proj.name: proj.result() for proj in projections}
+
+
+# =============================================================================
+# SHARED EXTRACTION (decoded entries cached per transcript, extended incrementally)
+# =============================================================================
+def _load_cache(project_dir: Path, key: str) -> dict | None:
+    try:
+        cached = json.loads(state_path(project_dir, TRANSCRIPT_EXTRACT_STATE).read_text())
+    except (IOError, json.JSONDecodeError):
+        return None
+    if isinstance(cached, dict) and cached.get("version") == EXTRACT_VERSION and cached.get("path") == key:
+        return cached
+    return None
+
+
+def _decode(transcript_path: str, start_offset: int, end_offset: int) -> list[list]:
+    return [entry.to_list() for entry in iter_entries(transcript_path, start_offset, end_offset)]
+
+
+def extract_shared(project_dir: Path, transcript_path: str, start_offset: int, end_offset: int) -> dict:
+    """Run every default projection over [start_offset, end_offset).
+
+    Decoded entries are cached with the contiguous byte range they cover
+    (one transcript at a time). A request overlapping or touching that range
+    decodes only the bytes before or after it and widens it; anything else
+    starts a new cache. Offsets must be line boundaries from the transcript
+    index. Returns {"end", "learner", "dialogue", "tools", "reused"}: "end"
+    may exceed end_offset when the cache already covers more, and "reused"
+    is True when nothing had to be decoded.
+    """
+    key = str(Path(transcript_path).resolve())
+    with open(state_path(project_dir, TRANSCRIPT_EXTRACT_LOCK), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        cache = _load_cache(project_dir, key)
+        if (
+            cache is None
+            or cache["end"] < start_offset
+            or cache["start"] > end_offset
+            or cache["end"] > Path(transcript_path).stat().st_size  # Replaced by a shorter file
+        ):
+            cache = {"version": EXTRACT_VERSION, "path": key, "start": start_offset, "end": start_offset,
+                     "entries": []}
+
+        decoded = False
+        if start_offset < cache["start"]:
+            cache["entries"] = _decode(transcript_path, start_offset, cache["start"]) + cache["entries"]
+            cache["start"] = start_offset
+            decoded = True
+        if end_offset > cache["end"]:
+            cache["entries"] += _decode(transcript_path, cache["end"], end_offset)
+            cache["end"] = end_offset
+            decoded = True
+        if decoded:
+            write_atomic(state_path(project_dir, TRANSCRIPT_EXTRACT_STATE), cache)
+
+    entries = (Entry.from_list(item) for item in cache["entries"] if item[1] >= start_offset)
+    results = project(entries, [cls() for cls in DEFAULT_PROJECTIONS])
+    return {"end": cache["end"], **results, "reused": not decoded}
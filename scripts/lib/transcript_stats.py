@@ -0,0 +1,183 @@
+"""
+transcript_stats — composition analysis of a transcript range.
+
+Streams a transcript once and measures where its bytes go: per line type,
+per content block kind (text, thinking, tool_use, tool_result), per tool
+(inputs and results attributed by tool_use_id), how often assistant lines
+repeat a requestId, and how much `is_system_noise` filtering removes from
+user text. Used to tune extraction and prompt budgets.
+
+With `transcript_stats: true` in .meridian/config.yaml, the session learner
+writes the stats for each range it runs on to `transcript-stats.json` in the
+state dir; `.meridian/scripts/transcript-stats.py` summarizes them. It is off
+by default because the analysis decodes every line of the range.
+"""
+
+import json
+import time
+from pathlib import Path
+
+from meridian_config import is_system_noise, state_path, write_atomic
+import transcript
+
+TRANSCRIPT_STATS_STATE = "transcript-stats.json"
+BYTES_PER_TOKEN = 4  # Rough estimate for English text and JSON
+
+
+def _tokens(n_bytes: int) -> int:
+    return n_bytes // BYTES_PER_TOKEN
+
+
+def _size(value) -> int:
+    """UTF-8 byte size of a string, or of the compact JSON of anything else."""
+    if isinstance(value, str):
+        return len(value.encode())
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode())
+
+
+def _result_size(content) -> int:
+    """Byte size of a tool_result's content (string or list of text blocks)."""
+    if isinstance(content, list):
+        return sum(_size(b.get("text", "")) for b in content if isinstance(b, dict) and b.get("type") == "text")
+    return _size(content) if content else 0
+
+
+def _bump(table: dict, key: str, n_bytes: int) -> None:
+    row = table.setdefault(key, {"count": 0, "bytes": 0})
+    row["count"] += 1
+    row["bytes"] += n_bytes
+
+
+def analyze(transcript_path: str, start_offset: int = 0, end_offset: int | None = None) -> dict:
+    """Measure the composition of a transcript byte range.
+
+    Returns a JSON-serializable dict:
+        total:    {"lines", "bytes", "est_tokens"}
+        types:    line type -> {"count", "bytes"} (whole raw lines)
+        blocks:   content block kind -> {"count", "bytes"} (payload only)
+        tools:    tool name -> {"calls", "input_bytes", "result_bytes"}
+        requests: {"assistant_lines", "request_ids", "lines_per_request", "repeat_bytes"}
+        noise:    {"user_texts", "noise_texts", "noise_bytes", "kept_bytes"}
+    """
+    types: dict[str, dict] = {}
+    blocks: dict[str, dict] = {}
+    tools: dict[str, dict] = {}
+    tool_names: dict[str, str] = {}  # tool_use_id -> tool name
+    request_ids: set[str] = set()
+    assistant_lines = 0
+    repeat_bytes = 0
+    noise = {"user_texts": 0, "noise_texts": 0, "noise_bytes": 0, "kept_bytes": 0}
+    total_lines = 0
+    total_bytes = 0
+
+    def count_user_text(text: str) -> None:
+        n = _size(text)
+        noise["user_texts"] += 1
+        if is_system_noise(text):
+            noise["noise_texts"] += 1
+            noise["noise_bytes"] += n
+        else:
+            noise["kept_bytes"] += n
+
+    for _offset, line in transcript.iter_lines(transcript_path, start_offset, end_offset):
+        total_lines += 1
+        total_bytes += len(line)
+        try:
+            raw = transcript.loads(line)
+        except transcript.DECODE_ERRORS:
+            _bump(types, "(undecodable)", len(line))
+            continue
+        if not isinstance(raw, dict):
+            continue
+
+        entry_type = raw.get("type", "") or "(none)"
+        _bump(types, entry_type, len(line))
+
+        if entry_type == "assistant":
+            assistant_lines += 1
+            request_id = raw.get("requestId")
+            if request_id:
+                if request_id in request_ids:
+                    repeat_bytes += len(line)
+                request_ids.add(request_id)
+
+        msg = raw.get("message")
+        content = msg.get("content") if isinstance(msg, dict) else None
+        if isinstance(content, str):
+            _bump(blocks, "text", _size(content))
+            if entry_type == "user":
+                count_user_text(content)
+            continue
+        if not isinstance(content, list):
+            continue
+
+        for block in content:
+            if not isinstance(block, dict):
+                continue
+            kind = block.get("type", "")
+            if kind == "text":
+                text = block.get("text", "")
+                _bump(blocks, "text", _size(text))
+                if entry_type == "user":
+                    count_user_text(text)
+            elif kind == "thinking":
+                _bump(blocks, "thinking", _size(block.get("thinking", "")))
+            elif kind == "tool_use":
+                name = block.get("name", "unknown")
+                n = _size(block.get("input", {}))
+                _bump(blocks, "tool_use", n)
+                tool_names[block.get("id", "")] = name
+                row = tools.setdefault(name, {"calls": 0, "input_bytes": 0, "result_bytes": 0})
+                row["calls"] += 1
+                row["input_bytes"] += n
+            elif kind == "tool_result":
+                n = _result_size(block.get("content"))
+                _bump(blocks, "tool_result", n)
+                name = tool_names.get(block.get("tool_use_id", ""), "unknown")
+                row = tools.setdefault(name, {"calls": 0, "input_bytes": 0, "result_bytes": 0})
+                row["result_bytes"] += n
+            else:
+                _bump(blocks, kind or "(none)", _size(block))
+
+    for table in (types, blocks):
+        for row in table.values():
+            row["est_tokens"] = _tokens(row["bytes"])
+
+    return {
+        "total": {"lines": total_lines, "bytes": total_bytes, "est_tokens": _tokens(total_bytes)},
+        "types": dict(sorted(types.items(), key=lambda kv: -kv[1]["bytes"])),
+        "blocks": dict(sorted(blocks.items(), key=lambda kv: -kv[1]["bytes"])),
+        "tools": dict(sorted(tools.items(), key=lambda kv: -(kv[1]["input_bytes"] + kv[1]["result_bytes"]))),
+        "requests": {
+            "assistant_lines": assistant_lines,
+            "request_ids": len(request_ids),
+            "lines_per_request": round(assistant_lines / len(request_ids), 2) if request_ids else 0,
+            "repeat_bytes": repeat_bytes,
+        },
+        "noise": noise,
+    }
+
+
+def summary(stats: dict) -> dict:
+    """A few headline numbers from analyze() for the learner run log."""
+    blocks = stats["blocks"]
+    return {
+        "bytes": stats["total"]["bytes"],
+        "est_tokens": stats["total"]["est_tokens"],
+        "thinking_bytes": blocks.get("thinking", {}).get("bytes", 0),
+        "tool_result_bytes": blocks.get("tool_result", {}).get("bytes", 0),
+        "text_bytes": blocks.get("text", {}).get("bytes", 0),
+        "noise_bytes": stats["noise"]["noise_bytes"],
+        "lines_per_request": stats["requests"]["lines_per_request"],
+    }
+
+
+def write_stats(project_dir: Path, transcript_path: str, start_offset: int, end_offset: int, stats: dict) -> None:
+    """Store the latest stats in the state dir for the transcript-stats CLI."""
+    write_atomic(state_path(project_dir, TRANSCRIPT_STATS_STATE), {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "transcript": str(Path(transcript_path).resolve()),
+        "start": start_offset,
+        "end": end_offset,
+        **stats,
+    })
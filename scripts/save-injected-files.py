@@ -15,17 +15,17 @@ from datetime import datetime
 # Add lib to path for imports
 sys.path.insert(0, str(Path(__file__).parent / "lib"))
 from meridian_config import (
+    get_docs_index,
     get_project_config,
-    get_extra_doc_dirs,
     is_headless,
-    scan_docs_directory,
     state_path,
+    DOCS_INDEX_FILE,
     WORKSPACE_FILE,
     INJECTED_FILES_LOG,
 )
 
 
-def get_injected_file_paths(base_dir: Path, project_config: dict) -> list[str]:
+def get_injected_file_paths(base_dir: Path, project_config: dict, session_key: str = "") -> list[str]:
     """Get list of all files that will be injected into context (absolute paths)."""
     files = []
 
@@ -41,28 +41,11 @@ def get_injected_file_paths(base_dir: Path, project_config: dict) -> list[str]:
 
     # Note: agent-operating-manual.md is excluded - not needed for reviewer agents
 
-    # Docs index — scan .meridian/docs/ and .meridian/api-docs/ for frontmatter'd files
-    # Write to a state file so subagents can discover available docs
-    doc_scan_dirs = [".meridian/docs", ".meridian/api-docs"]
-    for path, _header in get_extra_doc_dirs(project_config):
-        doc_scan_dirs.append(path)
-
-    docs_index_parts = []
-    for dir_rel in doc_scan_dirs:
-        listing = scan_docs_directory(base_dir / dir_rel, base_dir)
-        if listing:
-            docs_index_parts.append(f"## {dir_rel}")
-            docs_index_parts.append(listing)
-            docs_index_parts.append("")
-
-    if docs_index_parts:
-        docs_index_file = state_path(base_dir, "docs-index")
-        try:
-            docs_index_file.parent.mkdir(parents=True, exist_ok=True)
-            docs_index_file.write_text("\n".join(docs_index_parts))
-            files.append(str(docs_index_file))
-        except IOError:
-            pass
+    # Docs index — shared with context-injector, which runs in parallel. Only
+    # one of the two scans; the state file lets subagents discover available docs.
+    docs_index = get_docs_index(base_dir, project_config, session_key)
+    if any(entries for _dir_rel, entries in docs_index["dirs"]):
+        files.append(str(state_path(base_dir, DOCS_INDEX_FILE)))
 
     return files
 
@@ -89,7 +72,8 @@ def main():
 
     # Get config and list of injected files
     project_config = get_project_config(base_dir)
-    injected_files = get_injected_file_paths(base_dir, project_config)
+    session_key = f"{input_data.get('session_id', '')}:{source}"
+    injected_files = get_injected_file_paths(base_dir, project_config, session_key)
     pebble_enabled = project_config.get('pebble_enabled', False)
 
     # Write to log file
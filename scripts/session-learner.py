@@ -8,21 +8,40 @@ Extracts session transcript and spawns a headless Claude session to:
 3. Maintain docs — create/update long-term reference docs
 
 Fires on SessionEnd (session over) and PreCompact (checkpoint before context compaction).
-The lock prevents concurrent runs — if PreCompact is still running when SessionEnd fires, the
-SessionEnd run will skip (lock held). This is acceptable since PreCompact already captured the work.
+The hook only spools a job (transcript path, end offset, trigger, config snapshot) and makes sure
+a detached worker (`session-learner.py --worker --project DIR`) is running, so it returns in
+milliseconds. The worker drains the spool one job at a time and retries transient failures.
+Triggers that arrive while a run is active wait in the spool and are folded into a single
+follow-up pass, so a burst of N triggers costs at most two runs.
+
+Each successful run records a per-transcript checkpoint (last processed offset + workspace hash).
+The next run over the same transcript feeds only entries past the checkpoint, with a few earlier
+entries as read-only context, so nothing is lost and nothing is sent twice.
 """
 
+import argparse
+import fcntl
+import hashlib
 import json
 import os
 import sys
 import subprocess
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent / "lib"))
-from meridian_config import WORKSPACE_FILE, scan_project_frontmatter, get_project_config, state_path, is_system_noise, is_headless
+from meridian_config import WORKSPACE_FILE, MAX_DOC_DEPTH, append_jsonl, get_doc_scan_dirs, scan_project_frontmatter, scan_project_frontmatter_entries, format_doc_entry, get_project_config, get_host_config, state_path, is_headless, pidfile_owner
+from doc_search import bm25_rank, tokenize
 import claude_runner
+import transcript
+import transcript_extract
+import transcript_stats
+import learner_spool
+import learner_novelty
+import learner_changes
 
 if is_headless():
     sys.exit(0)
@@ -30,95 +49,69 @@ if is_headless():
 WORKSPACE_SYNC_LOCK = "workspace-sync.lock"
 SESSION_LEARNER_LOG = "session-learner.jsonl"
 SESSION_LEARNER_DEBUG_LOG = "session-learner.log"
-MAX_LOG_ENTRIES = 50
+LOG_ROTATE_BYTES = 1024 * 1024  # Run history rotates to session-learner.jsonl.1 at this size
+LOG_ROTATED_FILES = 3
 MIN_ENTRIES_THRESHOLD = 5  # Skip if fewer than this many meaningful entries
+CHECKPOINT_CURSOR = "learner"
+OVERLAP_ENTRIES = 6  # Already-processed user/assistant entries shown as context
+AGENT_TIMEOUT = 180  # Total seconds for the apply pass
+MAP_PASS_TIMEOUT = 180
+MAP_PASS_RETRIES = 1  # In-job reruns of failed map chunks before the whole job is retried
+IDLE_TIMEOUT = 90  # Kill a headless run that emits no stream-json output for this long
 
 
-def find_compact_boundaries(transcript_path: str) -> list[int]:
-    """Find line numbers of all compact_boundary entries in the transcript."""
-    boundaries = []
-    with open(transcript_path) as f:
-        for i, line in enumerate(f):
-            try:
-                entry = json.loads(line)
-                if entry.get("type") == "system" and entry.get("subtype") == "compact_boundary":
-                    boundaries.append(i)
-            except (json.JSONDecodeError, KeyError):
-                continue
-    return boundaries
-
-
-def count_lines(path: str) -> int:
-    with open(path) as f:
-        return sum(1 for _ in f)
-
-
-def get_extraction_range(transcript_path: str) -> tuple[int, int]:
-    """Determine start/end lines for extraction (everything since last compact boundary)."""
-    boundaries = find_compact_boundaries(transcript_path)
-    total = count_lines(transcript_path)
-
-    if boundaries:
-        return boundaries[-1], total
-    return 0, total
-
-
-def extract_transcript(transcript_path: str, start_line: int, end_line: int) -> list[dict]:
-    """Extract meaningful entries from transcript range. No truncation — full content preserved."""
-    entries = []
-    with open(transcript_path) as f:
-        for i, line in enumerate(f):
-            if i < start_line:
-                continue
-            if i >= end_line:
-                break
-
-            try:
-                raw = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-
-            entry_type = raw.get("type", "")
-
-            # Skip non-message types
-            if entry_type in ("progress", "file-history-snapshot", "system"):
-                continue
-
-            msg = raw.get("message", {})
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-
-            # User text message
-            if entry_type == "user" and role == "user" and isinstance(content, str) and content.strip():
-                if is_system_noise(content):
-                    continue
-                entries.append({"type": "user", "text": content})
-
-            # User text from content blocks (non-tool-result)
-            elif entry_type == "user" and role == "user" and isinstance(content, list):
-                # Skip tool_result blocks
-                if any(b.get("type") == "tool_result" for b in content):
-                    continue
-                for block in content:
-                    if block.get("type") == "text" and block.get("text", "").strip():
-                        text = block["text"]
-                        if is_system_noise(text):
-                            continue
-                        entries.append({"type": "user", "text": text})
-
-            # Assistant messages (skip thinking blocks)
-            elif entry_type == "assistant" and role == "assistant" and isinstance(content, list):
-                for block in content:
-                    btype = block.get("type", "")
-                    if btype == "text" and block.get("text", "").strip():
-                        entries.append({"type": "assistant", "text": block["text"]})
-                    elif btype == "tool_use":
-                        tool_entry = {"type": "tool_use", "tool": block.get("name", "unknown")}
-                        if isinstance(block.get("input"), dict):
-                            tool_entry["input"] = block["input"]
-                        entries.append(tool_entry)
-
-    return entries
+def workspace_hash(project_dir: Path) -> str:
+    return hashlib.sha1(load_workspace(project_dir).encode()).hexdigest()[:16]
+
+
+def get_extraction_range(project_dir: Path, transcript_path: str,
+                         end_offset: int | None = None) -> tuple[int, int, int, dict | None]:
+    """Determine the byte range to extract.
+
+    Normally everything since the last compact boundary. With a valid
+    checkpoint at or before the boundary, the range reaches back to the
+    checkpoint's overlap offset, so nothing between runs is skipped. A checkpoint is ignored when the
+    workspace changed since it was written (its learnings may be gone).
+
+    end_offset caps the range (a job covers the transcript as it was when
+    the hook fired). A checkpoint at or past end_offset is kept: an earlier
+    run already covered the whole range (its extraction may reach past a
+    job's end). Returns (start_offset, end_offset, start_line, checkpoint).
+    """
+    record = transcript.update_transcript_index(project_dir, transcript_path)
+    start_offset, start_line = transcript.last_compact_boundary(record)
+    end_offset = record["size"] if end_offset is None else min(end_offset, record["size"])
+
+    checkpoint = record.get("cursors", {}).get(CHECKPOINT_CURSOR)
+    if checkpoint:
+        if checkpoint.get("workspace") != workspace_hash(project_dir):
+            log(project_dir, "checkpoint ignored: workspace changed since last run")
+            checkpoint = None
+        elif checkpoint["offset"] <= start_offset:
+            start_offset = min(checkpoint.get("overlap", checkpoint["offset"]), checkpoint["offset"])
+            start_line = None
+
+    return start_offset, end_offset, start_line, checkpoint
+
+
+def split_at_checkpoint(learner: dict, checkpoint: dict | None) -> tuple[list[dict], list[dict], int | None]:
+    """Split extracted learner entries into (overlap context, new entries, next overlap offset).
+
+    Entries from lines before the checkpoint were sent in an earlier run;
+    only the last OVERLAP_ENTRIES user/assistant ones are kept, as context.
+    The returned overlap offset is where the next run's context should start.
+    """
+    entries, offsets = learner["entries"], learner["offsets"]
+    cut = 0
+    if checkpoint:
+        cut = next((i for i, off in enumerate(offsets) if off >= checkpoint["offset"]), len(entries))
+
+    context = [e for e in entries[:cut] if e["type"] in ("user", "assistant")][-OVERLAP_ENTRIES:]
+
+    meaningful_offsets = [off for e, off in zip(entries, offsets) if e["type"] in ("user", "assistant")]
+    next_overlap = meaningful_offsets[-OVERLAP_ENTRIES] if len(meaningful_offsets) >= OVERLAP_ENTRIES else (
+        meaningful_offsets[0] if meaningful_offsets else None)
+    return context, entries[cut:], next_overlap
 
 
 def load_workspace(project_dir: Path) -> str:
@@ -208,32 +201,161 @@ def gather_git_context(project_dir: Path) -> str:
     return "\n".join(parts)
 
 
-def load_claudemd_files(project_dir: Path) -> tuple[str, str]:
-    """Load global and project CLAUDE.md files."""
-    global_path = Path.home() / ".claude" / "CLAUDE.md"
+def load_project_claudemd(project_dir: Path) -> str:
+    """Load the project CLAUDE.md. The global one reaches the agent through
+    setting_sources="user", so it is not embedded in the prompt."""
     project_path = project_dir / "CLAUDE.md"
-
-    global_content = ""
-    if global_path.exists():
-        try:
-            global_content = global_path.read_text()
-        except IOError:
-            pass
-
-    project_content = ""
     if project_path.exists():
         try:
-            project_content = project_path.read_text()
+            return project_path.read_text()
         except IOError:
             pass
+    return ""
+
+
+# =============================================================================
+# DOC CANDIDATES
+# =============================================================================
+MAX_DIALOGUE_QUERY_BYTES = 65536  # Only the newest dialogue feeds the doc matching query
+MIN_RELATIVE_SCORE = 0.25  # Matches below this share of the best score are incidental (shared words, path prefixes)
+
+
+def session_query_terms(entries: list[dict], files: list[str], project_dir: Path) -> list[str]:
+    """Terms describing what the session worked on: the files its tools
+    touched (relative to the project) plus the newest user/assistant text."""
+    parts = [os.path.relpath(f, project_dir) for f in files]
+    remaining = MAX_DIALOGUE_QUERY_BYTES
+    for entry in reversed(entries):
+        if entry["type"] not in ("user", "assistant"):
+            continue
+        text = entry.get("text", "")[:remaining]
+        parts.append(text)
+        remaining -= len(text)
+        if remaining <= 0:
+            break
+    return tokenize("\n".join(parts))
+
+
+def select_doc_candidates(docs: list[dict], files: list[str], query_terms: list[str], limit: int,
+                          project_dir: Path) -> set[str]:
+    """Paths of the docs worth showing in full for this session.
+
+    Docs a tool read or edited always qualify; up to `limit` more are the
+    best BM25 matches of their relative path, summary and read_when hints
+    against the session's terms, ignoring matches far below the best one.
+    """
+    touched = {os.path.normpath(f) for f in files}
+    selected = {doc["path"] for doc in docs if os.path.normpath(doc["path"]) in touched}
+    others = [dict(doc, path=os.path.relpath(doc["path"], project_dir)) for doc in docs if doc["path"] not in selected]
+    ranked = bm25_rank(others, query_terms)[:limit]
+    if ranked:
+        floor = ranked[0][0] * MIN_RELATIVE_SCORE
+        selected.update(str(project_dir / others[i]["path"]) for score, i in ranked if score >= floor)
+    return selected
+
+
+def format_doc_candidates(docs: list[dict], selected: set[str], project_dir: Path) -> str:
+    """Full entries for the selected docs, then the rest as a compact path list grouped by directory."""
+    detailed = [format_doc_entry(doc) for doc in docs if doc["path"] in selected]
+    by_dir: dict[str, list[str]] = {}
+    for doc in docs:
+        if doc["path"] not in selected:
+            rel = Path(os.path.relpath(doc["path"], project_dir))
+            by_dir.setdefault(str(rel.parent), []).append(rel.name)
+    if not by_dir:
+        return "\n".join(detailed)
+
+    parts = ["\n".join(detailed) if detailed else "No docs matched this session."]
+    parts.append(f"\nOther docs, by path only (relative to {project_dir}; read a doc's frontmatter before deciding it doesn't apply):")
+    parts.extend(f"- {directory}/: {', '.join(names)}" for directory, names in by_dir.items())
+    return "\n".join(parts)
+
+
+# =============================================================================
+# TRANSCRIPT ENCODING
+# =============================================================================
+# Extraction already reduced tool inputs (transcript_extract.project_tool_input):
+# small inputs are whole, larger ones keep short fields plus sizes of the rest
+BASH_COMMAND_CHARS = 200
+
+TRANSCRIPT_FORMAT_NOTE = (
+    "Format: one entry per block. `[user]` / `[assistant]` start a message (text follows verbatim, "
+    "possibly over several lines). `[tool] Name ...` is a tool call: small inputs as JSON, larger ones "
+    "as key=value with bulky values (file bodies, edit strings) replaced by their size, Bash as `$ command`."
+)
+
 
-    return global_content, project_content
+def _human_size(n_bytes: int) -> str:
+    if n_bytes >= 1024:
+        return f"{n_bytes / 1024:.1f}KB"
+    return f"{n_bytes}B"
 
 
-def build_prompt(entries: list[dict], workspace_root: str, git_context: str, project_dir: Path, mode: str = "project") -> str:
-    """Build the prompt for the workspace maintenance agent."""
+def _clip(text: str, limit: int) -> str:
+    """Flatten to one line and cut at limit characters."""
+    flat = "; ".join(line.strip() for line in text.strip().splitlines() if line.strip())
+    if len(flat) <= limit:
+        return flat
+    return f"{flat[:limit]}… (+{len(flat) - limit} chars)"
+
+
+def encode_tool_use(tool: str, tool_input: dict | None, elided: dict | None = None) -> str:
+    """One line for a tool call: name, paths and small values, sizes for bulky payloads.
+
+    elided maps the keys extraction left out of tool_input to their byte size.
+    """
+    if not tool_input and not elided:
+        return f"[tool] {tool}"
+    tool_input = tool_input or {}
+    if tool == "Bash" and isinstance(tool_input.get("command"), str):
+        return f"[tool] Bash $ {_clip(tool_input['command'], BASH_COMMAND_CHARS)}"
+    if not elided:
+        compact = json.dumps(tool_input, separators=(",", ":"), ensure_ascii=False)
+        if len(compact.encode()) <= transcript_extract.SMALL_TOOL_INPUT:
+            return f"[tool] {tool} {compact}"
+    fields = []
+    for key, value in tool_input.items():
+        text = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+        fields.append(f"{key}={_clip(text, transcript_extract.INLINE_FIELD_CHARS)}")
+    fields.extend(f"{key}=<{_human_size(size)}>" for key, size in (elided or {}).items())
+    return f"[tool] {tool} " + " ".join(fields)
+
+
+def encode_entries(entries: list[dict]) -> str:
+    """Serialize transcript entries into the terse line-oriented prompt format."""
+    lines = []
+    for entry in entries:
+        if entry["type"] == "tool_use":
+            lines.append(encode_tool_use(entry.get("tool", "unknown"), entry.get("input"), entry.get("elided")))
+        else:
+            lines.append(f"[{entry['type']}] {entry.get('text', '').strip()}")
+    return "\n".join(lines)
+
+
+def json_encoded_size(entries: list[dict]) -> int:
+    """Bytes the entries would take in the previous indented-JSON encoding of raw inputs (for savings logs).
+
+    Tool inputs count at their raw compact-JSON size (input_bytes), which
+    slightly understates the indented form.
+    """
+    stripped, input_bytes = [], 0
+    for entry in entries:
+        if entry["type"] == "tool_use":
+            stripped.append({"type": "tool_use", "tool": entry.get("tool")})
+            input_bytes += entry.get("input_bytes", 0)
+        else:
+            stripped.append(entry)
+    return len(json.dumps(stripped, indent=2, ensure_ascii=False).encode()) + input_bytes
+
+
+def build_system_prompt(project_dir: Path, mode: str = "project") -> str:
+    """Static instructions for the workspace maintenance agent.
+
+    Depends only on the project paths and the learner mode, so it is
+    byte-identical across runs and stays a cacheable prefix. Everything
+    that changes per run goes in the message built by build_prompt.
+    """
     assistant_mode = mode == "assistant"
-    global_claudemd, project_claudemd = load_claudemd_files(project_dir)
     global_claudemd_path = str(Path.home() / ".claude" / "CLAUDE.md")
     project_claudemd_path = str(project_dir / "CLAUDE.md")
 
@@ -255,12 +377,7 @@ def build_prompt(entries: list[dict], workspace_root: str, git_context: str, pro
         docs_update = "**Update** any existing frontmatter'd doc when this session changed what it describes. Read the existing doc first, then rewrite with current accurate content. This includes files outside `.meridian/docs/` like IDENTITY.md or SOUL.md."
         docs_delete = f"**Delete** only `.meridian/docs/` files — never delete docs outside that directory. To mark for deletion, append the relative path to `{delete_list_path}` (e.g. `.meridian/docs/old-auth.md`), one path per line. Python will handle the actual file deletion after you finish."
 
-    # Scan project for frontmatter'd docs
-    doc_index = scan_project_frontmatter(project_dir)
-
-    transcript_json = json.dumps(entries, indent=2, ensure_ascii=False)
-
-    prompt = f"""<role>
+    return f"""<role>
 You are a session maintenance agent. You have three jobs:
 1. Update the workspace — maintain WORKSPACE.md as a slim current-state notepad
 2. Learn from corrections — when the user corrects the agent, save it as a permanent instruction
@@ -268,17 +385,15 @@ You are a session maintenance agent. You have three jobs:
 
 Do all three jobs. If nothing worth preserving for a job, skip it.
 Use the Write tool (or Read then Edit) to update files.
+
+The user message holds this run's inputs, always in this order: <existing-docs>, <current-claudemd>, <current-workspace>, <git-activity>, optionally <transcript-already-processed>, then <transcript> (or <session-findings> for sessions too long for one pass).
 </role>
 
 <job id="workspace">
 <instructions>
-WORKSPACE.md is a slim current-state notepad — what's actively being worked on, key recent decisions, and what to do next. It is NOT an encyclopedia of architecture, tech stack summaries, hook behavior, or implementation details. Those belong in docs.
+WORKSPACE.md is a slim current-state notepad — what's actively being worked on, key recent decisions, and what to do next. It is NOT an encyclopedia of architecture, tech stack summaries, hook behavior, or implementation details. Those belong in docs. Its current content is in <current-workspace>.
 </instructions>
 
-<current-workspace>
-{workspace_root if workspace_root.strip() else "(empty — create it)"}
-</current-workspace>
-
 <structure>
 Each project gets a section with these subsections (use only what's needed):
 
@@ -306,17 +421,9 @@ One-line description.
 <job id="corrections">
 <instructions>
 Scan the transcript for moments where the user corrects the agent's behavior, expresses a preference, or teaches something that should apply going forward. Save these as permanent instructions in the appropriate CLAUDE.md file.
-</instructions>
-
-<current-claudemd>
-<file path="{global_claudemd_path}">
-{global_claudemd if global_claudemd.strip() else "(empty)"}
-</file>
 
-<file path="{project_claudemd_path}">
-{project_claudemd if project_claudemd.strip() else "(empty)"}
-</file>
-</current-claudemd>
+The global file (`{global_claudemd_path}`) is already loaded in your context from user settings, so it is not repeated in the message; Read it before editing. The project file's current content is in <current-claudemd>.
+</instructions>
 
 <rules>
 - Write as the user giving instructions to an agent. Direct, imperative voice.
@@ -331,16 +438,12 @@ Scan the transcript for moments where the user corrects the agent's behavior, ex
 
 <job id="docs">
 <instructions>
-Docs are the project's long-term memory — reference material that stays useful for weeks or months. Any `.md` file with `summary` and `read_when` frontmatter is in scope.
+Docs are the project's long-term memory — reference material that stays useful for weeks or months. Any `.md` file with `summary` and `read_when` frontmatter is in scope; the current ones are listed in <existing-docs> — those related to this session with their summary and read_when hints, the rest by path only.
 
 What belongs: architecture decisions, integration guides, debugging discoveries, patterns, gotchas, guides for future agents.
 What does NOT belong: current status (WORKSPACE.md), in-progress tracking, session-specific notes, things irrelevant in 2 weeks.
 </instructions>
 
-<existing-docs>
-{doc_index if doc_index else "No frontmatter'd docs found in the project."}
-</existing-docs>
-
 <rules>
 - {docs_create}
 - {docs_update}
@@ -355,42 +458,226 @@ What does NOT belong: current status (WORKSPACE.md), in-progress tracking, sessi
 </rules>
 </job>
 
+<transcript-format>
+{TRANSCRIPT_FORMAT_NOTE}
+</transcript-format>"""
+
+
+def build_prompt(entries: list[dict], workspace_root: str, git_context: str, project_dir: Path,
+                 context_entries: list[dict] | None = None, findings: list[dict] | None = None,
+                 doc_index: str | None = None) -> str:
+    """Build the per-run message for the workspace maintenance agent.
+
+    Sections go from least to most volatile in a fixed order (docs, project
+    CLAUDE.md, workspace, git, transcript), after the static instructions in
+    build_system_prompt. context_entries are the tail of what an earlier run
+    already processed; they are shown for continuity only. With findings
+    (map-reduce mode), the per-chunk summaries replace the transcript.
+    doc_index is the <existing-docs> body (see format_doc_candidates);
+    without it every doc is listed in full.
+    """
+    project_claudemd = load_project_claudemd(project_dir)
+    project_claudemd_path = str(project_dir / "CLAUDE.md")
+    if doc_index is None:
+        doc_index = scan_project_frontmatter(project_dir)
+
+    overlap_section = ""
+    if context_entries:
+        overlap_section = f"""
+
+<context id="transcript-already-processed">
+The end of the conversation a previous run already learned from. Use it only to understand the transcript below — don't re-apply anything from it.
+{encode_entries(context_entries)}
+</context>"""
+
+    if findings is not None:
+        transcript_section = f"""<context id="session-findings">
+This session was too long for one pass. Summarizer passes read it in {len(findings)} consecutive chunks and extracted the findings below, oldest chunk first. Where chunks conflict, later ones win. Treat them as you would the transcript itself.
+{json.dumps(findings, indent=2, ensure_ascii=False)}
+</context>"""
+    else:
+        transcript_section = f"""<context id="transcript">
+{encode_entries(entries)}
+</context>"""
+
+    return f"""<existing-docs>
+{doc_index if doc_index else "No frontmatter'd docs found in the project."}
+</existing-docs>
+
+<current-claudemd>
+<file path="{project_claudemd_path}">
+{project_claudemd if project_claudemd.strip() else "(empty)"}
+</file>
+</current-claudemd>
+
+<current-workspace>
+{workspace_root if workspace_root.strip() else "(empty — create it)"}
+</current-workspace>
+
 <context id="git-activity">
 {git_context if git_context else "(no git activity available)"}
-</context>
+</context>{overlap_section}
+
+{transcript_section}"""
+
+
+# =============================================================================
+# MAP-REDUCE (oversized transcripts)
+# =============================================================================
+BYTES_PER_TOKEN = 4
+FINDING_KEYS = ("work_state", "corrections", "knowledge")
+
+
+def estimate_tokens(entries: list[dict]) -> int:
+    return len(encode_entries(entries).encode()) // BYTES_PER_TOKEN
+
+
+def chunk_entries(entries: list[dict], max_tokens: int) -> list[list[dict]]:
+    """Split entries into consecutive windows of at most max_tokens (estimated).
+
+    An entry larger than the budget gets a window of its own rather than
+    being cut.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    for entry in entries:
+        tokens = estimate_tokens([entry])
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(entry)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+MAP_SYSTEM_PROMPT = f"""<role>
+You are summarizing one part of a long Claude Code session transcript. A later pass merges the findings from every part and updates the workspace notepad, CLAUDE.md instructions and docs. You do not edit files.
+</role>
+
+<instructions>
+The message gives the part number, the current workspace notepad for reference, and the transcript part. Extract from this part only:
+- work_state: what is being worked on, decisions made, what is done, blockers, next steps — short phrases
+- corrections: moments where the user corrected the agent or stated a lasting preference — quote or closely paraphrase the user
+- knowledge: long-term, doc-worthy knowledge (architecture, gotchas, debugging discoveries, integration details) with enough detail to write a doc from
+
+Reply with a single JSON object and nothing else:
+{{"work_state": ["..."], "corrections": ["..."], "knowledge": ["..."]}}
+Use empty lists when a part has nothing for a key.
+</instructions>
+
+<transcript-format>
+{TRANSCRIPT_FORMAT_NOTE}
+</transcript-format>"""
+
 
-<context id="transcript">
-{transcript_json}
+def build_map_prompt(chunk: list[dict], index: int, total: int, workspace_root: str) -> str:
+    """Message for one summarizer pass over a transcript chunk (instructions are in MAP_SYSTEM_PROMPT)."""
+    return f"""<current-workspace>
+{workspace_root if workspace_root.strip() else "(empty)"}
+</current-workspace>
+
+<context id="transcript-part" part="{index + 1}" of="{total}">
+{encode_entries(chunk)}
 </context>"""
 
-    return prompt
 
+def parse_findings(text: str) -> dict | None:
+    """Pull the findings object out of a summarizer reply."""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return {key: [str(item) for item in data.get(key, []) if item] for key in FINDING_KEYS}
+
+
+def run_map_pass(prompt: str, project_dir: Path) -> tuple[dict | None, dict]:
+    """Run one read-only summarizer pass. Returns (findings or None, raw runner result)."""
+    host = get_host_config()
+    args = claude_runner.build_args(allowed_tools=None, skip_permissions=False, system_prompt=MAP_SYSTEM_PROMPT)
+    result = claude_runner.run_streaming(prompt, args=args, env=claude_runner.build_env(), cwd=str(project_dir),
+                                         timeout=MAP_PASS_TIMEOUT, idle_timeout=IDLE_TIMEOUT,
+                                         max_concurrent=host['max_headless_runs'],
+                                         queue_timeout=host['headless_queue_timeout'])
+    if not result["success"]:
+        return None, result
+    return parse_findings(result["result_text"]), result
+
+
+def map_findings(entries: list[dict], project_dir: Path, workspace_root: str, chunk_tokens: int,
+                 concurrency: int) -> tuple[list[dict], int, int]:
+    """Summarize entries chunk by chunk in parallel.
 
-def acquire_lock(project_dir: Path) -> bool:
-    """Try to acquire the workspace sync lock. Returns True if acquired."""
-    lock_path = state_path(project_dir, WORKSPACE_SYNC_LOCK)
-    lock_path.parent.mkdir(parents=True, exist_ok=True)
-    if lock_path.exists():
-        # Check if lock is stale (older than 5 minutes)
+    Chunks that fail are run again up to MAP_PASS_RETRIES times. Returns
+    (findings in chunk order, chunk count, chunks still failed). Each
+    finding is {"part": n, "work_state", "corrections", "knowledge"}.
+    """
+    chunks = chunk_entries(entries, chunk_tokens)
+    prompts = [build_map_prompt(chunk, i, len(chunks), workspace_root) for i, chunk in enumerate(chunks)]
+    log(project_dir, f"map-reduce chunks={len(chunks)} chunk_tokens={chunk_tokens} concurrency={concurrency}")
+
+    found_by_part: dict[int, dict] = {}
+    pending = list(range(len(chunks)))
+    for attempt in range(1 + MAP_PASS_RETRIES):
+        if not pending:
+            break
+        if attempt:
+            log(project_dir, f"map retrying parts {[i + 1 for i in pending]}")
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            results = list(pool.map(lambda i: run_map_pass(prompts[i], project_dir), pending))
+        still_failed = []
+        for i, (found, result) in zip(pending, results):
+            if found is None:
+                still_failed.append(i)
+                log(project_dir, f"map part {i + 1} failed exit_code={result['exit_code']}")
+            else:
+                found_by_part[i] = found
+        pending = still_failed
+
+    findings = [{"part": i + 1, **found_by_part[i]} for i in sorted(found_by_part)]
+    return findings, len(chunks), len(pending)
+
+
+def acquire_lock(project_dir: Path, wait: float = 0):
+    """Take the workspace sync lock. Returns the open lock file, or None.
+
+    An fcntl lock instead of an exists()/write race: the kernel drops it when
+    the holder dies, so a crashed run never leaves a stale lock. The holder's
+    PID is written for lock_holder(). Polls for up to `wait` seconds.
+    """
+    lock_file = open(state_path(project_dir, WORKSPACE_SYNC_LOCK), "a+")
+    deadline = time.time() + wait
+    while True:
         try:
-            age = time.time() - lock_path.stat().st_mtime
-            if age < 300:
-                return False
-        except OSError:
-            pass
-    try:
-        lock_path.write_text(str(os.getpid()))
-        return True
-    except IOError:
-        return False
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except BlockingIOError:
+            if time.time() >= deadline:
+                lock_file.close()
+                return None
+            time.sleep(0.5)
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
 
 
-def release_lock(project_dir: Path):
-    try:
-        state_path(project_dir, WORKSPACE_SYNC_LOCK).unlink(missing_ok=True)
-    except OSError:
-        pass
+def lock_holder(project_dir: Path) -> int | None:
+    """PID of the live process holding the workspace sync lock, or None."""
+    return pidfile_owner(state_path(project_dir, WORKSPACE_SYNC_LOCK))
+
 
+def release_lock(lock_file):
+    lock_file.close()
 
 
 def cleanup_docs_to_delete(project_dir: Path):
@@ -420,36 +707,21 @@ def cleanup_docs_to_delete(project_dir: Path):
 
 
 
-def get_git_diff_after(project_dir: Path) -> tuple[list[str], str]:
-    """Get changed files and diff stat after agent runs."""
-    files_changed = []
-    diff_stat = ""
+def learner_targets(project_dir: Path, mode: str, docs: list[dict], config: dict) -> tuple[list[Path], list[tuple[Path, int | None]]]:
+    """Files and markdown trees the learner may edit, for learner_changes.snapshot.
 
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--name-only"],
-            capture_output=True, text=True, timeout=5,
-            cwd=str(project_dir)
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            files_changed = [f.strip() for f in result.stdout.strip().split('\n') if f.strip()]
-    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-        pass
-
-    try:
-        result = subprocess.run(
-            ["git", "diff", "--stat"],
-            capture_output=True, text=True, timeout=5,
-            cwd=str(project_dir)
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            lines = result.stdout.strip().split('\n')
-            if lines:
-                diff_stat = lines[-1].strip()
-    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-        pass
-
-    return files_changed, diff_stat
+    Always the workspace file, both CLAUDE.md files and every known
+    frontmatter'd doc. Project mode adds the doc directories; assistant
+    mode may create docs anywhere, so it covers the project tree down to
+    MAX_DOC_DEPTH.
+    """
+    files = [project_dir / WORKSPACE_FILE, project_dir / "CLAUDE.md", Path.home() / ".claude" / "CLAUDE.md"]
+    files.extend(Path(doc["path"]) for doc in docs)
+    if mode == "assistant":
+        trees = [(project_dir, MAX_DOC_DEPTH)]
+    else:
+        trees = [(project_dir / dir_rel, None) for dir_rel, _header in get_doc_scan_dirs(config)]
+    return files, trees
 
 
 def log_skip(project_dir: Path, reason: str, **extra):
@@ -464,55 +736,54 @@ def log_skip(project_dir: Path, reason: str, **extra):
 
 
 def log_learner_run(project_dir: Path, entry: dict):
-    """Append a run entry to the JSONL log with rotation (keep last MAX_LOG_ENTRIES)."""
-    log_path = state_path(project_dir, SESSION_LEARNER_LOG)
-    try:
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-
-        existing = []
-        if log_path.exists():
-            for line in log_path.read_text().strip().split('\n'):
-                if line.strip():
-                    try:
-                        existing.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-
-        existing.append(entry)
-        if len(existing) > MAX_LOG_ENTRIES:
-            existing = existing[-MAX_LOG_ENTRIES:]
-
-        log_path.write_text('\n'.join(json.dumps(e) for e in existing) + '\n')
-    except (IOError, OSError):
-        pass
+    """Append a run entry to the JSONL run history (rotated by size, see append_jsonl)."""
+    append_jsonl(state_path(project_dir, SESSION_LEARNER_LOG), entry, LOG_ROTATE_BYTES, LOG_ROTATED_FILES)
 
 
-def run_workspace_agent(prompt: str, project_dir: Path) -> dict:
+def run_workspace_agent(prompt: str, project_dir: Path, system_prompt: str | None = None) -> dict:
     """Run headless claude -p to update workspace.
 
-    Returns dict with: success, exit_code, tools_used, text_output
+    Waits for a host-wide run slot first (max_headless_runs in ~/.meridian/config.yaml).
+    Output is parsed as it streams; tool calls are logged as they happen, and a
+    run that goes silent for IDLE_TIMEOUT seconds is killed.
+    Returns dict with: success, exit_code, queue_wait_seconds, tools_used, text_output, usage, timed_out
     """
     env = claude_runner.build_env()
-    args = claude_runner.build_args()
-    result = claude_runner.run(prompt, args=args, env=env, cwd=str(project_dir), timeout=180)
+    args = claude_runner.build_args(system_prompt=system_prompt)
+    host = get_host_config()
+    recent = deque(maxlen=3)  # Last events, for diagnosing failures
+
+    def on_event(event: dict) -> None:
+        recent.append(event)
+        content = event.get("message", {}).get("content") if isinstance(event.get("message"), dict) else None
+        for block in content if isinstance(content, list) else []:
+            if isinstance(block, dict) and block.get("type") == "tool_use":
+                tool_input = block.get("input")
+                if not isinstance(tool_input, dict):
+                    tool_input = {}
+                log(project_dir, f"  tool {block.get('name', 'unknown')} {tool_input.get('file_path') or tool_input.get('path') or ''}")
+
+    result = claude_runner.run_streaming(prompt, args=args, env=env, cwd=str(project_dir),
+                                         timeout=AGENT_TIMEOUT, idle_timeout=IDLE_TIMEOUT, on_event=on_event,
+                                         max_concurrent=host['max_headless_runs'],
+                                         queue_timeout=host['headless_queue_timeout'])
 
     run_info = {
         "success": result["success"],
         "exit_code": result["exit_code"],
-        "tools_used": [],
-        "text_output": "",
+        "queue_wait_seconds": result.get("queue_wait_seconds", 0.0),
+        "tools_used": result["tools_used"],
+        "text_output": result["result_text"],
+        "usage": result["usage"],
+        "timed_out": result["timed_out"],
     }
+    if run_info["queue_wait_seconds"] >= 1:
+        log(project_dir, f"waited {run_info['queue_wait_seconds']:.0f}s for a host run slot")
 
     # Log stderr for debugging
     if result["stderr"]:
         log(project_dir, f"claude stderr: {result['stderr'][:300]}")
 
-    # Parse stream-json output for tool usage and text
-    if result["stdout"]:
-        tools_used, text_output = claude_runner.parse_stream_json(result["stdout"])
-        run_info["tools_used"] = tools_used
-        run_info["text_output"] = text_output
-
     # Save human-readable agent output for inspection
     output_path = state_path(project_dir, "session-learner-output.md")
     try:
@@ -524,10 +795,9 @@ def run_workspace_agent(prompt: str, project_dir: Path) -> dict:
 
     if not result["success"]:
         log(project_dir, f"claude exited with code {result['exit_code']}")
-        # Log last few lines of stdout for diagnosis
-        stdout_lines = result["stdout"].strip().split('\n')
-        for line in stdout_lines[-3:]:
-            log(project_dir, f"  stdout: {line[:300]}")
+        # Log the last few events for diagnosis
+        for event in recent:
+            log(project_dir, f"  event: {json.dumps(event)[:300]}")
 
     return run_info
 
@@ -544,105 +814,340 @@ def log(project_dir: Path, message: str):
         pass
 
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except (json.JSONDecodeError, EOFError):
-        input_data = {}
+# =============================================================================
+# JOB PROCESSING (runs in the detached worker)
+# =============================================================================
+TRANSIENT_EXIT_CODES = (-2, -4, -5, -6)  # Timeout, broken pipe, OS error, no host slot — worth a retry
+LOCK_WAIT_SECONDS = 600  # How long the worker waits on a run outside the spool (e.g. a manual one)
 
-    hook_event = input_data.get("hook_event_name", "")
-    transcript_path = input_data.get("transcript_path", "")
 
-    project_dir = Path(os.environ.get("CLAUDE_PROJECT_DIR", "."))
+def failure_outcome(run_info: dict) -> str:
+    """"retry" for timeouts and transient runner errors, "failed" for the rest.
 
-    log(project_dir, f"START event={hook_event} transcript={Path(transcript_path).name if transcript_path else 'none'}")
+    A positive exit code is claude itself failing (bad args, auth, invalid
+    model); running it again with backoff gives the same result.
+    """
+    if run_info.get("timed_out") or run_info.get("exit_code") in TRANSIENT_EXIT_CODES:
+        return "retry"
+    return "failed"
 
-    # Only handle SessionEnd and PreCompact
-    if hook_event not in ("SessionEnd", "PreCompact"):
-        log(project_dir, f"SKIP wrong event: {hook_event}")
-        log_skip(project_dir, "wrong_event", hook_event=hook_event)
-        sys.exit(0)
 
-    lock_acquired = False
-    try:
-        if not transcript_path or not Path(transcript_path).exists():
-            log(project_dir, f"SKIP no transcript (path={'empty' if not transcript_path else 'file missing'})")
-            log_skip(project_dir, "no_transcript")
-            return
+def process_job(project_dir: Path, job: dict) -> str:
+    """Run the learner pipeline for one spooled job.
 
-        if not acquire_lock(project_dir):
-            log(project_dir, "SKIP lock held by another run")
-            log_skip(project_dir, "lock_held")
-            return
-        lock_acquired = True
-        log(project_dir, "lock acquired")
+    Returns "done", "skipped", "failed" (permanent) or "retry" (transient).
+    """
+    transcript_path = job.get("transcript_path", "")
+    trigger = job.get("trigger", "end")
+    config = job.get("config") or get_project_config(project_dir)
+
+    if not transcript_path or not Path(transcript_path).exists():
+        log(project_dir, "SKIP transcript gone before the job ran")
+        log_skip(project_dir, "no_transcript", trigger=trigger)
+        return "skipped"
 
+    lock_file = acquire_lock(project_dir, wait=LOCK_WAIT_SECONDS)
+    if lock_file is None:
+        log(project_dir, f"RETRY lock still held by pid {lock_holder(project_dir)}")
+        return "retry"
+    log(project_dir, "lock acquired")
+
+    try:
         # Extract transcript
-        start_line, end_line = get_extraction_range(transcript_path)
-        entries = extract_transcript(transcript_path, start_line, end_line)
+        start_offset, end_offset, start_line, checkpoint = get_extraction_range(
+            project_dir, transcript_path, end_offset=job.get("end_offset"))
+        if checkpoint and checkpoint["offset"] >= end_offset:
+            log(project_dir, f"SKIP already processed (checkpoint {checkpoint['offset']} >= end {end_offset})")
+            log_skip(project_dir, "already_processed", trigger=trigger)
+            return "skipped"
+
+        # Cheap byte-level pre-scan of the unprocessed part; skip before extracting if nothing new happened
+        min_novelty = config.get('learner_min_novelty', 3)
+        scan_start = checkpoint["offset"] if checkpoint else start_offset
+        scan_start_time = time.time()
+        novelty = learner_novelty.novelty(project_dir, transcript_path, scan_start, end_offset)
+        signals = " ".join(f"{k}={novelty[k]}" for k in learner_novelty.WEIGHTS)
+        log(project_dir, f"novelty score={novelty['score']} min={min_novelty} {signals} "
+                         f"prescan_ms={(time.time() - scan_start_time) * 1000:.0f}")
+        if novelty["score"] < min_novelty:
+            log(project_dir, f"SKIP low novelty ({novelty['score']} < {min_novelty})")
+            log_skip(project_dir, "low_novelty", trigger=trigger, score=novelty["score"], min_score=min_novelty,
+                     **{k: novelty[k] for k in learner_novelty.WEIGHTS})
+            return "skipped"
+
+        extracted = transcript_extract.extract_shared(project_dir, transcript_path, start_offset, end_offset)
+        end_offset = extracted["end"]
+        context_entries, entries, next_overlap = split_at_checkpoint(extracted["learner"], checkpoint)
+        log(project_dir, f"range bytes={start_offset}-{end_offset} from_line={start_line} reused={extracted['reused']}")
+        if checkpoint:
+            log(project_dir, f"checkpoint offset={checkpoint['offset']} new_entries={len(entries)} overlap_entries={len(context_entries)}")
+        log(project_dir, f"tool calls {extracted['tools']['counts']} files_touched={len(extracted['tools']['files'])}")
+
 
         # Skip if too few meaningful entries
         meaningful = [e for e in entries if e["type"] in ("user", "assistant")]
         log(project_dir, f"extracted entries={len(entries)} meaningful={len(meaningful)}")
         if len(meaningful) < MIN_ENTRIES_THRESHOLD:
             log(project_dir, f"SKIP below threshold ({len(meaningful)} < {MIN_ENTRIES_THRESHOLD})")
-            log_skip(project_dir, "below_threshold", entries=len(meaningful))
-            return
-
-        # Load workspace, config, and git context
+            log_skip(project_dir, "below_threshold", entries=len(meaningful), trigger=trigger)
+            return "skipped"
+
+        # Composition stats decode every line of the range, so they are opt-in and only for jobs that run
+        stats_summary = None
+        if config.get('transcript_stats'):
+            stats = transcript_stats.analyze(transcript_path, start_offset, end_offset)
+            transcript_stats.write_stats(project_dir, transcript_path, start_offset, end_offset, stats)
+            stats_summary = transcript_stats.summary(stats)
+            log(project_dir, "composition " + " ".join(f"{k}={v}" for k, v in stats_summary.items()))
+
+        # Load workspace and git context; config comes from the job snapshot
         workspace_root = load_workspace(project_dir)
         git_context = gather_git_context(project_dir)
-        config = get_project_config(project_dir)
         learner_mode = config.get('session_learner_mode', 'project')
 
+        # Encoding savings over the previous indented-JSON format
+        encoded = context_entries + entries
+        encoding = {"json_bytes": json_encoded_size(encoded), "compact_bytes": len(encode_entries(encoded).encode())}
+        saved = 1 - encoding["compact_bytes"] / encoding["json_bytes"] if encoding["json_bytes"] else 0
+        log(project_dir, f"encoding json_bytes={encoding['json_bytes']} compact_bytes={encoding['compact_bytes']} saved={saved:.0%}")
+
+        # Oversized transcripts: summarize chunks in parallel, then apply the merged findings
+        map_reduce = None
+        findings = None
+        chunk_tokens = config.get('learner_chunk_tokens', 60000)
+        transcript_tokens = estimate_tokens(entries)
+        if transcript_tokens > chunk_tokens:
+            map_start = time.time()
+            findings, chunk_count, failed = map_findings(
+                entries, project_dir, workspace_root, chunk_tokens, config.get('learner_map_concurrency', 3))
+            map_reduce = {"chunks": chunk_count, "failed": failed, "map_seconds": round(time.time() - map_start, 1)}
+            log(project_dir, f"map done chunks={chunk_count} failed={failed} seconds={map_reduce['map_seconds']}")
+            if failed:
+                # Applying partial findings would move the checkpoint past the failed chunks for good
+                log(project_dir, f"RETRY {failed} of {chunk_count} map parts failed; checkpoint not moved")
+                return "retry"
+
+        # Full doc details only for docs related to this session
+        docs = scan_project_frontmatter_entries(project_dir)
+        tool_files = extracted["tools"]["files"]
+        query_terms = session_query_terms(context_entries + entries, tool_files, project_dir)
+        selected = select_doc_candidates(docs, tool_files, query_terms, config.get('learner_doc_candidates', 8), project_dir)
+        doc_index = format_doc_candidates(docs, selected, project_dir)
+        doc_info = {
+            "total": len(docs),
+            "detailed": len(selected),
+            "bytes": len(doc_index.encode()),
+            "full_bytes": len("\n".join(format_doc_entry(doc) for doc in docs).encode()),
+        }
+        log(project_dir, f"docs detailed={doc_info['detailed']}/{doc_info['total']} bytes={doc_info['bytes']} "
+                         f"saved_bytes={doc_info['full_bytes'] - doc_info['bytes']}")
+
         # Build prompt and run agent
-        prompt = build_prompt(entries, workspace_root, git_context, project_dir, mode=learner_mode)
-        log(project_dir, f"prompt built chars={len(prompt)} mode={learner_mode}")
+        system_prompt = build_system_prompt(project_dir, mode=learner_mode)
+        prompt = build_prompt(entries, workspace_root, git_context, project_dir,
+                              context_entries=context_entries, findings=findings, doc_index=doc_index)
+        prompt_info = {
+            "system_bytes": len(system_prompt.encode()),
+            "message_bytes": len(prompt.encode()),
+            "system_hash": hashlib.sha1(system_prompt.encode()).hexdigest()[:12],
+            "docs": doc_info,
+        }
+        log(project_dir, f"prompt built system_bytes={prompt_info['system_bytes']} system_hash={prompt_info['system_hash']} "
+                         f"message_bytes={prompt_info['message_bytes']} mode={learner_mode} transcript_tokens~{transcript_tokens}")
 
         # Save prompt for inspection
         try:
             prompt_path = state_path(project_dir, "session-learner-prompt.md")
             prompt_path.parent.mkdir(parents=True, exist_ok=True)
-            prompt_path.write_text(prompt)
+            prompt_path.write_text(f"{system_prompt}\n\n<!-- ===== message ===== -->\n\n{prompt}")
         except (IOError, OSError):
             pass
 
+        # Snapshot what the run may edit, to report exact changes afterwards
+        snapshot_start = time.time()
+        targets_before = learner_changes.snapshot(*learner_targets(project_dir, learner_mode, docs, config))
+        snapshot_ms = (time.time() - snapshot_start) * 1000
+
         log(project_dir, "calling claude -p...")
         start_time = time.time()
-        run_info = run_workspace_agent(prompt, project_dir)
-        duration = time.time() - start_time
+        run_info = run_workspace_agent(prompt, project_dir, system_prompt=system_prompt)
+        duration = time.time() - start_time - run_info["queue_wait_seconds"]
         log(project_dir, f"claude -p done exit_code={run_info['exit_code']} duration={duration:.0f}s tools={len(run_info['tools_used'])}")
 
-        # Capture git diff after agent runs
-        files_changed, diff_stat = get_git_diff_after(project_dir)
+        # Exact changes to the learner's targets (docs the run marked for deletion are removed first)
+        if run_info["success"]:
+            cleanup_docs_to_delete(project_dir)
+        changes = learner_changes.diff(targets_before)
+        files_changed = [learner_changes.display_path(c["path"], project_dir) for c in changes]
+        diff_stat = learner_changes.format_stat(changes)
+        log(project_dir, f"changes {diff_stat or 'none'} snapshot_targets={len(targets_before['state'])} "
+                         f"snapshot_ms={snapshot_ms:.0f}")
 
         # Log to JSONL
         log_entry = {
             "timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-            "trigger": "compact" if hook_event == "PreCompact" else "end",
+            "trigger": trigger,
+            "attempt": job.get("attempts", 1),
+            "coalesced_triggers": job.get("coalesced", 0),
+            "queued_seconds": round(start_time - job.get("created", start_time), 1),
             "transcript_entries": len(entries),
             "meaningful_entries": len(meaningful),
+            "checkpoint_offset": checkpoint["offset"] if checkpoint else None,
+            "range_bytes": end_offset - start_offset,
+            "transcript_stats": stats_summary,
+            "queue_wait_seconds": run_info["queue_wait_seconds"],
+            "novelty": {k: novelty[k] for k in ("score", *learner_novelty.WEIGHTS)},
+            "transcript_encoding": encoding,
+            "prompt": prompt_info,
+            "map_reduce": map_reduce,
             "duration_seconds": round(duration, 1),
             "exit_code": run_info["exit_code"],
+            "timed_out": run_info["timed_out"],
             "success": run_info["success"],
+            "usage": run_info["usage"],
             "tools_used": run_info["tools_used"],
             "files_changed": files_changed,
             "diff_stat": diff_stat,
+            "changes": [{**c, "path": name} for c, name in zip(changes, files_changed)],
         }
         log_learner_run(project_dir, log_entry)
 
         if run_info["success"]:
             tool_count = len(run_info["tools_used"])
             log(project_dir, f"DONE tools={tool_count} files_changed={files_changed}")
-            cleanup_docs_to_delete(project_dir)
-        else:
-            log(project_dir, f"FAILED exit_code={run_info['exit_code']}")
+            transcript.save_cursor(project_dir, transcript_path, CHECKPOINT_CURSOR, end_offset,
+                                   overlap=next_overlap if next_overlap is not None else end_offset,
+                                   workspace=workspace_hash(project_dir))
+            return "done"
+
+        outcome = failure_outcome(run_info)
+        log(project_dir, f"FAILED exit_code={run_info['exit_code']} ({'transient' if outcome == 'retry' else 'permanent'})")
+        return outcome
 
     finally:
-        if lock_acquired:
-            release_lock(project_dir)
-            log(project_dir, "lock released")
+        release_lock(lock_file)
+        log(project_dir, "lock released")
+
+
+def drain_spool(project_dir: Path) -> None:
+    """Process spooled jobs oldest-first until the spool is empty.
+
+    Waits out retry backoffs; returns once nothing is left or only jobs that
+    have exhausted their attempts were dropped.
+    """
+    while True:
+        path, wait = learner_spool.next_ready_job(project_dir)
+        if path is None:
+            if wait is None:
+                return
+            time.sleep(min(wait, learner_spool.RETRY_BACKOFF_SECONDS))
+            continue
+
+        job = learner_spool.load_job(path)
+        if job is None:
+            learner_spool.finish(path)
+            continue
+        # Triggers that piled up during the previous run collapse into this one pass
+        folded = learner_spool.coalesce(project_dir, path, job)
+        learner_spool.mark_attempt(path, job)
+        log(project_dir, f"JOB {path.name} trigger={job.get('trigger')} attempt={job['attempts']} coalesced={folded}")
+
+        error = "transient failure"
+        try:
+            outcome = process_job(project_dir, job)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            log(project_dir, f"CRASH {error}")
+            outcome = "retry"
+
+        if outcome == "retry":
+            if learner_spool.retry_later(path, job, error):
+                log(project_dir, f"JOB {path.name} will retry")
+            else:
+                log(project_dir, f"JOB {path.name} dropped after {job['attempts']} attempts")
+                log_skip(project_dir, "retries_exhausted", trigger=job.get("trigger"), attempts=job["attempts"])
+        else:
+            learner_spool.finish(path)
+
+
+def run_worker(project_dir: Path) -> None:
+    """Detached worker: hold the pidfile lock and drain the spool.
+
+    After releasing the lock it looks at the spool once more, so a job
+    enqueued while it was shutting down (when the hook still saw it alive)
+    is never stranded.
+    """
+    learner_spool.daemonize()
+    while True:
+        pid_file = learner_spool.acquire_worker_lock(project_dir)
+        if pid_file is None:
+            return  # Another worker owns the spool
+        log(project_dir, f"WORKER start pid={os.getpid()}")
+        try:
+            drain_spool(project_dir)
+            time.sleep(learner_spool.WORKER_LINGER_SECONDS)
+            drain_spool(project_dir)
+        finally:
+            pid_file.close()
+        if not learner_spool.pending_jobs(project_dir):
+            log(project_dir, "WORKER exit")
+            return
+
+
+# =============================================================================
+# HOOK ENTRY POINT
+# =============================================================================
+def enqueue_job(project_dir: Path, hook_event: str, transcript_path: str) -> Path:
+    """Spool a learner job for the transcript as it is now, with the current config.
+
+    Only the end of the last complete line is recorded (a tail read); the
+    worker indexes the transcript and works out where the range starts.
+    """
+    return learner_spool.enqueue(project_dir, {
+        "transcript_path": str(Path(transcript_path).resolve()),
+        "end_offset": transcript.complete_size(transcript_path),
+        "trigger": "compact" if hook_event == "PreCompact" else "end",
+        "config": get_project_config(project_dir),
+    })
+
+
+def main():
+    if "--worker" in sys.argv:
+        parser = argparse.ArgumentParser(description="Session learner worker")
+        parser.add_argument("--worker", action="store_true")
+        parser.add_argument("--project", required=True, help="Project directory")
+        args = parser.parse_args()
+        run_worker(Path(args.project).resolve())
+        return
+
+    try:
+        input_data = json.load(sys.stdin)
+    except (json.JSONDecodeError, EOFError):
+        input_data = {}
+
+    hook_event = input_data.get("hook_event_name", "")
+    transcript_path = input_data.get("transcript_path", "")
+
+    project_dir = Path(os.environ.get("CLAUDE_PROJECT_DIR", ".")).resolve()
+
+    log(project_dir, f"START event={hook_event} transcript={Path(transcript_path).name if transcript_path else 'none'}")
+
+    # Only handle SessionEnd and PreCompact
+    if hook_event not in ("SessionEnd", "PreCompact"):
+        log(project_dir, f"SKIP wrong event: {hook_event}")
+        log_skip(project_dir, "wrong_event", hook_event=hook_event)
+        sys.exit(0)
+
+    if not transcript_path or not Path(transcript_path).exists():
+        log(project_dir, f"SKIP no transcript (path={'empty' if not transcript_path else 'file missing'})")
+        log_skip(project_dir, "no_transcript")
+        sys.exit(0)
 
+    job_path = enqueue_job(project_dir, hook_event, transcript_path)
+    started = learner_spool.ensure_worker(project_dir, Path(__file__).resolve())
+    active = lock_holder(project_dir)
+    log(project_dir, f"QUEUED {job_path.name} worker={'ok' if started else 'spawn failed'}"
+                     + (f" (run active in pid {active}, will coalesce)" if active else ""))
     sys.exit(0)
 
 
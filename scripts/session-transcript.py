@@ -18,7 +18,9 @@ from datetime import datetime
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "lib"))
-from meridian_config import state_path, LAST_SESSION_FILE, TRANSCRIPT_PATH_STATE, is_headless, is_system_noise
+from meridian_config import state_path, LAST_SESSION_FILE, TRANSCRIPT_PATH_STATE, is_headless
+import transcript
+import transcript_extract
 
 if is_headless():
     sys.exit(0)
@@ -38,91 +40,6 @@ def log(project_dir, msg):
         pass
 
 
-def find_last_compact_boundary(transcript_path: str) -> int:
-    """Find the line number of the last compact_boundary entry. Returns -1 if none."""
-    last_boundary = -1
-    with open(transcript_path) as f:
-        for i, line in enumerate(f):
-            try:
-                entry = json.loads(line)
-                if entry.get("type") == "system" and entry.get("subtype") == "compact_boundary":
-                    last_boundary = i
-            except (json.JSONDecodeError, KeyError):
-                continue
-    return last_boundary
-
-
-def extract_dialogue(transcript_path: str, start_after_line: int = -1) -> list[dict]:
-    """Extract user and assistant text messages from the transcript.
-
-    Deduplicates streaming assistant entries by requestId (keeps last version).
-    Skips thinking blocks, tool calls, tool results, system messages, and
-    hook/command injection noise.
-
-    If start_after_line >= 0, only processes entries after that line number.
-    """
-    raw_entries = []
-    assistant_by_request = {}  # requestId -> (index, entry)
-
-    with open(transcript_path) as f:
-        for i, line in enumerate(f):
-            if i <= start_after_line:
-                continue
-            try:
-                raw = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-
-            entry_type = raw.get("type", "")
-            msg = raw.get("message", {})
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            request_id = raw.get("requestId")
-
-            # User text (string content)
-            if entry_type == "user" and role == "user" and isinstance(content, str) and content.strip():
-                if is_system_noise(content):
-                    continue
-                raw_entries.append({"role": "user", "text": content.strip()})
-
-            # User text (content blocks)
-            elif entry_type == "user" and role == "user" and isinstance(content, list):
-                if any(b.get("type") == "tool_result" for b in content):
-                    continue
-                for block in content:
-                    if block.get("type") == "text" and block.get("text", "").strip():
-                        text = block["text"].strip()
-                        if is_system_noise(text):
-                            continue
-                        raw_entries.append({"role": "user", "text": text})
-
-            # Assistant text (extract only text blocks, skip thinking/tool_use)
-            elif entry_type == "assistant" and role == "assistant" and isinstance(content, list):
-                text_parts = []
-                for block in content:
-                    if block.get("type") == "text" and block.get("text", "").strip():
-                        text_parts.append(block["text"].strip())
-
-                if text_parts:
-                    entry = {"role": "assistant", "text": "\n\n".join(text_parts)}
-                    if request_id:
-                        if request_id not in assistant_by_request:
-                            idx = len(raw_entries)
-                            raw_entries.append(None)  # placeholder
-                            assistant_by_request[request_id] = (idx, entry)
-                        else:
-                            idx = assistant_by_request[request_id][0]
-                            assistant_by_request[request_id] = (idx, entry)
-                    else:
-                        raw_entries.append(entry)
-
-    # Fill in deduplicated assistant entries
-    for request_id, (idx, entry) in assistant_by_request.items():
-        raw_entries[idx] = entry
-
-    return [e for e in raw_entries if e is not None]
-
-
 def format_dialogue(entries: list[dict]) -> str:
     """Format dialogue entries as clean markdown. Full content preserved."""
     lines = []
@@ -169,9 +86,11 @@ def main():
     # Extract dialogue
     # PreCompact: only extract since last compact boundary (or session start)
     # SessionEnd: extract everything since last compact boundary
-    start_after = find_last_compact_boundary(transcript_path)
-    entries = extract_dialogue(transcript_path, start_after_line=start_after)
-    log(base_dir, f"extracted {len(entries)} dialogue entries (start_after_line={start_after}, event={event_name})")
+    record = transcript.update_transcript_index(base_dir, transcript_path)
+    start_offset, start_line = transcript.last_compact_boundary(record)
+    extracted = transcript_extract.extract_shared(base_dir, transcript_path, start_offset, record["size"])
+    entries = extracted["dialogue"]
+    log(base_dir, f"extracted {len(entries)} dialogue entries (from_line={start_line}, bytes={start_offset}-{extracted['end']}, reused={extracted['reused']}, event={event_name})")
 
     if not entries:
         log(base_dir, "SKIP no dialogue entries found")
@@ -24,40 +24,33 @@ from meridian_config import (
     log_hook_output,
     reset_action_counter,
 )
+import transcript
 
 
 def get_last_assistant_output(transcript_path: str) -> str | None:
-    """Extract the last assistant message text from the transcript."""
+    """Extract the last assistant message text from the transcript.
+
+    Reads the transcript backwards and stops at the last assistant entry, so
+    the cost does not grow with the transcript.
+    """
+    # Entry format: {"type": "assistant", "message": {"role": "assistant", "content": [...]}, ...}
     try:
-        with open(transcript_path, 'r') as f:
-            lines = f.readlines()
-
-        # Find last assistant message (transcript is JSONL)
-        # Entry format: {"type": "assistant", "message": {"role": "assistant", "content": [...]}, ...}
-        last_assistant = None
-        for line in lines:
-            try:
-                entry = json.loads(line)
-                if entry.get('type') == 'assistant':
-                    last_assistant = entry
-            except json.JSONDecodeError:
-                continue
-
-        if not last_assistant:
-            return None
-
-        # Extract text content
-        content = last_assistant.get('message', {}).get('content', [])
-        texts = []
-        for block in content:
-            if block.get('type') == 'text':
-                texts.append(block.get('text', ''))
-
-        return '\n'.join(texts) if texts else None
-
-    except (IOError, json.JSONDecodeError):
+        last_assistant = transcript.last_entry_of_type(transcript_path, 'assistant')
+    except (IOError, OSError):
+        return None
+
+    if not last_assistant:
         return None
 
+    # Extract text content
+    content = last_assistant.get('message', {}).get('content', [])
+    texts = []
+    for block in content:
+        if isinstance(block, dict) and block.get('type') == 'text':
+            texts.append(block.get('text', ''))
+
+    return '\n'.join(texts) if texts else None
+
 
 def check_completion_phrase(output: str, phrase: str) -> bool:
     """Check if output contains <complete>PHRASE</complete> with exact match."""
@@ -0,0 +1,67 @@
+"""Shared fixtures: scripts/lib on sys.path and a scripted fake claude CLI."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "lib"))
+
+FAKE_CLAUDE = ROOT / "scripts" / "dev" / "fake-claude.py"
+
+
+class FakeClaude:
+    """Builds args/env for claude_runner that run scripts/dev/fake-claude.py with a scenario."""
+
+    def __init__(self, tmp_path: Path):
+        self.dir = tmp_path
+        self.log_path = tmp_path / "fake-claude.jsonl"
+
+    def args(self, **build_kwargs) -> list[str]:
+        import claude_runner
+        return [sys.executable, str(FAKE_CLAUDE)] + claude_runner.build_args(**build_kwargs)[1:]
+
+    def env(self, **scenario) -> dict:
+        scenario_path = self.dir / "scenario.json"
+        scenario_path.write_text(json.dumps(scenario))
+        env = {k: v for k, v in os.environ.items() if k not in ("CLAUDECODE", "CLAUDE_CODE_ENTRYPOINT")}
+        env.update({"FAKE_CLAUDE_SCENARIO": str(scenario_path), "FAKE_CLAUDE_LOG": str(self.log_path),
+                    "MERIDIAN_HEADLESS": "1"})
+        return env
+
+    def calls(self) -> list[dict]:
+        if not self.log_path.exists():
+            return []
+        return [json.loads(line) for line in self.log_path.read_text().splitlines() if line.strip()]
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch) -> Path:
+    """Point HOME at a temp dir so state files never land in the real ~/.meridian."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    return home
+
+
+@pytest.fixture
+def fake_claude(tmp_path) -> FakeClaude:
+    return FakeClaude(tmp_path)
+
+
+def pid_alive(pid: int) -> bool:
+    """True while pid exists and is not a zombie."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
@@ -0,0 +1,164 @@
+"""claude_runner streaming, asyncio execution and host run slots against scripts/dev/fake-claude.py."""
+
+import asyncio
+import threading
+import time
+from contextlib import ExitStack
+
+import pytest
+
+import claude_runner
+from conftest import pid_alive
+from meridian_config import get_host_config
+
+
+def _start_call(fake_claude) -> dict:
+    return next(c for c in fake_claude.calls() if c["phase"] == "start")
+
+
+def _wait_dead(pid: int, seconds: float = 5.0) -> bool:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if not pid_alive(pid):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+# =============================================================================
+# run_streaming
+# =============================================================================
+def test_run_streaming_success(fake_claude):
+    events = []
+    result = claude_runner.run_streaming("hello", args=fake_claude.args(), env=fake_claude.env(latency=0, edits=[]),
+                                         cwd=str(fake_claude.dir), timeout=30, on_event=events.append)
+    assert result["success"] and result["exit_code"] == 0
+    assert result["timed_out"] is None
+    assert result["result_text"] == "Updated the workspace."
+    assert events[0]["type"] == "system" and events[-1]["type"] == "result"
+
+
+def test_run_streaming_idle_timeout_kills_group(fake_claude):
+    env = fake_claude.env(latency=0, hang=30, child_sleep=30)
+    start = time.monotonic()
+    result = claude_runner.run_streaming("x", args=fake_claude.args(), env=env, cwd=str(fake_claude.dir),
+                                         timeout=20, idle_timeout=1)
+    assert result["timed_out"] == "idle"
+    assert time.monotonic() - start < 5
+    call = _start_call(fake_claude)
+    assert _wait_dead(call["pid"]) and _wait_dead(call["child_pid"])
+
+
+def test_run_streaming_on_event_error_kills_run(fake_claude):
+    env = fake_claude.env(latency=0, hang=30, child_sleep=30)
+
+    def explode(event):
+        raise ValueError("bad event")
+
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        claude_runner.run_streaming("x", args=fake_claude.args(), env=env, cwd=str(fake_claude.dir),
+                                    timeout=60, idle_timeout=60, on_event=explode)
+    assert time.monotonic() - start < 5
+    call = _start_call(fake_claude)
+    assert _wait_dead(call["pid"]) and _wait_dead(call["child_pid"])
+
+
+# =============================================================================
+# arun / arun_many
+# =============================================================================
+def test_arun_idle_timeout(fake_claude):
+    env = fake_claude.env(latency=0, hang=30)
+    result = asyncio.run(claude_runner.arun("x", args=fake_claude.args(), env=env, cwd=str(fake_claude.dir),
+                                            timeout=20, idle_timeout=1))
+    assert result["timed_out"] == "idle" and not result["success"]
+    assert _wait_dead(_start_call(fake_claude)["pid"])
+
+
+def test_arun_total_timeout_kills_process_group(fake_claude):
+    # Keeps emitting events, so only the total timeout can stop it
+    env = fake_claude.env(latency=0, event_delay=0.2, child_sleep=30,
+                          events=[{"type": "system", "subtype": "tick"}] * 100)
+    start = time.monotonic()
+    result = asyncio.run(claude_runner.arun("x", args=fake_claude.args(), env=env, cwd=str(fake_claude.dir),
+                                            timeout=1.5, idle_timeout=1))
+    assert result["timed_out"] == "total"
+    assert time.monotonic() - start < 5
+    call = _start_call(fake_claude)
+    assert _wait_dead(call["pid"]) and _wait_dead(call["child_pid"])
+
+
+def test_arun_many_caps_concurrency_and_keeps_order(fake_claude):
+    env = fake_claude.env(latency=0.4, edits=[])
+    tasks = [{"prompt": f"task {i}"} for i in range(6)]
+    results = asyncio.run(claude_runner.arun_many(tasks, concurrency=2, args=fake_claude.args(), env=env,
+                                                  cwd=str(fake_claude.dir), timeout=30))
+    assert len(results) == 6 and all(r["success"] for r in results)
+
+    # Sweep start/end times from the fake's call log for the peak overlap
+    marks = sorted((c["time"], 1 if c["phase"] == "start" else -1) for c in fake_claude.calls())
+    running = peak = 0
+    for _t, delta in marks:
+        running += delta
+        peak = max(peak, running)
+    assert peak == 2
+
+
+def test_arun_many_cancellation_leaves_no_processes(fake_claude):
+    env = fake_claude.env(latency=0, hang=30, child_sleep=30)
+
+    async def cancel_soon():
+        task = asyncio.ensure_future(claude_runner.arun_many(["a", "b", "c"], concurrency=3, args=fake_claude.args(),
+                                                             env=env, cwd=str(fake_claude.dir), timeout=60))
+        while len([c for c in fake_claude.calls() if c["phase"] == "start"]) < 3:
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_soon())
+    for call in (c for c in fake_claude.calls() if c["phase"] == "start"):
+        assert _wait_dead(call["pid"]) and _wait_dead(call["child_pid"])
+
+
+# =============================================================================
+# host_slot
+# =============================================================================
+def test_host_slot_caps_concurrent_holders(isolated_home):
+    with ExitStack() as held:
+        assert held.enter_context(claude_runner.host_slot(2, wait_timeout=1))[0]
+        assert held.enter_context(claude_runner.host_slot(2, wait_timeout=1))[0]
+        with claude_runner.host_slot(2, wait_timeout=0.3, poll=0.05) as (acquired, waited):
+            assert not acquired and waited >= 0.3
+    with claude_runner.host_slot(2, wait_timeout=1) as (acquired, _waited):
+        assert acquired
+    # The root is resolved from HOME at call time, not at import
+    assert sorted(p.name for p in (isolated_home / ".meridian" / "run-slots" / "slots").iterdir()) == ["slot-0", "slot-1"]
+    assert list((isolated_home / ".meridian" / "run-slots" / "queue").iterdir()) == []
+
+
+def test_host_slot_waiters_are_served_in_arrival_order(tmp_path):
+    order = []
+
+    def waiter(label: str):
+        with claude_runner.host_slot(1, wait_timeout=5, root=tmp_path, poll=0.02) as (acquired, _waited):
+            order.append((label, acquired))
+            time.sleep(0.05)
+
+    with claude_runner.host_slot(1, root=tmp_path) as (acquired, _waited):
+        assert acquired
+        threads = []
+        for label in ("first", "second", "third"):
+            threads.append(threading.Thread(target=waiter, args=(label,)))
+            threads[-1].start()
+            time.sleep(0.05)  # Distinct queue tickets, in this order
+    for thread in threads:
+        thread.join()
+    assert order == [("first", True), ("second", True), ("third", True)]
+
+
+def test_get_host_config_reads_the_current_home(isolated_home):
+    assert get_host_config() == {"max_headless_runs": 2, "headless_queue_timeout": 600}
+    (isolated_home / ".meridian").mkdir()
+    (isolated_home / ".meridian" / "config.yaml").write_text("max_headless_runs: 4\nheadless_queue_timeout: 30\n")
+    assert get_host_config() == {"max_headless_runs": 4, "headless_queue_timeout": 30}
@@ -0,0 +1,131 @@
+"""Shared docs-index artifact: publishing, the reuse window and the SessionStart lock."""
+
+import fcntl
+import os
+import threading
+import time
+
+import pytest
+
+import meridian_config
+from index_watcher import IndexMaintainer, PollingWatcher
+from meridian_config import (DOCS_INDEX_FILE, DOCS_INDEX_LOCK, get_docs_index, publish_docs_index, scan_docs_entries,
+                             state_path)
+
+CONFIG = {"doc_router_enabled": False}
+
+
+def _doc(summary: str) -> str:
+    return f"---\nsummary: {summary}\nread_when:\n  - working on {summary}\n---\n"
+
+
+@pytest.fixture
+def project(tmp_path):
+    base = tmp_path / "project"
+    (base / ".meridian" / "docs").mkdir(parents=True)
+    (base / ".meridian" / "docs" / "auth.md").write_text(_doc("auth flow"))
+    return base
+
+
+@pytest.fixture
+def scans(monkeypatch) -> list:
+    calls = []
+    real = meridian_config.scan_docs_entries
+
+    def counting(dir_path, base_dir, use_watched=True):
+        calls.append(dir_path)
+        return real(dir_path, base_dir, use_watched)
+
+    monkeypatch.setattr(meridian_config, "scan_docs_entries", counting)
+    return calls
+
+
+def _paths(artifact: dict) -> list[str]:
+    return [e["path"] for _dir, entries in artifact["dirs"] for e in entries]
+
+
+def test_reuse_window_scans_once_per_session_key(project, scans):
+    first = get_docs_index(project, CONFIG, "session-1:startup")
+    scanned = len(scans)
+    assert _paths(first) == [".meridian/docs/auth.md"]
+
+    again = get_docs_index(project, CONFIG, "session-1:startup")
+    assert again["generation"] == first["generation"] and len(scans) == scanned
+
+    other = get_docs_index(project, CONFIG, "session-2:startup")
+    assert other["generation"] == first["generation"] + 1 and len(scans) > scanned
+
+
+def test_expired_artifact_is_rebuilt(project, scans, monkeypatch):
+    first = get_docs_index(project, CONFIG, "session-1:startup")
+    later = time.time() + meridian_config.DOCS_INDEX_REUSE_SECONDS + 1
+    monkeypatch.setattr(meridian_config.time, "time", lambda: later)
+    assert get_docs_index(project, CONFIG, "session-1:startup")["generation"] == first["generation"] + 1
+
+
+def test_waiting_hook_reuses_what_the_lock_holder_published(project, scans):
+    lock_file = open(state_path(project, DOCS_INDEX_LOCK), "a")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+    def producer():
+        time.sleep(0.2)
+        publish_docs_index(project, [(".meridian/docs", [{"path": "from-producer.md", "summary": "x",
+                                                          "read_when": []}])], "session-1:startup", generation=7)
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    artifact = get_docs_index(project, CONFIG, "session-1:startup")
+    thread.join()
+    assert artifact["generation"] == 7 and _paths(artifact) == ["from-producer.md"]
+    assert scans == []
+
+
+def test_stuck_lock_holder_does_not_block_session_start(project, monkeypatch):
+    monkeypatch.setattr(meridian_config, "DOCS_INDEX_WAIT_SECONDS", 0.1)
+    with open(state_path(project, DOCS_INDEX_LOCK), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        artifact = get_docs_index(project, CONFIG, "session-1:startup")
+    assert _paths(artifact) == [".meridian/docs/auth.md"]
+
+
+def test_removing_every_doc_removes_the_docs_index_file(project):
+    get_docs_index(project, CONFIG, "session-1:startup")
+    assert "auth.md" in state_path(project, DOCS_INDEX_FILE).read_text()
+
+    (project / ".meridian" / "docs" / "auth.md").unlink()
+    artifact = get_docs_index(project, CONFIG, "session-2:startup")
+    assert _paths(artifact) == []
+    assert not state_path(project, DOCS_INDEX_FILE).exists()
+
+
+def test_unusable_state_dir_falls_back_to_an_inline_scan(project, isolated_home):
+    (isolated_home / ".meridian").write_text("not a directory")
+    artifact = get_docs_index(project, CONFIG, "session-1:startup")
+    assert artifact["generation"] == 0
+    assert _paths(artifact) == [".meridian/docs/auth.md"]
+
+
+def test_docs_are_listed_in_sorted_path_order_with_or_without_the_watcher(project, monkeypatch):
+    docs = project / ".meridian" / "docs"
+    for rel in ("zeta.md", "a-b.md", "a/b.md", "a/a.md", "B.md", "a.md", "a/sub/c.md"):
+        (docs / rel).parent.mkdir(parents=True, exist_ok=True)
+        (docs / rel).write_text(_doc(rel))
+    expected = [f".meridian/docs/{rel}" for rel in
+                ("B.md", "a/a.md", "a/b.md", "a/sub/c.md", "a-b.md", "a.md", "auth.md", "zeta.md")]
+
+    scanned = [e["path"] for e in scan_docs_entries(docs, project, use_watched=False)]
+    assert scanned == expected
+    assert _paths(get_docs_index(project, CONFIG, "session-1:startup")) == expected
+
+    # The watcher's index publishes (and is read back) in the same order, whatever order events arrived in
+    maintainer = IndexMaintainer(project, PollingWatcher(interval=0.05))
+    maintainer.rebuild()
+    maintainer.docs[".meridian/docs"] = dict(reversed(maintainer.docs[".meridian/docs"].items()))
+    maintainer.publish()
+    monkeypatch.setattr(meridian_config, "_watched_index_cache", {})
+    monkeypatch.setattr(meridian_config, "index_watcher_pid", lambda base_dir: os.getpid())
+    assert [e["path"] for e in scan_docs_entries(docs, project)] == expected
+    assert [line.split("**")[1] for line in state_path(project, DOCS_INDEX_FILE).read_text().splitlines()
+            if line.startswith("- **")] == expected
@@ -0,0 +1,206 @@
+"""index_watcher: change detection and index maintenance against a temp tree."""
+
+import ctypes
+import errno
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+import index_watcher
+from index_watcher import IndexMaintainer, InotifyWatcher, PollingWatcher
+from meridian_config import DOC_FRONTMATTER_INDEX, state_path
+
+
+def _doc(summary: str) -> str:
+    return f"---\nsummary: {summary}\nread_when:\n  - working on {summary}\n---\n# {summary}\n"
+
+
+@pytest.fixture
+def project(tmp_path) -> Path:
+    base = tmp_path / "project"
+    (base / ".meridian" / "docs").mkdir(parents=True)
+    (base / ".meridian" / "docs" / "auth.md").write_text(_doc("auth flow"))
+    return base
+
+
+def _poll_until(watcher, predicate, seconds: float = 5.0) -> set:
+    """Poll until the accumulated changes satisfy predicate (or time runs out)."""
+    seen: set = set()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        changed = watcher.poll(0.2)
+        seen |= changed or set()
+        if predicate(seen):
+            break
+    return seen
+
+
+def _inotify_or_skip() -> InotifyWatcher:
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError) as e:
+        pytest.skip(f"inotify unavailable: {e}")
+
+
+# =============================================================================
+# WATCHERS
+# =============================================================================
+@pytest.mark.parametrize("make", [lambda: PollingWatcher(interval=0.05), _inotify_or_skip], ids=["polling", "inotify"])
+def test_watcher_reports_create_modify_delete(project, make):
+    docs = project / ".meridian" / "docs"
+    watcher = make()
+    try:
+        watcher.watch_tree(docs, None)
+
+        created = docs / "billing.md"
+        created.write_text(_doc("billing"))
+        assert created in _poll_until(watcher, lambda s: created in s)
+
+        existing = docs / "auth.md"
+        existing.write_text(_doc("auth flow with refresh tokens"))
+        assert existing in _poll_until(watcher, lambda s: existing in s)
+
+        created.unlink()
+        assert created in _poll_until(watcher, lambda s: created in s)
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("make", [lambda: PollingWatcher(interval=0.05), _inotify_or_skip], ids=["polling", "inotify"])
+def test_watcher_follows_new_subdirectories(project, make):
+    docs = project / ".meridian" / "docs"
+    watcher = make()
+    try:
+        watcher.watch_tree(docs, None)
+        sub = docs / "guides"
+        sub.mkdir()
+        _poll_until(watcher, lambda s: sub in s)
+        nested = sub / "deploy.md"
+        nested.write_text(_doc("deploy"))
+        assert nested in _poll_until(watcher, lambda s: nested in s)
+    finally:
+        watcher.close()
+
+
+# =============================================================================
+# INDEX MAINTENANCE
+# =============================================================================
+def _entries(maintainer: IndexMaintainer) -> dict:
+    return maintainer.docs[".meridian/docs"]
+
+
+def test_apply_tracks_doc_create_modify_delete(project):
+    maintainer = IndexMaintainer(project, PollingWatcher(interval=0.05))
+    maintainer.rebuild()
+    assert _entries(maintainer)[".meridian/docs/auth.md"]["summary"] == "auth flow"
+
+    created = project / ".meridian" / "docs" / "billing.md"
+    created.write_text(_doc("billing"))
+    assert maintainer.apply({created})
+    assert _entries(maintainer)[".meridian/docs/billing.md"]["read_when"] == ["working on billing"]
+
+    created.write_text(_doc("billing and invoices"))
+    assert maintainer.apply({created})
+    assert _entries(maintainer)[".meridian/docs/billing.md"]["summary"] == "billing and invoices"
+    assert not maintainer.apply({created})  # Unchanged content is not a change
+
+    created.unlink()
+    assert maintainer.apply({created})
+    assert ".meridian/docs/billing.md" not in _entries(maintainer)
+
+
+def test_apply_tracks_nested_repos_and_ignores_other_files(project):
+    maintainer = IndexMaintainer(project, PollingWatcher(interval=0.05))
+    maintainer.rebuild()
+    assert maintainer.nested_repos == []
+
+    (project / "src").mkdir()
+    assert not maintainer.apply({project / "src"})
+
+    repo = project / "vendor-lib"
+    (repo / ".git").mkdir(parents=True)
+    assert maintainer.apply({repo, repo / ".git"})
+    assert maintainer.nested_repos == ["vendor-lib"]
+
+
+def test_apply_none_rebuilds(project):
+    maintainer = IndexMaintainer(project, PollingWatcher(interval=0.05))
+    maintainer.rebuild()
+    (project / ".meridian" / "docs" / "late.md").write_text(_doc("late"))
+    assert maintainer.apply(None)  # Lost events (queue overflow) force a full rescan
+    assert ".meridian/docs/late.md" in _entries(maintainer)
+
+
+def test_run_closes_watcher_before_polling_fallback(project, monkeypatch):
+    class RecordingWatcher(PollingWatcher):
+        instances = []
+
+        def __init__(self, interval=2.0):
+            super().__init__(interval)
+            self.closed = False
+            RecordingWatcher.instances.append(self)
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(index_watcher, "make_watcher", lambda force_polling=False, poll_interval=2.0: RecordingWatcher())
+    rebuild = IndexMaintainer.rebuild
+    calls = []
+
+    def flaky_rebuild(self):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError(28, "inotify watch limit reached")
+        rebuild(self)
+
+    monkeypatch.setattr(IndexMaintainer, "rebuild", flaky_rebuild)
+    index_watcher.run(project, should_stop=lambda: True)
+
+    first, second = RecordingWatcher.instances
+    assert first.closed and second.closed
+
+
+def test_watch_limit_after_startup_falls_back_to_polling(project, monkeypatch):
+    created = []
+    real_make = index_watcher.make_watcher
+
+    def recording(force_polling=False, poll_interval=2.0):
+        created.append(real_make(force_polling, 0.05))
+        return created[-1]
+
+    monkeypatch.setattr(index_watcher, "make_watcher", recording)
+    guides = project / ".meridian" / "docs" / "guides"
+    index_path = state_path(project, DOC_FRONTMATTER_INDEX)
+
+    def published() -> set:
+        try:
+            return {e["path"] for e in json.loads(index_path.read_text())["dirs"][".meridian/docs"]}
+        except (OSError, ValueError, KeyError):
+            return set()
+
+    def exhaust_watches(watcher):
+        if isinstance(watcher, InotifyWatcher):
+            watcher._add_watch = lambda *args: (ctypes.set_errno(errno.ENOSPC), -1)[1]
+        else:
+            def watch_tree(root, max_depth):
+                raise OSError(errno.ENOSPC, "inotify watch limit reached")
+            watcher.watch_tree = watch_tree
+
+    steps = iter(range(100))
+
+    def should_stop() -> bool:
+        step = next(steps, None)
+        if step is None:
+            return True
+        if step == 1:
+            # After startup: the watch limit is gone and a new doc dir appears
+            exhaust_watches(created[0])
+            guides.mkdir()
+            (guides / "deploy.md").write_text(_doc("deploy"))
+        return len(created) > 1 and ".meridian/docs/guides/deploy.md" in published()
+
+    index_watcher.run(project, poll_interval=0.05, should_stop=should_stop)
+    assert len(created) == 2 and isinstance(created[1], PollingWatcher)
+    assert ".meridian/docs/guides/deploy.md" in published()
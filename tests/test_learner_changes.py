@@ -0,0 +1,81 @@
+"""learner_changes: snapshot/diff of the learner's target files in a temp project."""
+
+import os
+
+import pytest
+
+import learner_changes
+
+
+@pytest.fixture
+def project(tmp_path):
+    base = tmp_path / "project"
+    (base / ".meridian" / "docs" / "guides").mkdir(parents=True)
+    (base / ".meridian" / "WORKSPACE.md").write_text("# Workspace\n- one\n- two\n")
+    (base / ".meridian" / "docs" / "auth.md").write_text("auth\nflow\n")
+    (base / ".meridian" / "docs" / "guides" / "deploy.md").write_text("deploy\n")
+    return base
+
+
+def _targets(base):
+    return [base / ".meridian" / "WORKSPACE.md", base / "CLAUDE.md"], [(base / ".meridian" / "docs", None)]
+
+
+def _changes(changes: list[dict], base) -> list[tuple]:
+    return [(str(c["path"].relative_to(base)), c["status"], c["added"], c["removed"]) for c in changes]
+
+
+def test_diff_reports_added_modified_and_deleted_targets(project):
+    before = learner_changes.snapshot(*_targets(project))
+    assert learner_changes.diff(before) == []
+
+    (project / ".meridian" / "WORKSPACE.md").write_text("# Workspace\n- one\n- three\n- four\n")
+    (project / "CLAUDE.md").write_text("Use the helper.\n")
+    (project / ".meridian" / "docs" / "guides" / "deploy.md").unlink()
+    (project / ".meridian" / "docs" / "guides" / "release.md").write_text("release\nsteps\n")
+    (project / ".meridian" / "docs" / "notes.txt").write_text("not markdown\n")
+    (project / "src.md").write_text("outside every target\n")
+
+    assert _changes(learner_changes.diff(before), project) == [
+        (".meridian/WORKSPACE.md", "modified", 2, 1),
+        (".meridian/docs/guides/deploy.md", "deleted", 0, 1),
+        (".meridian/docs/guides/release.md", "added", 2, 0),
+        ("CLAUDE.md", "added", 1, 0),
+    ]
+
+
+def test_rewrite_with_identical_content_is_not_a_change(project):
+    before = learner_changes.snapshot(*_targets(project))
+    doc = project / ".meridian" / "docs" / "auth.md"
+    doc.write_text("auth\nflow\n")
+    os.utime(doc, ns=(0, 0))  # Different mtime, same bytes
+    assert learner_changes.diff(before) == []
+
+
+def test_tree_depth_limits_what_is_collected(project):
+    before = learner_changes.snapshot([], [(project, 1)])
+    assert project / ".meridian" / "WORKSPACE.md" in before["state"]
+    assert project / ".meridian" / "docs" / "auth.md" not in before["state"]
+    (project / "README.md").write_text("top level\n")
+    (project / ".meridian" / "docs" / "new.md").write_text("too deep\n")
+    assert _changes(learner_changes.diff(before), project) == [("README.md", "added", 1, 0)]
+
+
+def test_large_targets_are_compared_by_hash_only(project, monkeypatch):
+    monkeypatch.setattr(learner_changes, "SNAPSHOT_TEXT_MAX_BYTES", 8)
+    before = learner_changes.snapshot(*_targets(project))
+    (project / ".meridian" / "WORKSPACE.md").write_text("# Workspace\n- changed\n")
+    assert _changes(learner_changes.diff(before), project) == [(".meridian/WORKSPACE.md", "modified", None, None)]
+
+
+def test_format_stat_and_display_path(project, isolated_home):
+    changes = [{"path": project / "a.md", "status": "added", "added": 3, "removed": 0},
+               {"path": project / "b.md", "status": "modified", "added": None, "removed": None},
+               {"path": project / "c.md", "status": "modified", "added": 1, "removed": 1}]
+    assert learner_changes.format_stat(changes) == "3 files changed, 4 insertions(+), 1 deletion(-)"
+    assert learner_changes.format_stat(changes[1:2]) == "1 file changed"
+    assert learner_changes.format_stat([]) == ""
+
+    assert learner_changes.display_path(project / ".meridian" / "WORKSPACE.md", project) == ".meridian/WORKSPACE.md"
+    assert learner_changes.display_path(isolated_home / ".claude" / "CLAUDE.md", project) == "~/.claude/CLAUDE.md"
+    assert learner_changes.display_path(project.parent / "elsewhere.md", project) == str(project.parent / "elsewhere.md")
@@ -0,0 +1,70 @@
+"""learner-log.py: reading the rotated run history and the statistics over it."""
+
+import importlib.util
+
+import pytest
+
+from conftest import ROOT
+from meridian_config import append_jsonl
+
+
+@pytest.fixture(scope="module")
+def learner_log():
+    spec = importlib.util.spec_from_file_location("learner_log", ROOT / ".meridian" / "scripts" / "learner-log.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run(n: int, day: str, duration: float, **extra) -> dict:
+    return {"timestamp": f"{day}T10:00:{n:02d}", "n": n, "success": True, "duration_seconds": duration,
+            "queue_wait_seconds": 0, "tools_used": ["Edit"], "files_changed": [], **extra}
+
+
+def test_read_history_joins_rotated_generations_oldest_first(learner_log, tmp_path):
+    log_path = tmp_path / "session-learner.jsonl"
+    for n in range(12):
+        assert append_jsonl(log_path, _run(n, "2026-02-27", 10), max_bytes=400, keep=10)
+    assert (tmp_path / "session-learner.jsonl.1").exists()
+
+    with open(log_path, "a") as f:
+        f.write("{not json\n\n")
+    (tmp_path / "session-learner.jsonl.bak").write_text('{"n": -1}\n')  # Not a rotated generation
+
+    assert [e["n"] for e in learner_log.read_history(log_path)] == list(range(12))
+    assert learner_log.read_history(tmp_path / "missing.jsonl") == []
+
+
+def test_summarize_counts_runs_failures_and_skips(learner_log):
+    entries = [
+        _run(0, "2026-02-27", 10, files_changed=["/p/.meridian/WORKSPACE.md"]),
+        _run(1, "2026-02-27", 20, files_changed=["/p/.meridian/WORKSPACE.md", "/p/docs/auth.md"]),
+        _run(2, "2026-02-27", 300, success=False, timed_out="idle", tools_used=[]),
+        _run(3, "2026-02-27", 40, success=False, exit_code=1),
+        {"timestamp": "2026-02-27T11:00:00", "skipped": True, "reason": "low_novelty"},
+        {"timestamp": "2026-02-27T11:00:01", "skipped": True, "reason": "low_novelty"},
+        {"timestamp": "2026-02-27T11:00:02", "skipped": True, "reason": "below_threshold"},
+    ]
+    stats = learner_log.summarize(entries)
+    assert (stats["entries"], stats["runs"], stats["skipped"]) == (7, 4, 3)
+    assert (stats["failures"], stats["timeouts"]) == (2, 1)
+    assert (stats["duration_p50"], stats["duration_p95"]) == (20, 300)
+    assert stats["tools_per_run"] == 0.8 and stats["files_per_run"] == 0.8
+    assert stats["skip_reasons"] == {"low_novelty": 2, "below_threshold": 1}
+    assert stats["top_files"][0] == ("/p/.meridian/WORKSPACE.md", 2)
+
+    empty = learner_log.summarize([])
+    assert empty["runs"] == 0 and empty["duration_p50"] is None and empty["tools_per_run"] is None
+
+
+def test_trend_buckets_by_day_and_iso_week(learner_log):
+    entries = [_run(0, "2026-02-27", 10), _run(1, "2026-02-28", 30), _run(2, "2026-03-02", 50),
+               {"timestamp": "garbage", "skipped": True, "reason": "low_novelty"}]
+
+    by_day = learner_log.trend(entries, "day")
+    assert [key for key, _stats in by_day] == ["2026-02-27", "2026-02-28", "2026-03-02", "?"]
+
+    by_week = dict(learner_log.trend(entries, "week"))
+    assert list(by_week) == ["2026-W09", "2026-W10", "?"]
+    assert by_week["2026-W09"]["runs"] == 2 and by_week["2026-W09"]["duration_p95"] == 30
+    assert by_week["?"]["skipped"] == 1
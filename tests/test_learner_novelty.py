@@ -0,0 +1,127 @@
+"""learner_novelty scoring on small hand-written transcripts."""
+
+import json
+import os
+import subprocess
+
+import pytest
+
+import learner_novelty
+
+MIN_NOVELTY = 3  # learner_min_novelty default
+
+
+def _write_transcript(path, user_messages: list[str], edits: int = 0) -> str:
+    lines = []
+    for i, text in enumerate(user_messages):
+        lines.append({"type": "user", "message": {"role": "user", "content": text},
+                      "timestamp": f"2000-01-01T00:00:{i:02d}Z"})
+        lines.append({"type": "assistant", "message": {"role": "assistant", "content": [
+            {"type": "text", "text": "Sure, actually that makes sense. I'd never do otherwise; always happy to help."}]}})
+    for i in range(edits):
+        lines.append({"type": "assistant", "message": {"role": "assistant", "content": [
+            {"type": "tool_use", "id": f"toolu_{i}", "name": "Edit", "input": {"file_path": "/p/a.py"}}]}})
+    path.write_text("".join(json.dumps(line, separators=(",", ":")) + "\n" for line in lines))
+    return str(path)
+
+
+def _score(tmp_path, user_messages, **kwargs) -> dict:
+    path = _write_transcript(tmp_path / "t.jsonl", user_messages, **kwargs)
+    return learner_novelty.novelty(tmp_path, path)
+
+
+def test_plain_session_is_skipped(tmp_path):
+    result = _score(tmp_path, [
+        "What does this function do? I actually wondered about it yesterday.",
+        "Thanks. Do you prefer the first approach or should we keep it as is?",
+        "I don't think we need tests for a question like that, instead just explain.",
+        "Great, that's all for now.",
+    ])
+    assert result["corrections"] == 0
+    assert result["score"] < MIN_NOVELTY
+
+
+def test_single_weak_cue_stays_below_threshold(tmp_path):
+    result = _score(tmp_path, ["Actually, what time zone does the server use?"])
+    assert result["correction_cues"] == 1 and result["corrections"] == 0
+    assert result["score"] < MIN_NOVELTY
+
+
+@pytest.mark.parametrize("text", [
+    "No, that's wrong. Use the repository helper.",
+    "From now on, run the linter before committing.",
+    "I told you not to touch the migrations.",
+    "That's not what I asked for.",
+])
+def test_corrective_session_passes(tmp_path, text):
+    result = _score(tmp_path, ["Please rename the config loader.", text])
+    assert result["corrections"] == 1
+    assert result["score"] >= MIN_NOVELTY
+
+
+def test_file_edits_and_messages_add_up(tmp_path):
+    result = _score(tmp_path, ["Rename the loader.", "Thanks."], edits=3)
+    assert result["file_edits"] == 3 and result["user_messages"] == 2
+    assert result["score"] == 3.5
+
+
+def test_tool_results_are_not_user_messages(tmp_path):
+    path = tmp_path / "t.jsonl"
+    line = {"type": "user", "message": {"role": "user", "content": [
+        {"type": "tool_result", "tool_use_id": "toolu_1", "content": "From now on the file is empty"}]}}
+    path.write_text(json.dumps(line, separators=(",", ":")) + "\n")
+    result = learner_novelty.novelty(tmp_path, str(path))
+    assert result["user_messages"] == 0 and result["corrections"] == 0
+
+
+def _tool_line(block: dict) -> str:
+    return json.dumps({"type": "assistant", "message": {"role": "assistant", "content": [block]}},
+                      separators=(",", ":")) + "\n"
+
+
+def test_tool_uses_are_found_in_any_key_order(tmp_path):
+    path = tmp_path / "t.jsonl"
+    path.write_text(
+        _tool_line({"type": "tool_use", "id": "toolu_1", "name": "Edit", "input": {"file_path": "/p/a.py"}})
+        + _tool_line({"id": "toolu_2", "type": "tool_use", "name": "Write", "input": {"file_path": "/p/b.py"}})
+        + _tool_line({"name": "MultiEdit", "type": "tool_use", "id": "toolu_3", "input": {"file_path": "/p/c.py"}})
+        + _tool_line({"type": "tool_use", "name": "ExitPlanMode", "id": "toolu_4", "input": {}})
+        # Input fields before the one that matters, including braces and quotes in their values
+        + _tool_line({"type": "tool_use", "id": "toolu_5", "name": "Write",
+                      "input": {"content": "def f():\n    return {\"a\": 1}\n", "file_path": "/p/.claude/plans/x.md"}})
+        + _tool_line({"id": "toolu_6", "name": "Bash", "type": "tool_use",
+                      "input": {"description": "Commit", "timeout": 5000, "command": "git add -A && git commit -m 'x'"}})
+        # A nested "name" inside another tool's input is not a tool_use
+        + _tool_line({"type": "tool_use", "id": "toolu_7", "name": "Task", "input": {"name": "Edit"}})
+    )
+    counts = learner_novelty.prescan(str(path))
+    assert counts["file_edits"] == 4
+    assert counts["plan_events"] == 2
+    assert counts["bash_commits"] == 1
+
+
+def _git(repo, *args, date: str = "2000-01-01T12:00:00Z", author: str | None = None):
+    env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+    if author:
+        env.update({"GIT_AUTHOR_NAME": author, "GIT_AUTHOR_EMAIL": f"{author}@example.com"})
+    subprocess.run(["git", *args], cwd=repo, env=env, check=True, capture_output=True)
+
+
+def test_commits_since_counts_only_local_first_parent_commits(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _git(repo, "config", "user.email", "me@example.com")
+    _git(repo, "config", "user.name", "Me")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "before the session", date="1999-12-31T00:00:00Z")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "mine 1")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "pulled from a teammate", author="other")
+    _git(repo, "checkout", "-q", "-b", "side")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "side work")
+    _git(repo, "checkout", "-q", "main")
+    _git(repo, "commit", "-q", "--allow-empty", "-m", "mine 2")
+    _git(repo, "merge", "-q", "--no-ff", "-m", "merge side", "side")
+
+    assert learner_novelty.commits_since(repo, "2000-01-01T00:00:00Z") == 2
+    assert learner_novelty.commits_since(repo, None) == 0
+    assert learner_novelty.commits_since(tmp_path / "not-a-repo", "2000-01-01T00:00:00Z") == 0
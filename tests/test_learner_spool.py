@@ -0,0 +1,114 @@
+"""learner_spool job lifecycle and the session-learner worker drain loop."""
+
+import importlib.util
+
+import pytest
+
+import learner_spool
+from conftest import ROOT
+
+
+@pytest.fixture
+def project(tmp_path):
+    path = tmp_path / "project"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def learner():
+    spec = importlib.util.spec_from_file_location("session_learner", ROOT / "scripts" / "session-learner.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _job(transcript: str = "/t/a.jsonl", end: int = 100, trigger: str = "compact", **extra) -> dict:
+    return {"transcript_path": transcript, "end_offset": end, "trigger": trigger, "config": {"n": end}, **extra}
+
+
+# =============================================================================
+# SPOOL
+# =============================================================================
+def test_enqueue_is_fifo_with_defaults(project):
+    first = learner_spool.enqueue(project, _job(end=1))
+    second = learner_spool.enqueue(project, _job(end=2))
+    assert learner_spool.pending_jobs(project) == [first, second]
+    job = learner_spool.load_job(first)
+    assert job["attempts"] == 0 and job["not_before"] == 0 and job["end_offset"] == 1
+
+
+def test_coalesce_folds_jobs_for_the_same_transcript(project):
+    head = learner_spool.enqueue(project, _job(end=100))
+    learner_spool.enqueue(project, _job(end=300, trigger="end"))
+    learner_spool.enqueue(project, _job(end=200))
+    other = learner_spool.enqueue(project, _job(transcript="/t/b.jsonl", end=50))
+
+    job = learner_spool.load_job(head)
+    assert learner_spool.coalesce(project, head, job) == 2
+    assert job["end_offset"] == 300 and job["trigger"] == "end"
+    assert job["config"] == {"n": 200}  # Newest snapshot
+    assert learner_spool.pending_jobs(project) == [head, other]
+    assert learner_spool.load_job(head)["coalesced"] == 2
+
+
+def test_retry_later_backs_off_then_drops(project, monkeypatch):
+    monkeypatch.setattr(learner_spool.time, "time", lambda: 1000.0)
+    path = learner_spool.enqueue(project, _job())
+    job = learner_spool.load_job(path)
+
+    learner_spool.mark_attempt(path, job)
+    assert learner_spool.retry_later(path, job, "timeout")
+    stored = learner_spool.load_job(path)
+    assert stored["not_before"] == 1000.0 + learner_spool.RETRY_BACKOFF_SECONDS
+    assert stored["last_error"] == "timeout"
+    assert learner_spool.next_ready_job(project) == (None, learner_spool.RETRY_BACKOFF_SECONDS)
+
+    job["attempts"] = learner_spool.MAX_ATTEMPTS
+    assert not learner_spool.retry_later(path, job, "timeout")
+    assert learner_spool.pending_jobs(project) == []
+
+
+# =============================================================================
+# WORKER DRAIN
+# =============================================================================
+def test_drain_spool_coalesces_and_finishes(learner, project, monkeypatch):
+    calls = []
+    monkeypatch.setattr(learner, "process_job", lambda project_dir, job: calls.append(job) or "done")
+    for end in (100, 200, 300):
+        learner_spool.enqueue(project, _job(end=end))
+
+    learner.drain_spool(project)
+    assert len(calls) == 1
+    assert calls[0]["end_offset"] == 300 and calls[0]["coalesced"] == 2 and calls[0]["attempts"] == 1
+    assert learner_spool.pending_jobs(project) == []
+
+
+def test_drain_spool_retries_until_attempts_run_out(learner, project, monkeypatch):
+    monkeypatch.setattr(learner_spool, "RETRY_BACKOFF_SECONDS", 0)
+    attempts = []
+    monkeypatch.setattr(learner, "process_job", lambda project_dir, job: attempts.append(job["attempts"]) or "retry")
+    learner_spool.enqueue(project, _job())
+
+    learner.drain_spool(project)
+    assert attempts == list(range(1, learner_spool.MAX_ATTEMPTS + 1))
+    assert learner_spool.pending_jobs(project) == []
+
+
+def test_drain_spool_does_not_retry_permanent_failures(learner, project, monkeypatch):
+    calls = []
+    monkeypatch.setattr(learner, "process_job", lambda project_dir, job: calls.append(job) or "failed")
+    learner_spool.enqueue(project, _job())
+    learner.drain_spool(project)
+    assert len(calls) == 1 and learner_spool.pending_jobs(project) == []
+
+
+def test_enqueue_job_spools_without_indexing(learner, project, tmp_path, monkeypatch):
+    transcript_file = tmp_path / "session.jsonl"
+    transcript_file.write_text('{"type":"user"}\n{"type":"assistant"}\n{"type":"us')  # Last line still being written
+    monkeypatch.setattr(learner.transcript, "update_transcript_index",
+                        lambda *a: pytest.fail("the hook must leave indexing to the worker"))
+
+    job = learner_spool.load_job(learner.enqueue_job(project, "PreCompact", str(transcript_file)))
+    assert job["end_offset"] == len('{"type":"user"}\n{"type":"assistant"}\n')
+    assert job["trigger"] == "compact" and "start_offset" not in job
@@ -0,0 +1,239 @@
+"""session-learner worker decisions, prompts and map-reduce passes (against scripts/dev/fake-claude.py)."""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import FAKE_CLAUDE, ROOT
+
+
+@pytest.fixture(scope="module")
+def learner():
+    spec = importlib.util.spec_from_file_location("session_learner", ROOT / "scripts" / "session-learner.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("run_info, outcome", [
+    ({"exit_code": -2, "timed_out": "idle"}, "retry"),
+    ({"exit_code": -2, "timed_out": "total"}, "retry"),
+    ({"exit_code": -4, "timed_out": None}, "retry"),  # Broken pipe
+    ({"exit_code": -5, "timed_out": None}, "retry"),  # OS error
+    ({"exit_code": -6, "timed_out": None}, "retry"),  # No host slot
+    ({"exit_code": 1, "timed_out": None}, "failed"),  # e.g. auth error
+    ({"exit_code": 2, "timed_out": None}, "failed"),  # Bad arguments
+    ({"exit_code": -3, "timed_out": None}, "failed"),  # claude binary not found
+])
+def test_only_transient_failures_are_retried(learner, run_info, outcome):
+    assert learner.failure_outcome(run_info) == outcome
+
+
+def test_encoder_shows_small_inputs_whole_and_sizes_for_payloads(learner):
+    entries = [
+        {"type": "tool_use", "tool": "Edit", "input": {"file_path": "/repo/a.py", "old_string": "x", "new_string": "y"},
+         "input_bytes": 55},
+        {"type": "tool_use", "tool": "Write", "input": {"file_path": "/repo/b.py"}, "input_bytes": 4200,
+         "elided": {"content": 4160}},
+        {"type": "tool_use", "tool": "Bash", "input": {"command": "pytest -q\n"}, "input_bytes": 25},
+    ]
+    lines = learner.encode_entries(entries).splitlines()
+    assert lines[0] == '[tool] Edit {"file_path":"/repo/a.py","old_string":"x","new_string":"y"}'
+    assert lines[1] == "[tool] Write file_path=/repo/b.py content=<4.1KB>"
+    assert lines[2] == "[tool] Bash $ pytest -q"
+    # The savings baseline counts the raw input sizes, not the projected entries
+    assert learner.json_encoded_size(entries) > 55 + 4200 + 25
+
+
+def _user_line(i: int) -> str:
+    return json.dumps({"type": "user", "message": {"role": "user", "content": f"message {i}"}},
+                      separators=(",", ":")) + "\n"
+
+
+def test_checkpoint_past_job_end_is_already_processed(learner, tmp_path, monkeypatch):
+    project = tmp_path / "project"
+    project.mkdir()
+    path = tmp_path / "session.jsonl"
+    path.write_text("".join(_user_line(i) for i in range(10)))
+    job_end = len(_user_line(0)) * 4
+    # An earlier run's extraction reached past this job's end and saved its checkpoint there
+    learner.transcript.update_transcript_index(project, str(path))
+    learner.transcript.save_cursor(project, str(path), learner.CHECKPOINT_CURSOR, path.stat().st_size,
+                                   overlap=0, workspace=learner.workspace_hash(project))
+
+    start, end, _line, checkpoint = learner.get_extraction_range(project, str(path), end_offset=job_end)
+    assert end == job_end and checkpoint["offset"] == path.stat().st_size
+
+    monkeypatch.setattr(learner.transcript_extract, "extract_shared",
+                        lambda *a, **k: pytest.fail("an already processed range must not be extracted"))
+    job = {"transcript_path": str(path), "trigger": "precompact", "end_offset": job_end,
+           "config": {"learner_min_novelty": 0}}
+    assert learner.process_job(project, job) == "skipped"
+    assert learner.transcript.load_cursor(project, str(path), learner.CHECKPOINT_CURSOR)["offset"] == path.stat().st_size
+
+
+# =============================================================================
+# DOC CANDIDATES
+# =============================================================================
+def _docs(project) -> list[dict]:
+    rows = [
+        ("docs/auth.md", "Session tokens and refresh flow", ["changing login or token refresh"]),
+        ("docs/billing.md", "Invoices and payment retries", ["touching the billing worker"]),
+        ("docs/deploy.md", "Release checklist", ["cutting a release"]),
+        ("people/alice.md", "Notes on the design team", ["planning design reviews"]),
+    ]
+    return [{"path": str(project / path), "summary": summary, "read_when": hints} for path, summary, hints in rows]
+
+
+def test_doc_candidates_are_touched_docs_plus_the_best_matches(learner, tmp_path):
+    project = tmp_path / "project"
+    docs = _docs(project)
+    entries = [{"type": "user", "text": "The token refresh fails after login, please fix it."}]
+    files = [str(project / "docs" / "deploy.md"), str(project / "src" / "session.py")]
+    terms = learner.session_query_terms(entries, files, project)
+
+    selected = learner.select_doc_candidates(docs, files, terms, 3, project)
+    assert selected == {str(project / "docs" / "deploy.md"), str(project / "docs" / "auth.md")}
+    # The limit caps ranked matches only; touched docs always qualify
+    assert learner.select_doc_candidates(docs, files, terms, 0, project) == {str(project / "docs" / "deploy.md")}
+
+
+def test_format_doc_candidates_lists_the_rest_by_path_only(learner, tmp_path):
+    project = tmp_path / "project"
+    docs = _docs(project)
+    text = learner.format_doc_candidates(docs, {str(project / "docs" / "auth.md")}, project)
+    lines = text.splitlines()
+    assert lines[0] == f"- **{project / 'docs' / 'auth.md'}** — Session tokens and refresh flow"
+    assert lines[1] == "  Read when: changing login or token refresh"
+    assert lines[-2:] == ["- docs/: billing.md, deploy.md", "- people/: alice.md"]
+    assert "Invoices" not in text
+
+    assert learner.format_doc_candidates(docs, set(), project).startswith("No docs matched this session.")
+    every = {doc["path"] for doc in docs}
+    assert "by path only" not in learner.format_doc_candidates(docs, every, project)
+
+
+# =============================================================================
+# PROMPTS
+# =============================================================================
+def _system_prompt_in_fresh_process(project, mode: str) -> str:
+    code = ("import importlib.util, sys; "
+            f"spec = importlib.util.spec_from_file_location('sl', {str(ROOT / 'scripts' / 'session-learner.py')!r}); "
+            "m = importlib.util.module_from_spec(spec); spec.loader.exec_module(m); "
+            f"sys.stdout.write(m.build_system_prompt(m.Path({str(project)!r}), {mode!r}))")
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+
+@pytest.mark.parametrize("mode", ["project", "assistant"])
+def test_system_prompt_is_byte_identical_across_runs(learner, tmp_path, mode):
+    project = tmp_path / "project"
+    (project / ".meridian" / "docs").mkdir(parents=True)
+    first = learner.build_system_prompt(project, mode)
+    first_message = learner.build_prompt(_messages(2), "", "", project, doc_index="")
+
+    # Everything a later run sees differently: workspace, CLAUDE.md, docs, git activity, transcript
+    (project / learner.WORKSPACE_FILE).write_text("# Workspace\n- auth refactor in progress\n")
+    (project / "CLAUDE.md").write_text("Use the repo helper.\n")
+    (project / ".meridian" / "docs" / "auth.md").write_text("---\nsummary: auth\nread_when:\n  - auth\n---\n")
+    second_message = learner.build_prompt(_messages(5), learner.load_workspace(project), "abc123 fix auth", project,
+                                          context_entries=_messages(1), doc_index="- **auth.md** — auth")
+
+    assert second_message != first_message
+    assert learner.build_system_prompt(project, mode) == first
+    assert _system_prompt_in_fresh_process(project, mode) == first
+    # Nothing volatile leaks into the instructions
+    for volatile in ("auth refactor", "Use the repo helper", "abc123", "message 0"):
+        assert volatile not in first
+
+
+def test_message_sections_go_from_least_to_most_volatile(learner, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "CLAUDE.md").write_text("Use the repo helper.\n")
+    before = learner.build_prompt(_messages(2), "# Workspace", "abc123 fix auth", project, doc_index="- docs")
+    after = learner.build_prompt(_messages(6), "# Workspace", "abc123 fix auth", project, doc_index="- docs")
+    tags = ["<existing-docs>", "<current-claudemd>", "<current-workspace>", '<context id="git-activity">',
+            '<context id="transcript">']
+    assert [before.index(tag) for tag in tags] == sorted(before.index(tag) for tag in tags)
+    # A run that only saw more transcript shares the whole prefix before it
+    prefix = before.index('<context id="transcript">')
+    assert after[:prefix] == before[:prefix]
+
+
+# =============================================================================
+# MAP-REDUCE
+# =============================================================================
+@pytest.fixture
+def claude_on_path(fake_claude, tmp_path, monkeypatch):
+    """Install fake-claude as `claude` on PATH; call the result with scenario keys."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "claude").symlink_to(FAKE_CLAUDE)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+
+    def scenario(**keys):
+        for key, value in fake_claude.env(**keys).items():
+            if key.startswith("FAKE_CLAUDE"):
+                monkeypatch.setenv(key, value)
+        return fake_claude
+    return scenario
+
+
+def _messages(count: int, size: int = 400) -> list[dict]:
+    return [{"type": "user", "text": f"message {i} " + "x" * size} for i in range(count)]
+
+
+def test_chunk_entries_keeps_order_within_the_budget(learner):
+    entries = _messages(10)
+    budget = learner.estimate_tokens(entries[:3])
+    chunks = learner.chunk_entries(entries, budget)
+    assert [e for chunk in chunks for e in chunk] == entries
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert all(learner.estimate_tokens(chunk) <= budget for chunk in chunks)
+
+    # An entry over the budget gets a chunk of its own instead of being cut
+    big = {"type": "user", "text": "y" * budget * 8}
+    assert learner.chunk_entries(entries[:2] + [big] + entries[2:3], budget) == [entries[:2], [big], entries[2:3]]
+
+
+def test_map_findings_summarizes_every_chunk_and_retries_failures(learner, claude_on_path, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    fake = claude_on_path(latency=0, fail_first=1, map={
+        "edits": [], "result": 'Findings: {"work_state": ["chunk done"], "corrections": [], "knowledge": ["k"]}'})
+    entries = _messages(10)
+    findings, chunk_count, failed = learner.map_findings(entries, project, "", learner.estimate_tokens(entries[:4]), 2)
+
+    assert (chunk_count, failed) == (3, 0)
+    assert findings == [{"part": n, "work_state": ["chunk done"], "corrections": [], "knowledge": ["k"]}
+                        for n in (1, 2, 3)]
+    starts = [c for c in fake.calls() if c["phase"] == "start"]
+    assert len(starts) == 4 and all(c["map"] for c in starts)  # One scripted failure, run again
+    assert all(c["system_prompt_bytes"] == len(learner.MAP_SYSTEM_PROMPT.encode()) for c in starts)
+
+
+def test_map_findings_reports_chunks_that_keep_failing(learner, claude_on_path, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    claude_on_path(latency=0, map={"edits": [], "result": "no findings here"})
+    entries = _messages(4)
+    findings, chunk_count, failed = learner.map_findings(entries, project, "", learner.estimate_tokens(entries[:2]), 2)
+    assert (findings, chunk_count, failed) == ([], 2, 2)
+
+
+def test_reduce_prompt_carries_merged_findings_instead_of_the_transcript(learner, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    entries = _messages(3)
+    findings = [{"part": 1, "work_state": ["auth refactor started"], "corrections": [], "knowledge": []},
+                {"part": 2, "work_state": ["auth refactor done"], "corrections": ["use the repo helper"],
+                 "knowledge": ["tokens expire after 5 minutes"]}]
+    prompt = learner.build_prompt(entries, "", "", project, findings=findings, doc_index="- docs")
+    assert 'id="session-findings"' in prompt and "in 2 consecutive chunks" in prompt
+    assert json.dumps(findings, indent=2, ensure_ascii=False) in prompt
+    assert 'id="transcript"' not in prompt and "message 0" not in prompt
+    assert prompt.rstrip().endswith("</context>")
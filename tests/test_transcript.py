@@ -0,0 +1,39 @@
+"""transcript index: fingerprints and cursors across appends and rotation."""
+
+import json
+
+import transcript
+
+
+def _line(i: int) -> str:
+    return json.dumps({"type": "user", "message": {"role": "user", "content": f"message {i}"}},
+                      separators=(",", ":")) + "\n"
+
+
+def test_short_transcript_keeps_its_record_when_it_grows(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_text(_line(0))
+    assert path.stat().st_size < transcript.HEAD_BYTES
+
+    first = transcript.update_transcript_index(tmp_path, str(path))
+    transcript.save_cursor(tmp_path, str(path), "learner", first["size"])
+
+    with open(path, "a") as f:
+        f.write("".join(_line(i) for i in range(1, 20)))
+    assert path.stat().st_size > transcript.HEAD_BYTES
+
+    grown = transcript.update_transcript_index(tmp_path, str(path))
+    assert grown["lines"] == 20 and grown["head_bytes"] == transcript.HEAD_BYTES
+    assert transcript.load_cursor(tmp_path, str(path), "learner")["offset"] == first["size"]
+
+
+def test_replaced_transcript_is_rescanned(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_text(_line(0))
+    first = transcript.update_transcript_index(tmp_path, str(path))
+    transcript.save_cursor(tmp_path, str(path), "learner", first["size"])
+
+    path.write_text("".join(_line(i) for i in range(100, 120)))  # Same path, different session
+    record = transcript.update_transcript_index(tmp_path, str(path))
+    assert record["lines"] == 20
+    assert transcript.load_cursor(tmp_path, str(path), "learner") is None
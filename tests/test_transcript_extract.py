@@ -0,0 +1,118 @@
+"""transcript_extract: projected tool inputs and the incrementally extended cache."""
+
+import json
+
+import pytest
+
+import transcript_extract
+from transcript_extract import DEFAULT_PROJECTIONS, extract_shared, iter_entries, project
+
+
+def _line(entry: dict) -> str:
+    return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+def _turn(i: int) -> str:
+    return (_line({"type": "user", "message": {"role": "user", "content": f"please update module {i}"}})
+            + _line({"type": "assistant", "requestId": f"req_{i}", "message": {"role": "assistant", "content": [
+                {"type": "text", "text": f"Editing module {i}."},
+                {"type": "tool_use", "id": f"toolu_{i}", "name": "Write",
+                 "input": {"file_path": f"/repo/mod_{i}.py", "content": f"SECRET_BODY_{i} = 1\n" * 50}}]}}))
+
+
+@pytest.fixture
+def transcript_file(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_text("".join(_turn(i) for i in range(4)))
+    return path
+
+
+@pytest.fixture
+def decode_calls(monkeypatch) -> list:
+    calls = []
+    real = transcript_extract.iter_entries
+
+    def recording(path, start=0, end=None):
+        calls.append((start, end))
+        return real(path, start, end)
+
+    monkeypatch.setattr(transcript_extract, "iter_entries", recording)
+    return calls
+
+
+def _fresh(path, start, end) -> dict:
+    return project(iter_entries(str(path), start, end), [cls() for cls in DEFAULT_PROJECTIONS])
+
+
+def _line_offsets(path) -> list[int]:
+    offsets, pos = [], 0
+    for line in path.read_bytes().splitlines(keepends=True):
+        offsets.append(pos)
+        pos += len(line)
+    return offsets + [pos]
+
+
+def test_tool_inputs_keep_only_projected_fields(tmp_path, transcript_file):
+    size = transcript_file.stat().st_size
+    result = extract_shared(tmp_path, str(transcript_file), 0, size)
+    tool_entries = [e for e in result["learner"]["entries"] if e["type"] == "tool_use"]
+    body_bytes = len("SECRET_BODY_0 = 1\n" * 50)
+    assert tool_entries[0]["input"] == {"file_path": "/repo/mod_0.py"}
+    assert tool_entries[0]["elided"] == {"content": body_bytes}
+    assert tool_entries[0]["input_bytes"] > body_bytes
+    assert result["tools"]["files"] == [f"/repo/mod_{i}.py" for i in range(4)]
+
+    cache_file = next((tmp_path / "home" / ".meridian" / "state").glob("*/transcript-extract.json"))
+    assert "SECRET_BODY" not in cache_file.read_text()
+
+
+def test_cache_extends_forward_and_backward(tmp_path, transcript_file, decode_calls):
+    offsets = _line_offsets(transcript_file)
+    middle, size = offsets[4], offsets[-1]
+
+    first = extract_shared(tmp_path, str(transcript_file), middle, size)
+    assert not first["reused"] and decode_calls == [(middle, size)]
+
+    # Transcript grows; the next run starts from a later checkpoint
+    with open(transcript_file, "a") as f:
+        f.write(_turn(4))
+    grown = transcript_file.stat().st_size
+    checkpoint = offsets[6]
+    second = extract_shared(tmp_path, str(transcript_file), checkpoint, grown)
+    assert decode_calls[-1] == (size, grown)  # Only the appended bytes
+    assert {k: second[k] for k in ("learner", "dialogue", "tools")} == _fresh(transcript_file, checkpoint, grown)
+
+    # An earlier start decodes only the missing prefix
+    third = extract_shared(tmp_path, str(transcript_file), 0, grown)
+    assert decode_calls[-1] == (0, middle)
+    assert {k: third[k] for k in ("learner", "dialogue", "tools")} == _fresh(transcript_file, 0, grown)
+    assert third["end"] == grown
+
+
+def test_covered_range_is_reused_without_decoding(tmp_path, transcript_file, decode_calls):
+    offsets = _line_offsets(transcript_file)
+    extract_shared(tmp_path, str(transcript_file), 0, offsets[-1])
+    decode_calls.clear()
+
+    result = extract_shared(tmp_path, str(transcript_file), offsets[2], offsets[6])
+    assert result["reused"] and decode_calls == []
+    assert result["end"] == offsets[-1]
+    assert [e["text"] for e in result["dialogue"]][0] == "please update module 1"
+
+
+def test_disjoint_range_starts_a_new_cache(tmp_path, transcript_file, decode_calls):
+    offsets = _line_offsets(transcript_file)
+    extract_shared(tmp_path, str(transcript_file), 0, offsets[2])
+    result = extract_shared(tmp_path, str(transcript_file), offsets[4], offsets[-1])
+    assert decode_calls[-1] == (offsets[4], offsets[-1])
+    assert result["learner"]["offsets"][0] == offsets[4]
+
+
+def test_small_tool_inputs_are_kept_whole():
+    small = {"file_path": "/repo/a.py", "old_string": "x = 1", "new_string": "x = 2"}
+    assert transcript_extract.project_tool_input(small) == (small, len(json.dumps(small, separators=(",", ":"))), None)
+
+    large = {"file_path": "/repo/a.py", "old_string": "x = 1\n" * 100, "replace_all": False}
+    kept, input_bytes, elided = transcript_extract.project_tool_input(large)
+    assert kept == {"file_path": "/repo/a.py", "replace_all": False}
+    assert elided == {"old_string": 600} and input_bytes > 600